@@ -1,14 +1,23 @@
 #!/usr/bin/python3
 
+import getopt
 import glob
+import io
+import multiprocessing
 import os
 import re
-import socket
 import subprocess
 import sys
+import traceback
 from datetime import datetime, date
 import yaml
 
+import jobads
+import jobsteps
+import jobrecords
+import resultimage
+import runmanifest
+import runtrace
 import vmu
 
 def run_command(command, shell=False):
@@ -43,74 +52,217 @@ def re_extract(regexp, data, flags=0, default=None, group=None):
     else:
         return m.group(group)
 
-def extract_inet_address(run_job_log):
-    eth0_block = re_extract(r'^\d:\s*eth0:(.*?)(?:^\d)', run_job_log, re.MULTILINE | re.DOTALL, group=1)
-    ens3_block = re_extract(r'^\d:\s*ens3:(.*?)(?:^\d)', run_job_log, re.MULTILINE | re.DOTALL, group=1)
-    enp1s0_block = re_extract(r'^\d:\s*enp1s0:(.*?)(?:^\d)', run_job_log, re.MULTILINE | re.DOTALL, group=1)
-    if eth0_block:
-        return re_extract(r'^\s+inet\s+(.*?)\/', eth0_block, re.MULTILINE, group=1)
-    elif ens3_block:
-        return re_extract(r'^\s+inet\s+(.*?)\/', ens3_block, re.MULTILINE, group=1)
-    elif enp1s0_block:
-        return re_extract(r'^\s+inet\s+(.*?)\/', enp1s0_block, re.MULTILINE, group=1)
-    else:
-        return None
-
-def extract_last(run_job_log, regexp):
-    all_installs = re.findall(regexp, run_job_log, re.MULTILINE)
-    if len(all_installs) == 0:
-        return None
-    return all_installs[-1]
-
-def write_yaml_value(value):
-    if value is None:
-        result = '~'
-    elif isinstance(value, str):
-        if re.search(r"['\"\n|>,#\[\]]", value):
-            result = "'%s'" % value.replace("'", "''").replace('\n', '\\n')
-        else:
-            result = value
-    elif isinstance(value, list):
-        result = ''
-        if len(value) > 0:
-            for element in value:
-                result += '\n    -%s' % write_yaml_value(element)
-    else:
-        result = str(value)
-    if '\n' in result:
-        return result
-    return ' ' + result
-
-def write_yaml_mapping(data, key):
-    if key in data:
-        if key in ('job_serial', 'job_id'):
-            print('  %s: \'%s\'' % (key, data[key]))
-        else:
-            value = data[key]
-            print('  %s:%s' % (key, write_yaml_value(value)))
-
-def write_yaml(data):
-    print('-')
-    for key in sorted(data.keys()):
-        write_yaml_mapping(data, key)
-
-def write_failure_and_exit(data, status, message, extra=None):
+# ======================================================================================================================
+# Single-pass log scanners
+#
+# run-job.log and the osg-test log are each streamed once, line by line, against the precompiled patterns below.  The
+# scanners only collect raw facts; interpreting them is left to classify_log() and the main program.
+
+CREATION_DATE_COMMAND = 'cat /etc/creation_date'
+REDHAT_RELEASE_COMMAND = 'cat /etc/redhat-release'
+INET_INTERFACES = ('eth0', 'ens3', 'enp1s0') # in order of preference
+INET_HEADER_RE = re.compile(r'^\d:\s*(%s):' % '|'.join(INET_INTERFACES))
+INET_ADDRESS_RE = re.compile(r'^\s+inet\s+(.*?)\/')
+RPM_ARCH_RE = re.compile(r'el[0-9]\.(aarch64|x86_64).rpm')
+ARCH_RE = re.compile(r'(aarch64|x86_64)')
+SOURCE_RE = re.compile(r'^(osg-test|osg-ca-generator) source: (.*)$')
+
+FAILURE_RE = re.compile(r'^(ERROR|FAIL): (\w+) \(osgtest\.tests\.(\w+)\.(\w+).*\)')
+BAD_SKIP_RE = re.compile(r'^(\w+) \(osgtest\.tests\.(\w+)\.(\w+)\) (.*)$')
+OKSKIP_RE = re.compile(r'\S+ \(osgtest\.tests\.([^\.]+).*okskip$')
+START_TIME_RE = re.compile(r'^Start time: (.*)$')
+SUMMARY_RAN_RE = re.compile(r'Ran \d+ tests in .*')
+SUMMARY_RESULT_RE = re.compile(r'\s*((?:OK|FAILED)\s*\([^)]+\))$')
+ALARM_MESSAGE_RE = re.compile(r'.*message: (.*):')
+LAST_TEST_RE = re.compile(r'File .*osgtest\/tests\/(.*)\".*in (.*)')
+YUM_TIMEOUT_MESSAGE = 'AssertionError: Retries terminated after timeout period'
+
+
+def scan_run_job_log(lines):
+    """Scan run-job.log, given as an iterable of lines such as an open file, in a single pass and return a dict of
+    the facts used by the analysis:
+
+    vm_creation_date, os_release: output of the matching 'cat' commands, if they succeeded
+    platform: architecture of the guest
+    inet_address: IPv4 address of the first network interface found in INET_INTERFACES
+    epel_failed: True if the EPEL repository could not be installed
+    final_osgtest_install: the last 'install osg-test' command block, through its '==>' result line
+    osg-test, osg-ca-generator: the reported source of each package
+    """
+    facts = {'vm_creation_date': None, 'os_release': None, 'platform': None, 'inet_address': None,
+             'epel_failed': False, 'final_osgtest_install': None, 'osg-test': None, 'osg-ca-generator': None}
+    rpm_arch = arch = None
+    inet_blocks = {} # interface -> first inet address of its first complete 'ip addr' block
+    inet_iface = inet_address = None
+    install_block = None
+    prev_prev_line = prev_line = None
+
+    for line in lines:
+        line = line.rstrip('\n')
+
+        # 'cat' command output is the single line between the command and its '==> OK'
+        if line.startswith('==> OK') and prev_prev_line is not None:
+            if facts['vm_creation_date'] is None and prev_prev_line.endswith(CREATION_DATE_COMMAND):
+                facts['vm_creation_date'] = prev_line
+            elif facts['os_release'] is None and prev_prev_line.endswith(REDHAT_RELEASE_COMMAND):
+                facts['os_release'] = prev_line
+
+        if rpm_arch is None:
+            m = RPM_ARCH_RE.search(line)
+            if m:
+                rpm_arch = m.group(1)
+        if arch is None:
+            m = ARCH_RE.search(line)
+            if m:
+                arch = m.group(1)
+
+        # An interface block runs until the next line starting with a digit
+        if line[:1].isdecimal():
+            if inet_iface is not None:
+                inet_blocks[inet_iface] = inet_address
+                inet_iface = None
+            m = INET_HEADER_RE.match(line)
+            if m and m.group(1) not in inet_blocks:
+                inet_iface = m.group(1)
+                m = INET_ADDRESS_RE.match(line[m.end():])
+                inet_address = m.group(1) if m else None
+        elif inet_iface is not None and inet_address is None:
+            m = INET_ADDRESS_RE.match(line)
+            if m:
+                inet_address = m.group(1)
+
+        if not facts['epel_failed'] and 'Could not install EPEL repository' in line:
+            facts['epel_failed'] = True
+
+        if install_block is not None:
+            install_block.append(line)
+            if line.startswith('==>'):
+                facts['final_osgtest_install'] = '\n'.join(install_block)
+                install_block = None
+        elif 'install osg-test' in line:
+            install_block = [line]
+
+        m = SOURCE_RE.match(line)
+        if m and facts[m.group(1)] is None:
+            facts[m.group(1)] = m.group(2)
+
+        prev_prev_line, prev_line = prev_line, line
+
+    facts['platform'] = rpm_arch or arch
+    for iface in INET_INTERFACES:
+        if iface in inet_blocks:
+            facts['inet_address'] = inet_blocks[iface]
+            break
+    return facts
+
+def scan_osg_test_log(lines):
+    """Scan an osg-test log, given as an iterable of lines such as an open file, in a single pass and return a dict of
+    the raw facts used by the analysis:
+
+    failures: (status, function, module, module_name) for each ERROR or FAIL line
+    bad_skips: (function, module, module_name, comment) for each entry of the first BAD SKIPS section
+    okskip_modules: the test module of each 'okskip' line
+    yum_timeout: True if yum retries timed out
+    start_time: the reported start time of the run
+    alarm_time: timestamp of the last 'Caught alarm' message
+    last_test: (module, test) of the last osgtest traceback line
+    summary: (ran_line, result_line) of the first unittest summary
+    """
+    facts = {'failures': [], 'bad_skips': [], 'okskip_modules': [], 'yum_timeout': False, 'start_time': None,
+             'alarm_time': None, 'last_test': None, 'summary': None}
+    # BAD SKIPS section states: 0 = looking for '====', 1 = saw '====', 2 = saw 'BAD SKIPS:',
+    # 3 = reading entries, 4 = done
+    bad_skip_state = 0
+    bad_skip_lines = []
+    summary_ran = summary_result = None
+    prev_line = None
+    raw_line = ''
+
+    for raw_line in lines:
+        line = raw_line.rstrip('\n')
+
+        m = FAILURE_RE.match(line)
+        if m:
+            facts['failures'].append(m.groups())
+
+        if bad_skip_state < 4:
+            if bad_skip_state == 3:
+                if line or not bad_skip_lines:
+                    bad_skip_lines.append(line)
+                else:
+                    bad_skip_state = 4
+            elif bad_skip_state == 2 and line and line.strip('-') == '':
+                bad_skip_state = 3
+            elif bad_skip_state == 1 and line == 'BAD SKIPS:':
+                bad_skip_state = 2
+            else:
+                bad_skip_state = 1 if line and line.strip('=') == '' else 0
+
+        m = OKSKIP_RE.search(line)
+        if m:
+            facts['okskip_modules'].append(m.group(1))
+
+        if not facts['yum_timeout'] and YUM_TIMEOUT_MESSAGE in line:
+            facts['yum_timeout'] = True
+
+        if facts['start_time'] is None:
+            m = START_TIME_RE.match(line)
+            if m:
+                facts['start_time'] = m.group(1)
+
+        # The summary is a 'Ran N tests' line followed by the OK/FAILED result (after any blank lines), which must not
+        # be followed by the STDOUT of a nested test suite
+        if facts['summary'] is None:
+            if summary_result is not None:
+                if not line.startswith('STDOUT'):
+                    facts['summary'] = summary_result
+                summary_result = None
+            elif summary_ran is not None and line.strip():
+                m = SUMMARY_RESULT_RE.match(line)
+                if m:
+                    summary_result = (summary_ran, m.group(1))
+                summary_ran = None
+            if facts['summary'] is None and summary_result is None:
+                m = SUMMARY_RAN_RE.search(line)
+                if m:
+                    summary_ran = m.group(0)
+
+        if prev_line is not None and line.endswith('Caught alarm:'):
+            m = ALARM_MESSAGE_RE.search(prev_line)
+            if m:
+                facts['alarm_time'] = m.group(1)
+        m = LAST_TEST_RE.search(line)
+        if m:
+            facts['last_test'] = m.groups()
+
+        prev_line = line
+
+    if bad_skip_state == 4:
+        for entry in bad_skip_lines:
+            m = BAD_SKIP_RE.match(entry)
+            if m:
+                facts['bad_skips'].append(m.groups())
+    if summary_result is not None and raw_line.endswith('\n'):
+        # The result line ended the log
+        facts['summary'] = summary_result
+    return facts
+
+def record_failure(data, status, message, extra=None):
     data['run_status'] = status
     data['run_summary'] = message
     if extra is not None:
         data['run_details'] = extra
-    write_yaml(data)
-    sys.exit(0)
+    return data
 
-def parse_log(osg_test_log, test_exceptions, components):
+def classify_log(log_facts, test_exceptions, components):
+    """Determine the osg-test status, problem list and okskip tags from the facts returned by scan_osg_test_log()"""
     # Extract problems
     today = date.today()
     run_status = ''
     problems = []
     ignored_failures = 0
     cleanup_failures = 0
-    for m in re.finditer(r'^(ERROR|FAIL): (\w+) \(osgtest\.tests\.(\w+)\.(\w+).*\)', osg_test_log, re.MULTILINE):
-        status, function, module, module_name = m.groups()
+    for status, function, module, module_name in log_facts['failures']:
         if module == 'special_cleanup':
             cleanup_failures += 1
         if test_exceptions:
@@ -134,97 +286,91 @@ def parse_log(osg_test_log, test_exceptions, components):
     elif any('install_packages' in problem for problem in problems):
         run_status = 'install'
 
-    m = re.search(r'^=+\nBAD SKIPS:\n-+\n(.*?)\n\n', osg_test_log, re.MULTILINE | re.DOTALL)
-    if m is not None:
-        for n in re.finditer(r'^(\w+) \(osgtest\.tests\.(\w+)\.(\w+)\) (.*)$', m.group(1), re.MULTILINE):
-            function, module, module_name, comment = n.groups()
-            problems.append('|'.join((module, function, module_name, 'SKIP', comment)))
+    for function, module, module_name, comment in log_facts['bad_skips']:
+        problems.append('|'.join((module, function, module_name, 'SKIP', comment)))
     if not problems:
         run_status = 'pass'
     elif not run_status: # catch missed failures
         run_status = 'fail'
 
     okskips = {}
-    m = re.finditer(r'\S+ \(osgtest\.tests\.([^\.]+).*okskip$', osg_test_log, re.MULTILINE)
-    if m is not None:
-        for module in m:
-            try:
-                tags = components[module.group(1)]
-            except KeyError:
-                continue
-            try:
-                for tag in tags:
-                    okskips[tag] += 1
-            except KeyError:
-                okskips[tag] = 1
-                
-    if re.search('AssertionError: Retries terminated after timeout period', osg_test_log, re.MULTILINE):
+    for module in log_facts['okskip_modules']:
+        try:
+            tags = components[module]
+        except KeyError:
+            continue
+        try:
+            for tag in tags:
+                okskips[tag] += 1
+        except KeyError:
+            okskips[tag] = 1
+
+    if log_facts['yum_timeout']:
         run_status += ' yum_timeout'
 
     return run_status, problems, okskips
 
-# ======================================================================================================================
+def parse_log(osg_test_log, test_exceptions, components):
+    """Classify the contents of an osg-test log; see classify_log()"""
+    return classify_log(scan_osg_test_log(io.StringIO(osg_test_log)), test_exceptions, components)
 
-if __name__ == '__main__':
-    # Process command-line arguments
-    if len(sys.argv) != 3:
-        print('usage: %s SERIAL JOBID' % os.path.basename(sys.argv[0]))
-        sys.exit(1)
-    job_serial = sys.argv[1]
-    job_id = sys.argv[2]
-    
+def analyze_job(job_serial, job_id, test_exceptions, components, job_ads, manifest=None):
+    """Analyze the output of job_serial in the current directory and return the analysis data. The files of the job
+    are read from output-SERIAL or, when they were not extracted there, from result-image-SERIAL.qcow2.
+
+    job_ads is the jobads.JobAds of the run, which must already have fetched job_id. The test parameters of the job
+    come from manifest, the runmanifest.RunManifest of the run, or from its osg-test.conf if the manifest lacks it.
+    """
     # Start hash
     data = {
         'job_serial': job_serial,
         'job_id': job_id,
         'run_directory': os.getcwd()
         }
-    
-    # Construct expected directory name
     test_run_dir = 'output-' + job_serial
-    if not os.path.exists(test_run_dir):
-        sys.exit("Missing output dir '%s'" % test_run_dir)
-    
-    # Read condor_history output for transfer-in time (in seconds)
-    (rc, stdout, _) = run_command(('condor_history', '-format', '%d\\n ', 'JobCurrentStartExecutingDate - JobCurrentStartDate',
-                                   job_id, '-match', '1'))
-    if rc == 0:
-        data['transfer_in'] = re_extract(r'^(\S+)$', stdout, group=1)
+    job_files = resultimage.JobFiles.for_serial('.', job_serial)
     
-    # Separate query for hostname in case the JobAd's missing attributes
-    (rc, stdout, _) = run_command(('condor_history', '-format', '%s\\n', 'LastRemoteHost', job_id, '-match', '1'))
-    if rc ==0:
-        data['host_name'] = re_extract(r'^\S+@(\S+)$', stdout, group=1)
-    try:
-        data['host_address'] = socket.gethostbyname(data['host_name'])
-    except TypeError:
+    # Transfer-in time (in seconds) and hostname from the job ad
+    data['transfer_in'] = job_ads.transfer_in(job_id)
+    data['host_name'] = job_ads.host_name(job_id)
+    if data['host_name'] is None:
         # Missing hostname from condor_history
         data['host_name'] = 'unavailable'
         data['host_address'] = 'unavailable'
-    except socket.gaierror:
-        # When gethostbyname can't find address by hostname1
-        data['host_address'] = 'unavailable'
+    else:
+        data['host_address'] = job_ads.host_address(data['host_name'])
     
-    # Read osg-test.conf
-    conf_file_name = os.path.join(test_run_dir, 'input', 'osg-test.conf')
-    conf_file = read_file(conf_file_name)
-    data['param_sources'] = re_extract(r'^sources\s*=\s*(.*)$', conf_file, re.MULTILINE, group=1)
-    data['param_packages'] = re_extract(r'^packages\s*=\s*(.*)$', conf_file, re.MULTILINE, group=1)
-    data['selinux'] = re_extract(r'^selinux\s*=\s*(.*)$', conf_file, re.MULTILINE, group=1)
+    # Look up the test parameters, written as osg-test.conf has them
+    job = manifest.job(job_serial) if manifest is not None else None
+    if job is not None:
+        data['param_sources'] = job['sources']
+        data['param_packages'] = ', '.join(job['packages'])
+        data['selinux'] = str(job['selinux'])
+    else:
+        conf_file = job_files.read('input/osg-test.conf')
+        data['param_sources'] = re_extract(r'^sources\s*=\s*(.*)$', conf_file, re.MULTILINE, group=1)
+        data['param_packages'] = re_extract(r'^packages\s*=\s*(.*)$', conf_file, re.MULTILINE, group=1)
+        data['selinux'] = re_extract(r'^selinux\s*=\s*(.*)$', conf_file, re.MULTILINE, group=1)
 
     # Read free size left in the IO image
-    io_free_size_file = os.path.join(test_run_dir, 'io_free_size')
-    data['io_free_size'] = read_file(io_free_size_file)
+    data['io_free_size'] = job_files.io_free_size()
+
+    # Scan run-job.log
+    with job_files.open('run-job.log') as run_job_log:
+        run_job_facts = scan_run_job_log(run_job_log)
 
-    # Read run-job.log
-    run_job_logfile = os.path.join(test_run_dir, 'run-job.log')
-    run_job_log = read_file(run_job_logfile)
+    # Sum up the time, retries and backoff of the steps that run-job took, when it logged them
+    try:
+        with job_files.open(jobsteps.STEP_LOG_PATH) as step_log:
+            data.update(jobsteps.summarize(jobsteps.read_steps(step_log)))
+    except IOError:
+        data['guest_steps'] = None
     
     # Get VM creation date
-    data['vm_creation_date'] = re_extract(r'cat /etc/creation_date\n(.*?)\n==> OK', run_job_log, group=1)
+    data['vm_creation_date'] = run_job_facts['vm_creation_date']
 
     # Get and simplify OS release string
-    os_long_string = re_extract(r'cat /etc/redhat-release\n(.*?)\n==> OK', run_job_log, group=1)
+    os_long_string = run_job_facts['os_release']
     os_string = re.sub(r'release\s+', '', os_long_string)
     os_string = re.sub(r'\s*\(.*\)$', '', os_string)
     data['os_release'] = os_string
@@ -232,69 +378,58 @@ if __name__ == '__main__':
     # Get the arch of the host
     # This can currently be found by RPM names in the logs, but we might want
     # to make it a first class log message
-    platform = (re_extract(r'el[0-9]\.(aarch64|x86_64).rpm', run_job_log, group=1) or
-                re_extract(r'(aarch64|x86_64)', run_job_log, group=1))
-    data['platform'] = platform
+    data['platform'] = run_job_facts['platform']
     
     # Look for whole-run failures
-    inet_address = extract_inet_address(run_job_log)
+    inet_address = run_job_facts['inet_address']
     if inet_address is None:
-        write_failure_and_exit(data, 1, 'No apparent IP address')
+        return record_failure(data, 1, 'No apparent IP address')
     data['guest_address'] = inet_address
     
     # See if the rpm install of epel-release failed
-    failed_epel_install = re.search(r'Could not install EPEL repository', run_job_log)
-    if failed_epel_install:
-        write_failure_and_exit(data, 1, 'rpm install of epel-release failed')
+    if run_job_facts['epel_failed']:
+        return record_failure(data, 1, 'rpm install of epel-release failed')
 
     # See if the final yum install of osg-test failed
-    final_osgtest_install = extract_last(run_job_log, r'^.*install osg-test(?:.*\n)*?^==>.*$')
+    final_osgtest_install = run_job_facts['final_osgtest_install']
     if final_osgtest_install is not None:
         install_result = re_extract(r'^==> (\w+)', final_osgtest_install, re.MULTILINE, group=1)
         if install_result != 'OK':
-            write_failure_and_exit(data, 1, 'yum install of osg-test failed', final_osgtest_install)
+            return record_failure(data, 1, 'yum install of osg-test failed', final_osgtest_install)
 
     # Extract osg-test source string
     for package in ['osg-test', 'osg-ca-generator']:
-        source_re = r'^%s source: (.*)$' % package
-        data[package.replace('-', '_') + '_version'] = re_extract(source_re, run_job_log, re.MULTILINE,
-                                                                  default='(unknown)', group=1)
+        source = run_job_facts[package]
+        data[package.replace('-', '_') + '_version'] = '(unknown)' if source is None else source
 
-    # Read osg-test output
-    osg_test_logfile_list = glob.glob(os.path.join(test_run_dir, 'output', 'osg-test-*.log'))
+    # Scan osg-test output
+    osg_test_logfile_list = job_files.glob('output/osg-test-*.log')
     if len(osg_test_logfile_list) == 0:
-        write_failure_and_exit(data, 1, 'No osg-test-DATE.log file found')
-    osg_test_logfile = osg_test_logfile_list[0]
-    osg_test_log = read_file(osg_test_logfile)
+        return record_failure(data, 1, 'No osg-test-DATE.log file found')
+    with job_files.open(osg_test_logfile_list[0]) as osg_test_log:
+        log_facts = scan_osg_test_log(osg_test_log)
     data['run_status'] = 0
-    data['osg_test_logfile'] = osg_test_logfile
+    data['osg_test_logfile'] = os.path.join(test_run_dir, osg_test_logfile_list[0])
     
-    data['osg_test_status'], data['tests_messages'], data['ok_skips'] = parse_log(osg_test_log,
-                                                                                  load_yaml(vmu.TEST_EXCEPTIONS),
-                                                                                  load_yaml(vmu.COMPONENT_TAGS))
+    data['osg_test_status'], data['tests_messages'], data['ok_skips'] = classify_log(log_facts, test_exceptions,
+                                                                                     components)
   
     # Extract start time
-    data['start_time'] = re_extract(r'^Start time: (.*)$', osg_test_log, re.MULTILINE, group=1)
+    data['start_time'] = log_facts['start_time']
     
-    # Determine if the run timed out which can be found at the end of the log
-    timeout_re = re.compile('Caught alarm:\n.*message: (.*):')
-    reversed_osg_test_log = '\n'.join(reversed(osg_test_log.split('\n'))) 
-    timeout_match = timeout_re.search(reversed_osg_test_log, re.MULTILINE)
-    if timeout_match:
+    # Determine if the run timed out, i.e. the log caught an alarm
+    if log_facts['alarm_time']:
         data['osg_test_status'] = 'timeout'
     
-        end_time = datetime.strptime(timeout_match.group(1), '%Y-%m-%d %H:%M:%S')
+        end_time = datetime.strptime(log_facts['alarm_time'], '%Y-%m-%d %H:%M:%S')
         start_time = datetime.strptime(data['start_time'], '%Y-%m-%d %H:%M:%S')
         data['run_time'] = end_time - start_time
     
-        last_test_re = re.compile(r'File .*osgtest\/tests\/(.*)\".*in (.*)')
-        last_test = last_test_re.search(reversed_osg_test_log)
-        failed_module, failed_test = last_test.groups()
+        failed_module, failed_test = log_facts['last_test']
         data['timeout_test'] = failed_test + ' (' + failed_module + ')'
     
     # Extract summary statistics
-    summary_re = re.compile(r'(Ran \d+ tests in .*)\s+((?:OK|FAILED)\s*\([^)]+\))\n(?!STDOUT)')
-    summary_lines = re_extract(summary_re, osg_test_log)
+    summary_lines = log_facts['summary']
     data['tests_total'] = data['tests_failed'] = data['tests_error'] = data['tests_bad_skip'] = data['tests_ok_skip'] = 0
     if summary_lines is None:
         data['run_time'] = 0.0
@@ -317,4 +452,118 @@ if __name__ == '__main__':
     if data['tests_ok'] == 0 and data['osg_test_status'] != 'timeout':
         data['osg_test_status'] = 'fail'
 
-    write_yaml(data)
+    return data
+
+# ======================================================================================================================
+# Batch mode
+
+# Shared by the batch workers, which inherit it when the pool forks
+BATCH = {}
+
+def read_job_id(job_serial):
+    """Return the job ID recorded by write-job-id or, once that has been cleaned up, by a previous analysis"""
+    try:
+        job_id = re_extract(r'^(\S+)$', read_file(job_serial + '.jobid'), re.MULTILINE, group=1)
+    except IOError:
+        job_id = None
+    if job_id:
+        return job_id
+    try:
+        for record in jobrecords.read_records(jobrecords.analysis_path('output-' + job_serial)):
+            if record.get('job_id'):
+                return record['job_id']
+    except (IOError, ValueError, yaml.YAMLError, jobrecords.RecordError):
+        pass
+    return None
+
+def analyze_batch_job(job_serial):
+    """Analyze one output directory in a batch worker, write its analysis record and return it as text"""
+    try:
+        with runtrace.span('analyze-job-output', job_serial):
+            data = analyze_job(job_serial, BATCH['job_ids'][job_serial], BATCH['test_exceptions'],
+                               BATCH['components'], BATCH['job_ads'], BATCH['manifest'])
+    except Exception:
+        sys.stderr.write('Failed to analyze output-%s:\n%s' % (job_serial, traceback.format_exc()))
+        return job_serial, None
+    analysis = io.StringIO()
+    jobrecords.write_record(data, analysis)
+    vmu.write_file(analysis.getvalue(), os.path.join('output-' + job_serial, jobrecords.ANALYSIS_FILENAME))
+    return job_serial, analysis.getvalue()
+
+def analyze_run(jobs_dir, workers=None):
+    """Analyze every output-* directory of jobs_dir in a pool of workers, writing each analysis.jsonl and the
+    combined-analysis.jsonl. Returns the number of output directories that could not be analyzed.
+    """
+    os.chdir(jobs_dir)
+    job_serials = sorted(path[len('output-'):] for path in glob.glob('output-*') if os.path.isdir(path))
+    job_ids = dict((job_serial, read_job_id(job_serial)) for job_serial in job_serials)
+
+    BATCH['job_ids'] = job_ids
+    BATCH['test_exceptions'] = load_yaml(vmu.TEST_EXCEPTIONS)
+    BATCH['components'] = load_yaml(vmu.COMPONENT_TAGS)
+    BATCH['job_ads'] = jobads.JobAds('.')
+    BATCH['job_ads'].fetch([job_id for job_id in job_ids.values() if job_id])
+    BATCH['manifest'] = runmanifest.load('.')
+
+    # Replace the combined analysis in one step, so that the running tallies of the results store start over
+    failures = 0
+    temp_path = '%s.%d' % (jobrecords.COMBINED_FILENAME, os.getpid())
+    with multiprocessing.Pool(workers) as pool, open(temp_path, 'w') as combined:
+        for _, analysis in pool.imap(analyze_batch_job, job_serials):
+            if analysis is None:
+                failures += 1
+            else:
+                combined.write(analysis)
+    os.rename(temp_path, jobrecords.COMBINED_FILENAME)
+    return failures
+
+# ======================================================================================================================
+
+def usage():
+    script_name = os.path.basename(sys.argv[0])
+    print('usage: %s SERIAL JOBID' % script_name)
+    print('       %s [-j WORKERS] --batch RUN_DIR' % script_name)
+    print()
+    print('The first form analyzes output-SERIAL in the current directory and writes the analysis to stdout.')
+    print('The second form analyzes every output-* directory in the jobs directory of RUN_DIR, writing each')
+    print('analysis.jsonl and combined-analysis.jsonl; WORKERS defaults to the number of CPUs.')
+    sys.exit(1)
+
+if __name__ == '__main__':
+    # Process command-line arguments
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'j:', ['batch=', 'jobs='])
+    except getopt.GetoptError:
+        usage()
+    batch_dir = None
+    workers = None
+    for opt, val in opts:
+        if opt == '--batch':
+            batch_dir = val
+        elif opt in ('-j', '--jobs'):
+            workers = int(val)
+
+    if batch_dir is not None:
+        if args:
+            usage()
+        if os.path.isdir(os.path.join(batch_dir, 'jobs')):
+            batch_dir = os.path.join(batch_dir, 'jobs')
+        if not os.path.isdir(batch_dir):
+            sys.exit("Missing run dir '%s'" % batch_dir)
+        sys.exit(1 if analyze_run(batch_dir, workers) else 0)
+
+    if len(args) != 2:
+        usage()
+    job_serial, job_id = args
+    
+    # Construct expected directory name
+    test_run_dir = 'output-' + job_serial
+    if not os.path.exists(test_run_dir) and not os.path.exists(resultimage.RESULT_IMAGE_FORMAT % job_serial):
+        sys.exit("Missing output dir '%s'" % test_run_dir)
+
+    with runtrace.span('analyze-job-output', job_serial):
+        job_ads = jobads.JobAds('.')
+        job_ads.fetch_run(job_id)
+        jobrecords.write_record(analyze_job(job_serial, job_id, load_yaml(vmu.TEST_EXCEPTIONS),
+                                            load_yaml(vmu.COMPONENT_TAGS), job_ads, runmanifest.load('.')),
+                                sys.stdout)
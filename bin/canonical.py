@@ -0,0 +1,88 @@
+'''Human readable names for the platforms and sources of VMU test runs.
+
+The rewriting rules are tables of plain replacements and precompiled regular
+expressions, applied in order. A run history only holds a few dozen distinct
+platforms and sources, so results are memoized in a bounded LRU cache and the
+bulk functions canonicalize each distinct value of a list once.'''
+
+import functools
+import re
+
+CACHE_SIZE = 1024
+
+# OS strings from /etc/redhat-release
+RELEASE_REPLACEMENTS = (('Red Hat Enterprise Linux Server', 'RHEL'),
+                        ('Scientific Linux', 'SL'),
+                        ('CentOS Linux', 'CentOS'),
+                        ('CentOS Stream', 'C. Stream'),
+                        ('Rocky Linux', 'Rocky'),
+                        ('AlmaLinux', 'Alma'))
+RELEASE_VERSION_RE = re.compile(r'(\d{1,2})(\.\d+)?(.*)')
+
+# OS strings from the 'platforms' test parameters
+PLATFORM_REPLACEMENTS = (('rhel', 'RHEL'),
+                         ('sl', 'SL'),
+                         ('centos_stream', 'C. Stream'),
+                         ('centos', 'CentOS'),
+                         ('rocky', 'Rocky'),
+                         ('alma', 'Alma'))
+PLATFORM_VERSION_RE = re.compile(r'_(\d{1,2})\.(.*)')
+
+UPGRADE_RE = re.compile(r'\s*>\s*')
+BRANCH_RE = re.compile(r'(^\w+:[./\w-]+)\s*;\s*(.*)')
+SOURCE_REPLACEMENTS = (('epel-testing', 'EPEL Testing'),
+                       ('osg-minefield', 'Minefield'),
+                       ('osg-development', 'Development'),
+                       ('osg-testing', 'Testing'),
+                       ('osg-prerelease', 'Prerelease'),
+                       ('osg-rolling', 'Rolling'),
+                       ('osg-upcoming-testing', 'Upcoming Testing'),
+                       ('osg-upcoming-rolling', 'Upcoming Rolling'),
+                       ('osg-upcoming', 'Upcoming'),
+                       ('osg', 'Release'), # Must come after other repos
+                       (';', ''),
+                       ('/', ' '),
+                       (',', ' + '))
+SERIES_RE = re.compile(r'^(\d+\.\d+)(.*-> )(?!\d)') # Duplicate release series, when needed
+
+
+def replace_all(string, replacements):
+    for old, new in replacements:
+        if old in string:
+            string = string.replace(old, new)
+    return string
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def os_string(os_release, param_name=False):
+    '''Make the OS release from test parameters or /etc/redhat/release human readable'''
+    if not param_name:
+        result = replace_all(os_release, RELEASE_REPLACEMENTS)
+        return RELEASE_VERSION_RE.sub(r'\1 (\3)', result)
+    result = replace_all(os_release, PLATFORM_REPLACEMENTS)
+    return PLATFORM_VERSION_RE.sub(r' \1 (\2)', result)
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def src_string(sources):
+    '''Make the repo source string human readable'''
+    result = UPGRADE_RE.sub(' -> ', sources)
+    branch = None
+    m = BRANCH_RE.search(result)
+    if m:
+        branch, result = m.groups()
+    result = replace_all(result, SOURCE_REPLACEMENTS)
+    result = SERIES_RE.sub('\\1\\2\\1 ', result)
+    if branch:
+        result += " (%s)" % branch
+    return result.strip()
+
+def os_strings(os_releases, param_name=False):
+    '''Canonicalize a list of OS releases, each distinct one once'''
+    os_releases = list(os_releases)
+    canonical = dict((os_release, os_string(os_release, param_name)) for os_release in set(os_releases))
+    return [canonical[os_release] for os_release in os_releases]
+
+def src_strings(sources_list):
+    '''Canonicalize a list of repo source strings, each distinct one once'''
+    sources_list = list(sources_list)
+    canonical = dict((sources, src_string(sources)) for sources in set(sources_list))
+    return [canonical[sources] for sources in sources_list]
@@ -0,0 +1,105 @@
+'''A cache of bare git mirrors for the source tarballs made by create-io-image.
+
+Each repository that the test jobs install from source (osg-test and
+osg-ca-generator) is mirrored once under CACHE_DIR and shared by the runs next
+to this one. The first job of a run to need a repository brings its mirror up
+to date with an incremental fetch; the others, which usually run at the same
+time, wait on the lock of the mirror and use it as it is. Tarballs are made
+with "git archive" and kept by commit, so every job of a run testing the same
+commit gets the very same file.'''
+
+import fcntl
+import hashlib
+import os
+import re
+import subprocess
+
+import vmu
+
+# Shared by the runs next to this one
+CACHE_DIR = os.path.join(os.path.dirname(vmu.RUN_DIR), 'git-mirror-cache')
+# The run that last fetched a mirror, in the mirror
+FETCHED_FILENAME = 'vmu-fetched-by'
+SHA_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+class GitError(Exception):
+    """Raised when a git command fails"""
+    pass
+
+
+def run_git(args):
+    '''Run git with args and return its standard output; raises GitError if it fails'''
+    p = subprocess.Popen(['git'] + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                         encoding='latin-1')
+    stdout, stderr = p.communicate()
+    if p.returncode != 0:
+        raise GitError('git %s failed with exit status %d:\n%s%s' % (' '.join(args), p.returncode, stdout, stderr))
+    return stdout
+
+def mirror_name(url):
+    '''The directory name of the mirror of url: readable, and unique thanks to a hash of the whole url'''
+    readable = re.sub(r'[^\w.-]+', '_', url.rstrip('/').split('://')[-1])[-64:]
+    return '%s-%s.git' % (readable, hashlib.sha256(url.encode()).hexdigest()[:12])
+
+
+class GitMirror(object):
+    """The cached bare mirror of the repository at url
+
+    archive() makes a source tarball of a branch, tag or commit, fetching
+    from url at most once per run_id (default: this run).
+    """
+
+    def __init__(self, url, cache_dir=CACHE_DIR, run_id=vmu.RUN_DIR):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.run_id = run_id
+        self.path = os.path.join(cache_dir, mirror_name(url))
+
+    def _git(self, *args):
+        return run_git(('--git-dir=' + self.path,) + args)
+
+    def _fetched_by(self):
+        try:
+            with open(os.path.join(self.path, FETCHED_FILENAME)) as fetched_file:
+                return fetched_file.read().strip()
+        except IOError:
+            return None
+
+    def _update(self):
+        # Called with the lock held
+        if not os.path.isdir(self.path):
+            temp_path = '%s.%d' % (self.path, os.getpid())
+            run_git(('clone', '--quiet', '--mirror', self.url, temp_path))
+            os.rename(temp_path, self.path)
+        elif self._fetched_by() != self.run_id:
+            self._git('fetch', '--quiet', '--prune', 'origin')
+        else:
+            return
+        vmu.write_file(self.run_id + '\n', os.path.join(self.path, FETCHED_FILENAME))
+
+    def resolve(self, ref):
+        '''The commit SHA of ref in the mirror, or None if it has no such commit'''
+        try:
+            sha = self._git('rev-parse', '--verify', '--quiet', ref + '^{commit}').strip()
+        except GitError:
+            return None
+        return sha if SHA_RE.match(sha) else None
+
+    def archive(self, ref, prefix):
+        '''The path of a tarball of ref with its files under prefix/, updating the mirror first if this run has not
+        yet. Raises GitError if the repository cannot be fetched or has no such ref.'''
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._update()
+            sha = self.resolve(ref)
+            if sha is None:
+                raise GitError('%s has no commit %r' % (self.url, ref))
+            tarball = os.path.join(self.path, 'archives', '%s.%s.tar.gz' % (prefix, sha))
+            if not os.path.exists(tarball):
+                os.makedirs(os.path.dirname(tarball), exist_ok=True)
+                temp_tarball = '%s.%d.tar.gz' % (tarball[:-len('.tar.gz')], os.getpid())
+                self._git('archive', '--prefix=%s/' % prefix, '--output=' + temp_tarball, sha)
+                os.rename(temp_tarball, tarball)
+        return tarball
@@ -0,0 +1,112 @@
+'''A content-addressed cache of the input images made by create-io-image.
+
+Images are stored under the SHA-256 of everything that goes into them: the
+osg-test configuration, the patches, run-job, the osg-test RPMs and the source
+tarballs. An image with the same inputs as one made earlier, by this run or a
+previous one, is hard-linked (or reflinked, across filesystems) from the cache
+instead of being built again. Each hit refreshes the modification time of the
+cached image, and the least recently used images are evicted when the cache
+grows past its size limit.'''
+
+import errno
+import fcntl
+import hashlib
+import os
+import subprocess
+
+import vmu
+
+# Shared by the runs next to this one
+CACHE_DIR = os.path.join(os.path.dirname(vmu.RUN_DIR), 'io-image-cache')
+MAX_SIZE = 4 * 1024 ** 3
+# Bump when the way images are made changes, to stop using the images made before
+CACHE_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+
+def image_key(config_contents, input_files):
+    '''The cache key of an image from its osg-test configuration and its other input files, as a list of
+    (path, name in the image) pairs'''
+    digest = hashlib.sha256()
+    digest.update(b'version %d\0' % CACHE_VERSION)
+    digest.update(config_contents.encode())
+    for path, name in sorted(input_files, key=lambda input_file: input_file[1]):
+        digest.update(b'\0%s\0%d\0' % (name.encode(), os.path.getsize(path)))
+        with open(path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def link_or_copy(source, destination):
+    '''Hard link source to destination, falling back to a reflink (or plain) copy across filesystems'''
+    try:
+        os.link(source, destination)
+    except OSError as err:
+        if err.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        subprocess.check_call(['cp', '--reflink=auto', source, destination])
+
+
+class ImageCache(object):
+    """The shared cache of input images
+
+    fetch() makes an image from the cache; store() adds a newly made one.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_size=MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.qcow2')
+
+    def fetch(self, key, image_filename):
+        '''Make image_filename from the cached image of key. Returns False if there is none.'''
+        path = self._path(key)
+        try:
+            link_or_copy(path, image_filename)
+        except (OSError, subprocess.CalledProcessError):
+            return False
+        try:
+            os.utime(path)
+        except OSError:
+            # Evicted in the meantime; we have our copy
+            pass
+        return True
+
+    def store(self, key, image_filename):
+        '''Add image_filename to the cache as the image of key and evict the least recently used images to keep
+        the cache under its size limit. Returns False if the image could not be cached.'''
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = '%s.%d' % (self._path(key), os.getpid())
+            link_or_copy(image_filename, temp_path)
+            os.rename(temp_path, self._path(key))
+        except (OSError, subprocess.CalledProcessError):
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        '''Remove the least recently used images until the cache fits in its size limit'''
+        with open(os.path.join(self.cache_dir, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            images = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.qcow2'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                images.append((stat.st_mtime, stat.st_size, path))
+            total_size = sum(size for _, size, _ in images)
+            for _, size, path in sorted(images):
+                if total_size <= self.max_size:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total_size -= size
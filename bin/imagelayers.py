@@ -0,0 +1,214 @@
+'''Layered guest images, with the bootstrap of run-job already applied.
+
+make-layered-images makes a qcow2 overlay of the VM image of each platform for
+each OSG release series that a run tests, and runs layer-bootstrap in it: the
+EPEL and osg-release installs, the yum distro-sync and the tools that run-job
+needs before it can install osg-test. The layers are kept in the layers
+directory next to the VM images, backed by the VM images through symlinks
+there, so that an overlay and its VM image can be transferred to the same
+directory of a job and still find each other.
+
+Each layer has a record next to it, <layer>.json, of what it was made from and
+what it contains: the VM image it is backed by (with its size and modification
+time, to notice when the VM image is replaced), the digest of layer-bootstrap,
+when it was made, the bootstrap steps it took and its packages. generate-dag
+only uses the layers whose record is current, falling back to the VM image.'''
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+import vmu
+
+LAYER_SUBDIR = 'layers'
+BOOTSTRAP_SCRIPT = os.path.join(vmu.RUN_DIR, 'bin', 'layer-bootstrap')
+# Where layer-bootstrap leaves its steps, info and rpm-qa.log in the guest
+GUEST_INFO_DIR = '/etc/osg-test-layer'
+# Bump when the way layers are made changes, to stop using the layers made before
+LAYER_VERSION = 1
+# Layers are made for the next run by the one before; an older one would leave too much for distro-sync to do
+MAX_AGE = 3 * 24 * 3600
+# Layers older than this are made again
+REFRESH_AGE = 12 * 3600
+# Layers are removed once they are this old; a run that picked a layer up at MAX_AGE may run on it for days after
+PRUNE_AGE = 2 * MAX_AGE
+
+
+class LayerError(Exception):
+    """Exception for layers that could not be made"""
+    pass
+
+
+def base_image_name(platform):
+    return platform + '_htcondor.dsk'
+
+def layer_name(platform, series):
+    return '%s_osg%s.qcow2' % (platform, series)
+
+def layer_dir(image_dir):
+    return os.path.join(image_dir, LAYER_SUBDIR)
+
+def record_path(layer_path):
+    return re.sub(r'\.qcow2$', '.json', layer_path)
+
+def release_series(sources):
+    '''The OSG release series that a sources parameter installs first, e.g. '24' for 'account:branch; 24; osg' '''
+    return re.split(r'\s*;\s*', sources)[-2]
+
+def layer_pairs(platform_sources):
+    '''The sorted distinct (platform, release series) of (platform, sources parameter) pairs'''
+    return sorted(set((platform, release_series(sources)) for platform, sources in platform_sources))
+
+def bootstrap_digest(path=BOOTSTRAP_SCRIPT):
+    with open(path, 'rb') as script:
+        return hashlib.sha256(script.read()).hexdigest()
+
+def read_record(layer_path):
+    '''The record of a layer, or None if it has none that is readable'''
+    try:
+        with open(record_path(layer_path)) as record_file:
+            record = json.load(record_file)
+    except (IOError, ValueError):
+        return None
+    return record if isinstance(record, dict) else None
+
+def is_current(record, image_dir, digest, max_age=MAX_AGE, now=None):
+    '''True if a layer record is of this version of layers and layer-bootstrap, younger than max_age and backed by
+    the VM image that is in image_dir now'''
+    if record is None or record.get('version') != LAYER_VERSION or record.get('bootstrap') != digest:
+        return False
+    if (time.time() if now is None else now) - record.get('built', 0) > max_age:
+        return False
+    try:
+        stat = os.stat(os.path.join(image_dir, record['base_image']))
+        os.stat(os.path.join(layer_dir(image_dir), record['image']))
+    except OSError:
+        return False
+    return [stat.st_size, int(stat.st_mtime)] == [record['base_size'], record['base_mtime']]
+
+def find_layer(image_dir, platform, series, digest, max_age=MAX_AGE):
+    '''The path of the current layer of platform and series, or None if there is none'''
+    path = os.path.join(layer_dir(image_dir), layer_name(platform, series))
+    if is_current(read_record(path), image_dir, digest, max_age):
+        return path
+    return None
+
+def run_command(command):
+    '''Run command, raising LayerError with its output if it fails'''
+    p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, encoding='latin-1')
+    (stdout, _) = p.communicate()
+    if p.returncode != 0:
+        raise LayerError('%s failed with exit status %d:\n%s' % (command[0], p.returncode, stdout))
+    return stdout
+
+def write_record(record, layer_path):
+    path = record_path(layer_path)
+    temp_path = '%s.%d' % (path, os.getpid())
+    with open(temp_path, 'w') as record_file:
+        json.dump(record, record_file, indent=1, sort_keys=True)
+    os.rename(temp_path, path)
+
+def read_guest_info(info_dir):
+    '''The steps, info and packages that layer-bootstrap wrote to info_dir'''
+    with open(os.path.join(info_dir, 'steps')) as steps_file:
+        steps = steps_file.read().split()
+    info = {}
+    with open(os.path.join(info_dir, 'info')) as info_file:
+        for line in info_file:
+            key, _, value = line.rstrip('\n').partition('=')
+            if key:
+                info[key] = value
+    with open(os.path.join(info_dir, 'rpm-qa.log')) as rpm_qa:
+        packages = sorted(line.strip() for line in rpm_qa if line.strip())
+    return steps, info, packages
+
+def make_layer(image_dir, platform, series, bootstrap=BOOTSTRAP_SCRIPT, force=False, refresh_age=REFRESH_AGE):
+    '''Make the layer of platform and series in the layers directory of image_dir, unless a current one younger
+    than refresh_age is there already, and return its record. Runs that make the same layer at the same time wait
+    for each other. Raises LayerError if the layer could not be made.'''
+    base_image = base_image_name(platform)
+    base_path = os.path.join(image_dir, base_image)
+    layers = layer_dir(image_dir)
+    path = os.path.join(layers, layer_name(platform, series))
+    digest = bootstrap_digest(bootstrap)
+    try:
+        base_stat = os.stat(base_path)
+        os.makedirs(layers, exist_ok=True)
+        # The overlay names its VM image relative to itself, as it is in the directory of a job
+        if not os.path.lexists(os.path.join(layers, base_image)):
+            os.symlink(os.path.join(os.pardir, base_image), os.path.join(layers, base_image))
+        lock_file = open(path + '.lock', 'w')
+    except OSError as err:
+        raise LayerError('Cannot make layer %s: %s' % (path, err))
+
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        record = read_record(path)
+        if not force and is_current(record, image_dir, digest, refresh_age):
+            return record
+
+        temp_path = '%s.%d.qcow2' % (path[:-len('.qcow2')], os.getpid())
+        info_dir = tempfile.mkdtemp(prefix='layer-')
+        try:
+            run_command(['qemu-img', 'create', '-q', '-f', 'qcow2', '-F', 'raw', '-b', base_image, temp_path])
+            run_command(['virt-customize', '--add', temp_path, '--format', 'qcow2', '--network',
+                         '--upload', '%s:/tmp/layer-bootstrap' % bootstrap,
+                         '--run-command', 'bash /tmp/layer-bootstrap %s' % series,
+                         '--delete', '/tmp/layer-bootstrap',
+                         '--copy-out', '%s:%s' % (GUEST_INFO_DIR, info_dir),
+                         '--selinux-relabel'])
+            steps, info, packages = read_guest_info(os.path.join(info_dir, os.path.basename(GUEST_INFO_DIR)))
+            record = {'version': LAYER_VERSION,
+                      'platform': platform,
+                      'series': series,
+                      'image': os.path.basename(path),
+                      'base_image': base_image,
+                      'base_size': base_stat.st_size,
+                      'base_mtime': int(base_stat.st_mtime),
+                      'bootstrap': digest,
+                      'built': int(time.time()),
+                      'os_release': info.get('os_release'),
+                      'steps': steps,
+                      'packages': packages}
+            # Drop the record first, so that the layer is never taken for the one before it
+            if os.path.exists(record_path(path)):
+                os.unlink(record_path(path))
+            os.rename(temp_path, path)
+            write_record(record, path)
+        except (OSError, IOError) as err:
+            raise LayerError('Cannot make layer %s: %s' % (path, err))
+        finally:
+            shutil.rmtree(info_dir, ignore_errors=True)
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    return record
+
+def prune(image_dir, max_age=PRUNE_AGE, now=None):
+    '''Remove the layers, and their records, that are older than max_age, well past the age that generate-dag still
+    uses them at. Returns their paths.'''
+    removed = []
+    now = time.time() if now is None else now
+    layers = layer_dir(image_dir)
+    if not os.path.isdir(layers):
+        return removed
+    for name in sorted(os.listdir(layers)):
+        path = os.path.join(layers, name)
+        if not name.endswith('.qcow2') or os.path.islink(path):
+            continue
+        record = read_record(path)
+        built = record.get('built', 0) if record is not None else os.path.getmtime(path)
+        if now - built <= max_age:
+            continue
+        for old_path in (record_path(path), path, path + '.lock'):
+            try:
+                os.unlink(old_path)
+            except OSError:
+                pass
+        removed.append(path)
+    return removed
@@ -0,0 +1,64 @@
+'''Making the filesystem images that carry the input and output of test jobs.
+
+The fast path writes the ext2 filesystem straight from userspace with
+"mke2fs -d" into a sparse raw file and converts it to qcow2 with qemu-img.
+When those tools are missing or too old, or they fail, images are made with
+virt-make-fs, which boots a libguestfs appliance to do the same thing.'''
+
+import os
+import shutil
+import subprocess
+
+IMAGE_SIZE_MB = 64
+# Block size that extract-job-output expects when it reports the free space left in an image
+BLOCK_SIZE = 1024
+
+
+def run_command(command):
+    p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='latin-1')
+    (stdout, stderr) = p.communicate()
+    return (p.returncode, stdout, stderr)
+
+def fast_path_available():
+    '''True if the tools for making images without libguestfs are installed'''
+    return shutil.which('mke2fs') is not None and shutil.which('qemu-img') is not None
+
+def make_raw_filesystem(source_dir, raw_filename, size_mb=IMAGE_SIZE_MB):
+    '''Write an ext2 filesystem with the contents of source_dir to the raw image raw_filename.
+    Returns (exit status, stdout, stderr) of mke2fs.'''
+    with open(raw_filename, 'wb') as raw_file:
+        raw_file.truncate(size_mb * 1024 * 1024)
+    return run_command(['mke2fs', '-q', '-F', '-t', 'ext2', '-b', str(BLOCK_SIZE), '-d', source_dir,
+                        raw_filename])
+
+def make_image_fast(source_dir, image_filename, size_mb=IMAGE_SIZE_MB):
+    '''Make a qcow2 image of source_dir with mke2fs and qemu-img. Returns (exit status, stdout, stderr).'''
+    raw_filename = '%s.%d.raw' % (image_filename, os.getpid())
+    try:
+        return_code, stdout, stderr = make_raw_filesystem(source_dir, raw_filename, size_mb)
+        if return_code == 0:
+            return_code, convert_stdout, convert_stderr = run_command(['qemu-img', 'convert', '-f', 'raw',
+                                                                       '-O', 'qcow2', raw_filename,
+                                                                       image_filename])
+            stdout += convert_stdout
+            stderr += convert_stderr
+    finally:
+        if os.path.exists(raw_filename):
+            os.unlink(raw_filename)
+    return return_code, stdout, stderr
+
+def make_image_guestfs(source_dir, image_filename, size_mb=IMAGE_SIZE_MB):
+    '''Make a qcow2 image of source_dir with virt-make-fs. Returns (exit status, stdout, stderr).'''
+    return run_command(['virt-make-fs', '--size=%dM' % size_mb, '--format=qcow2', source_dir, image_filename])
+
+def make_image(source_dir, image_filename, size_mb=IMAGE_SIZE_MB):
+    '''Make a qcow2 image of source_dir, on the fast path when possible.
+    Returns (exit status, stdout, stderr) of the last attempt.'''
+    if fast_path_available():
+        return_code, stdout, stderr = make_image_fast(source_dir, image_filename, size_mb)
+        if return_code == 0:
+            return return_code, stdout, stderr
+        print('Making "%s" without libguestfs failed, falling back to virt-make-fs:\n%s' % (image_filename, stderr))
+        if os.path.exists(image_filename):
+            os.unlink(image_filename)
+    return make_image_guestfs(source_dir, image_filename, size_mb)
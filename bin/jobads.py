@@ -0,0 +1,180 @@
+'''Job ad lookups for the test jobs of a VMU run.
+
+The attributes needed by the analysis and reports are fetched for all jobs of a
+run with a single condor_history projection query and memoized, along with the
+addresses of the execute hosts, in a cache file in the run's jobs directory.
+Reprocessing a run or generating reports from it never needs the schedd again.'''
+
+import fcntl
+import functools
+import glob
+import json
+import os
+import re
+import socket
+import subprocess
+
+CACHE_FILENAME = 'job-ads.json'
+CACHE_VERSION = 1
+ATTRIBUTES = ('ClusterId', 'ProcId', 'QDate', 'JobCurrentStartDate', 'JobCurrentStartExecutingDate',
+              'CompletionDate', 'LastRemoteHost', 'NumJobStarts')
+JOB_ID_RE = re.compile(r'^(\d+)\.(\d+)$')
+REMOTE_HOST_RE = re.compile(r'^\S+@(\S+)$')
+TEST_RUN_DAG = 'test-run.dag'
+# Jobs per condor_history query
+QUERY_BATCH = 1000
+
+
+def run_job_ids(jobs_dir):
+    '''The job IDs recorded by write-job-id for the jobs of a run, by serial'''
+    job_ids = {}
+    for path in glob.glob(os.path.join(jobs_dir, '*.jobid')):
+        with open(path, 'r') as jobid_file:
+            job_id = jobid_file.read().strip()
+        if job_id:
+            job_ids[os.path.basename(path)[:-len('.jobid')]] = job_id
+    return job_ids
+
+@functools.lru_cache(maxsize=None)
+def resolve_host(host_name):
+    '''Resolve a hostname to an address once per process; 'unavailable' if it cannot be resolved'''
+    try:
+        return socket.gethostbyname(host_name)
+    except socket.gaierror:
+        return 'unavailable'
+
+def query_history(job_ids, completed_since=None):
+    '''Return the ATTRIBUTES of each of job_ids ('CLUSTER.PROC' strings) from as few condor_history queries as
+    possible, as a dict of job ID -> job ad. Jobs missing from the history are left out; None is returned if a query
+    fails.'''
+    jobs = [tuple(int(x) for x in m.groups()) for m in (JOB_ID_RE.match(job_id) for job_id in job_ids) if m]
+    ads = {}
+    # A single argument to a command is limited to 128 KiB, which a constraint reaches at a few thousand jobs
+    for start in range(0, len(jobs), QUERY_BATCH):
+        batch_ads = query_command(history_command(jobs[start:start + QUERY_BATCH], completed_since))
+        if batch_ads is None:
+            return None
+        ads.update(batch_ads)
+    return ads
+
+def history_command(jobs, completed_since=None):
+    '''The condor_history command that queries the ATTRIBUTES of jobs, a list of (cluster, proc). condor_history
+    reads the history most recently completed job first; the command stops it once it has matched every one of the
+    jobs or, given the time completed_since (in seconds since the epoch) before which none of them completed, once it
+    reaches a job that completed earlier, rather than letting it read the whole history.'''
+    constraint = ' || '.join('(ClusterId == %d && ProcId == %d)' % job for job in jobs)
+    command = ['condor_history', '-json', '-attributes', ','.join(ATTRIBUTES), '-match', str(len(jobs))]
+    if completed_since is not None:
+        command += ['-completedsince', str(int(completed_since))]
+    return command + ['-constraint', constraint]
+
+def run_start(jobs_dir):
+    '''The time that generate-dag wrote the DAG of the run, before any of its jobs was submitted, or None'''
+    try:
+        return os.path.getmtime(os.path.join(jobs_dir, TEST_RUN_DAG))
+    except OSError:
+        return None
+
+def query_command(command):
+    try:
+        p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    stdout, _ = p.communicate()
+    if p.returncode != 0:
+        return None
+    stdout = stdout.decode(errors='replace').strip()
+    try:
+        ads = json.loads(stdout) if stdout else []
+    except ValueError:
+        return None
+    return dict(('%s.%s' % (ad.get('ClusterId'), ad.get('ProcId')), ad) for ad in ads)
+
+
+class JobAds(object):
+    """The cached job ads of a run and the addresses of their execute hosts
+
+    Use fetch() to make sure that the ads of some jobs are cached before
+    reading them with get() and friends, which never query the schedd.
+    """
+
+    def __init__(self, jobs_dir):
+        self.jobs_dir = jobs_dir
+        self.path = os.path.join(jobs_dir, CACHE_FILENAME)
+        self.ads, self.hosts = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as cache_file:
+                cache = json.load(cache_file)
+        except (IOError, ValueError):
+            return {}, {}
+        if cache.get('version') != CACHE_VERSION:
+            return {}, {}
+        return cache['ads'], cache['hosts']
+
+    def _save(self):
+        temp_path = '%s.%d' % (self.path, os.getpid())
+        with open(temp_path, 'w') as cache_file:
+            cache_file.write(json.dumps({'version': CACHE_VERSION, 'ads': self.ads, 'hosts': self.hosts}))
+        os.rename(temp_path, self.path)
+
+    def fetch(self, job_ids=None):
+        '''Make sure the ads of job_ids (default: every job of the run) are cached, querying the schedd once for all
+        of the missing ones. Returns False if the query failed.'''
+        if job_ids is None:
+            job_ids = run_job_ids(self.jobs_dir).values()
+        if all(job_id in self.ads for job_id in job_ids):
+            return True
+
+        with open(self.path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process may have fetched some of the ads while we waited for the lock
+            self.ads, self.hosts = self._load()
+            missing = sorted(set(job_id for job_id in job_ids if job_id not in self.ads))
+            if not missing:
+                return True
+            ads = query_history(missing, run_start(self.jobs_dir))
+            if ads is None:
+                return False
+            self.ads.update(ads)
+            for job_id in ads:
+                host_name = self.host_name(job_id)
+                if host_name is not None and host_name not in self.hosts:
+                    self.hosts[host_name] = resolve_host(host_name)
+            self._save()
+        return True
+
+    def fetch_run(self, job_id):
+        '''Make sure the ad of job_id is cached. If it is not, fetch it along with the ads of every other job of the
+        run that is not cached yet, so that they are there for the jobs analyzed after this one. Returns False if the
+        query failed.'''
+        if job_id in self.ads:
+            return True
+        return self.fetch(list(run_job_ids(self.jobs_dir).values()) + [job_id])
+
+    def get(self, job_id):
+        '''The cached job ad of job_id, or None'''
+        return self.ads.get(job_id)
+
+    def transfer_in(self, job_id):
+        '''The input transfer time of job_id in seconds, or None'''
+        ad = self.ads.get(job_id, {})
+        try:
+            return ad['JobCurrentStartExecutingDate'] - ad['JobCurrentStartDate']
+        except (KeyError, TypeError):
+            return None
+
+    def host_name(self, job_id):
+        '''The name of the host that last ran job_id, or None'''
+        m = REMOTE_HOST_RE.match(self.ads.get(job_id, {}).get('LastRemoteHost') or '')
+        if m:
+            return m.group(1)
+        return None
+
+    def host_address(self, host_name):
+        '''The address of host_name, resolved at most once per run'''
+        try:
+            return self.hosts[host_name]
+        except KeyError:
+            return resolve_host(host_name)
@@ -0,0 +1,87 @@
+'''Access to the extracted output of a test job.
+
+extract-job-output pulls the whole filesystem of a result image out as a single
+tar archive, kept in the job's output directory, and only unpacks the files
+that the analysis, the reports and the upload read (EAGER_FILES). Any other
+file is unpacked from the archive the first time it is asked for with fetch().'''
+
+import fnmatch
+import os
+import posixpath
+import tarfile
+
+ARCHIVE_FILENAME = 'result-image.tar'
+# Paths, relative to the root of the result image, that are unpacked right away
+EAGER_FILES = ('run-job.log',
+               'input/osg-test.conf',
+               'output/osg-test-*.log',
+               'output/run-job-steps.jsonl',
+               'output/rpm-qa-*.log')
+
+
+def member_path(name):
+    '''The normalized path of an archive member relative to the image root, or None if it would land outside of
+    the output directory'''
+    path = posixpath.normpath(name.lstrip('/'))
+    if path == '.' or path == '..' or path.startswith('../'):
+        return None
+    return path
+
+def is_eager(path):
+    return any(fnmatch.fnmatchcase(path, pattern) for pattern in EAGER_FILES)
+
+def archive_path(output_dir):
+    return os.path.join(output_dir, ARCHIVE_FILENAME)
+
+def unpack(archive, output_dir, select=is_eager):
+    '''Unpack the regular files of an open tarfile whose path is selected into output_dir. Returns their paths.'''
+    unpacked = []
+    for member in archive:
+        path = member_path(member.name)
+        if path is None or not member.isfile() or not select(path):
+            continue
+        local_path = os.path.join(output_dir, path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with archive.extractfile(member) as source, open(local_path, 'wb') as destination:
+            while True:
+                chunk = source.read(1024 * 1024)
+                if not chunk:
+                    break
+                destination.write(chunk)
+        os.utime(local_path, (member.mtime, member.mtime))
+        unpacked.append(path)
+    return unpacked
+
+def fetch(output_dir, path):
+    '''The local path of a file from the output of a job, unpacking it from the archive if needed.
+    Raises IOError if the job has no such file.'''
+    path = member_path(path)
+    if path is None:
+        raise IOError('Invalid job output path')
+    local_path = os.path.join(output_dir, path)
+    if os.path.exists(local_path):
+        return local_path
+    try:
+        with tarfile.open(archive_path(output_dir), 'r:') as archive:
+            if unpack(archive, output_dir, lambda member: member == path):
+                return local_path
+    except tarfile.TarError as err:
+        raise IOError('Unreadable job output archive: %s' % err)
+    raise IOError('No such file in the output of the job: %s' % path)
+
+def listing(output_dir):
+    '''The paths of every file in the output of a job, unpacked or not'''
+    paths = set()
+    try:
+        with tarfile.open(archive_path(output_dir), 'r:') as archive:
+            for member in archive:
+                path = member_path(member.name)
+                if path is not None and member.isfile():
+                    paths.add(path)
+    except (IOError, tarfile.TarError):
+        pass
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            paths.add(os.path.relpath(os.path.join(root, name), output_dir))
+    paths.discard(ARCHIVE_FILENAME)
+    return sorted(paths)
@@ -0,0 +1,93 @@
+'''Reading and writing job analysis records.
+
+Each job analysis is written as a single JSON object on its own line (JSON
+Lines), so the per-job analyses of a run can simply be concatenated into its
+combined file and read back one record at a time. Every record carries the
+version of the schema it was written with in its 'schema' field.
+
+Analyses written by older versions of analyze_job_output.py, as a YAML list,
+can still be read.'''
+
+import itertools
+import json
+import os
+
+import yaml
+
+SCHEMA_VERSION = 1
+ANALYSIS_FILENAME = 'analysis.jsonl'
+COMBINED_FILENAME = 'combined-analysis.jsonl'
+LEGACY_ANALYSIS_FILENAME = 'analysis.yaml'
+LEGACY_COMBINED_FILENAME = 'combined-analysis.yaml'
+
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class RecordError(Exception):
+    """Exception for unreadable analysis records"""
+    pass
+
+
+def to_record(data):
+    '''Return the analysis record for the data of a job analysis, with the same value types that readers of the
+    legacy YAML analyses got'''
+    record = dict(data)
+    record['schema'] = SCHEMA_VERSION
+    for key in ('job_serial', 'job_id'):
+        if record.get(key) is not None:
+            record[key] = str(record[key])
+    if isinstance(record.get('selinux'), str):
+        record['selinux'] = record['selinux'] == 'True'
+    return record
+
+def format_record(data):
+    '''The analysis record for data as a single line of text'''
+    return json.dumps(to_record(data), sort_keys=True, default=str) + '\n'
+
+def write_record(data, stream):
+    '''Write the analysis record for data to stream as a single line'''
+    stream.write(format_record(data))
+
+def iter_records(stream):
+    '''Yield each analysis record from an open analysis file, in either the current or legacy format'''
+    first_line = stream.readline()
+    if not first_line.startswith('{'):
+        # Legacy YAML list of analyses
+        legacy_records = yaml.load(first_line + stream.read(), Loader=YAML_LOADER)
+        for record in legacy_records or []:
+            yield record
+        return
+
+    name = getattr(stream, 'name', 'analysis')
+    for line_number, line in enumerate(itertools.chain([first_line], stream), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as err:
+            raise RecordError('%s: line %d: %s' % (name, line_number, err))
+        if record.get('schema', 0) > SCHEMA_VERSION:
+            raise RecordError('%s: line %d: unsupported analysis schema %s' % (name, line_number, record['schema']))
+        yield record
+
+def read_records(path):
+    '''Yield each analysis record from the analysis file at path'''
+    with open(path, 'r') as stream:
+        for record in iter_records(stream):
+            yield record
+
+def combined_path(jobs_dir):
+    '''The combined analysis file of a run's jobs directory, falling back to the legacy YAML file'''
+    path = os.path.join(jobs_dir, COMBINED_FILENAME)
+    legacy_path = os.path.join(jobs_dir, LEGACY_COMBINED_FILENAME)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
+
+def analysis_path(output_dir):
+    '''The analysis file of a job's output directory, falling back to the legacy YAML file'''
+    path = os.path.join(output_dir, ANALYSIS_FILENAME)
+    legacy_path = os.path.join(output_dir, LEGACY_ANALYSIS_FILENAME)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
@@ -0,0 +1,76 @@
+'''Timing of the steps that run-job takes in the guest.
+
+run-job appends a line to output/run-job-steps.jsonl for each command that it
+logs: the 'step' (its command line), its 'start' and 'end' in seconds since the
+epoch, its 'exit_status' and, for the commands that it retries, the number of
+'retries' and the seconds of 'backoff' that it slept in between. The analysis
+of a job sums the steps up by command line into its record (summarize()), and
+the results store tallies the records by platform across the run (tally()).'''
+
+import json
+
+STEP_LOG_PATH = 'output/run-job-steps.jsonl'
+# Quicker steps are left out of the records, unless they were retried
+MIN_STEP_SECONDS = 1.0
+
+
+def read_steps(lines):
+    '''The steps of a step log, given as an iterable of lines such as an open file, skipping any line that is not a
+    whole step'''
+    steps = []
+    for line in lines:
+        try:
+            step = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(step, dict) and {'step', 'start', 'end'} <= set(step):
+            steps.append(step)
+    return steps
+
+def summarize(steps):
+    '''The fields of a job analysis for its steps:
+
+    guest_steps: {step: [seconds, retries, backoff seconds]} of the steps that took MIN_STEP_SECONDS or more, or
+        were retried, summed up over every time the step was taken
+    guest_step_time: seconds taken by all of the steps
+    guest_retries, guest_backoff_time: retries and seconds of backoff of all of the steps
+    '''
+    totals = {}
+    for step in steps:
+        total = totals.setdefault(step['step'], [0.0, 0, 0])
+        total[0] += max(0.0, step['end'] - step['start'])
+        total[1] += step.get('retries', 0)
+        total[2] += step.get('backoff', 0)
+    return {'guest_steps': dict((name, [round(total[0], 3), total[1], total[2]]) for name, total in totals.items()
+                                if total[0] >= MIN_STEP_SECONDS or total[1]),
+            'guest_step_time': round(sum(total[0] for total in totals.values()), 3),
+            'guest_retries': sum(total[1] for total in totals.values()),
+            'guest_backoff_time': sum(total[2] for total in totals.values())}
+
+def tally(tallies, key, guest_steps, count=1):
+    '''Add the guest_steps of a job to the tallies of key, {'jobs': jobs, 'steps': {step: [jobs, seconds, retries,
+    backoff seconds]}}, or take them away again with a count of -1'''
+    key_tally = tallies.setdefault(key, {'jobs': 0, 'steps': {}})
+    key_tally['jobs'] += count
+    for name, (seconds, retries, backoff) in guest_steps.items():
+        step_tally = key_tally['steps'].setdefault(name, [0, 0.0, 0, 0])
+        step_tally[0] += count
+        step_tally[1] += count * seconds
+        step_tally[2] += count * retries
+        step_tally[3] += count * backoff
+        if not step_tally[0]:
+            del key_tally['steps'][name]
+    if not key_tally['jobs']:
+        del tallies[key]
+
+def slowest_steps(key_tally, limit=None):
+    '''The (step, jobs, seconds, retries, backoff seconds) of the tallied steps that took the most time in total,
+    slowest first'''
+    steps = sorted(((name,) + tuple(step_tally) for name, step_tally in key_tally['steps'].items()),
+                   key=lambda step: (-step[2], step[0]))
+    return steps[:limit]
+
+def retry_totals(key_tally):
+    '''The (retries, backoff seconds) of all of the tallied steps'''
+    return (sum(step_tally[2] for step_tally in key_tally['steps'].values()),
+            sum(step_tally[3] for step_tally in key_tally['steps'].values()))
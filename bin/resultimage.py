@@ -0,0 +1,204 @@
+'''Read-only access to the files of test jobs, straight from their result images.
+
+A ResultImage launches a libguestfs appliance on the result image of a job the
+first time one of its files is read, and keeps it open for the next ones.
+ResultImages keeps the most recently used of them open, closing the least
+recently used ones past its limit. JobFiles reads the files of a job from its
+output directory when extract-job-output put them there (or in the archive
+there), and from its result image otherwise, so that the analysis, the reports
+and list-rpm-versions work whether or not the job output was extracted.'''
+
+import atexit
+import collections
+import fnmatch
+import glob
+import io
+import os
+import re
+
+import joboutput
+
+RESULT_IMAGE_FORMAT = 'result-image-%s.qcow2'
+OUTPUT_DIR_FORMAT = 'output-%s'
+# Each open image holds an appliance of a few hundred MB
+MAX_OPEN = 4
+ENCODING = 'utf-8'
+
+
+class ResultImage(object):
+    """The filesystem of a result image, mounted read-only on first use"""
+
+    def __init__(self, image_filename):
+        self.image_filename = image_filename
+        self._guestfs = None
+
+    def _handle(self):
+        if self._guestfs is None:
+            import guestfs
+
+            if os.path.getsize(self.image_filename) == 0:
+                raise IOError("Empty result image '%s'" % self.image_filename)
+            g = guestfs.GuestFS(python_return_dict=True)
+            g.add_drive_opts(self.image_filename, readonly=1)
+            g.launch()
+            filesystems = g.list_filesystems()
+            if len(filesystems) != 1:
+                g.close()
+                raise IOError("Found %d filesystems in '%s'" % (len(filesystems), self.image_filename))
+            g.mount_ro(list(filesystems)[0], '/')
+            self._guestfs = g
+        return self._guestfs
+
+    def is_file(self, path):
+        return self._handle().is_file('/' + path.lstrip('/'))
+
+    def read(self, path):
+        '''The contents of a file of the image as bytes. Raises IOError if there is no such file.'''
+        try:
+            return self._handle().read_file('/' + path.lstrip('/'))
+        except RuntimeError as err:
+            raise IOError('%s: %s' % (self.image_filename, err))
+
+    def download(self, path, local_path):
+        try:
+            self._handle().download('/' + path.lstrip('/'), local_path)
+        except RuntimeError as err:
+            raise IOError('%s: %s' % (self.image_filename, err))
+
+    def glob(self, pattern):
+        '''The sorted paths, relative to the root of the image, of the files that match pattern'''
+        g = self._handle()
+        return sorted(path.lstrip('/') for path in g.glob_expand('/' + pattern.lstrip('/')) if g.is_file(path))
+
+    def free_size(self):
+        '''Free space left in the image, as written to io_free_size, expecting the bsize to be 1024, or 1M'''
+        stat = self._handle().statvfs('/')
+        return format(float(stat['bavail'])/stat['bsize'], '.1f') + 'M'
+
+    def tar_out(self, tar_filename):
+        '''Write every file of the image to tar_filename in one stream'''
+        self._handle().tar_out('/', tar_filename, excludes=['./lost+found'])
+
+    def close(self):
+        if self._guestfs is not None:
+            self._guestfs.shutdown()
+            self._guestfs.close()
+            self._guestfs = None
+
+
+class ResultImages(object):
+    """The open result images, up to max_open of them, most recently used last"""
+
+    def __init__(self, max_open=MAX_OPEN):
+        self.max_open = max_open
+        self._images = collections.OrderedDict()
+
+    def get(self, image_filename):
+        key = os.path.realpath(image_filename)
+        image = self._images.pop(key, None)
+        if image is None:
+            image = ResultImage(image_filename)
+            while len(self._images) >= self.max_open:
+                _, oldest = self._images.popitem(last=False)
+                oldest.close()
+        self._images[key] = image
+        return image
+
+    def close(self):
+        while self._images:
+            _, image = self._images.popitem(last=False)
+            image.close()
+
+# Shared by the JobFiles of a process that are not given their own
+IMAGES = ResultImages()
+atexit.register(IMAGES.close)
+
+
+class JobFiles(object):
+    """The files of one job, from its output directory or its result image
+
+    Paths are relative to the root of the result image, e.g. 'output/osg-test-20240101.log'.
+    """
+
+    def __init__(self, output_dir, image_filename, images=None):
+        self.output_dir = output_dir
+        self.image_filename = image_filename
+        self.images = IMAGES if images is None else images
+
+    @classmethod
+    def for_serial(cls, jobs_dir, job_serial, images=None):
+        return cls(os.path.join(jobs_dir, OUTPUT_DIR_FORMAT % job_serial),
+                   os.path.join(jobs_dir, RESULT_IMAGE_FORMAT % job_serial), images)
+
+    @classmethod
+    def for_path(cls, path, images=None):
+        '''The files of the job of an output-NNN directory or a result-image-NNN.qcow2'''
+        jobs_dir, name = os.path.split(path.rstrip('/'))
+        m = re.match(r'(?:output-|result-image-)(\d+)(?:\.qcow2)?$', name)
+        if m is None:
+            raise ValueError("Not a job output directory or result image: '%s'" % path)
+        return cls.for_serial(jobs_dir, m.group(1), images)
+
+    def has_image(self):
+        return os.path.exists(self.image_filename)
+
+    def _image(self):
+        return self.images.get(self.image_filename)
+
+    def is_extracted(self):
+        '''True if the whole result image of the job has been extracted to its output directory'''
+        return os.path.exists(joboutput.archive_path(self.output_dir))
+
+    def _local_path(self, path):
+        '''The path of a file in the output directory, unpacking it from the archive there if needed, or None if it
+        is only in the result image. Raises IOError if the job has no such file.'''
+        try:
+            return joboutput.fetch(self.output_dir, path)
+        except IOError:
+            if self.is_extracted() or not self.has_image():
+                raise IOError("No such file in '%s': %s" % (self.output_dir, path))
+            return None
+
+    def local_path(self, path):
+        '''The path of a file on the local disk, downloading it to the output directory from the result image if
+        needed. Raises IOError if the job has no such file.'''
+        local_path = self._local_path(path)
+        if local_path is not None:
+            return local_path
+        local_path = os.path.join(self.output_dir, joboutput.member_path(path))
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        self._image().download(path, local_path)
+        return local_path
+
+    def read(self, path):
+        '''The contents of a file as text. Raises IOError if the job has no such file.'''
+        local_path = self._local_path(path)
+        if local_path is not None:
+            with open(local_path, 'r') as local_file:
+                return local_file.read()
+        return self._image().read(path).decode(ENCODING, 'replace')
+
+    def open(self, path):
+        '''A text file object for reading a file. Raises IOError if the job has no such file.'''
+        local_path = self._local_path(path)
+        if local_path is not None:
+            return open(local_path, 'r')
+        return io.StringIO(self._image().read(path).decode(ENCODING, 'replace'))
+
+    def glob(self, pattern):
+        '''The sorted paths of the files that match pattern'''
+        paths = sorted(os.path.relpath(path, self.output_dir)
+                       for path in glob.glob(os.path.join(self.output_dir, pattern)) if os.path.isfile(path))
+        if not paths and self.is_extracted():
+            paths = [path for path in joboutput.listing(self.output_dir) if fnmatch.fnmatchcase(path, pattern)]
+        elif not paths and self.has_image():
+            paths = self._image().glob(pattern)
+        return paths
+
+    def io_free_size(self):
+        '''The free space left in the input/output image of the job'''
+        local_path = self._local_path('io_free_size')
+        if local_path is None:
+            return self._image().free_size()
+        with open(local_path, 'r') as local_file:
+            return local_file.read()
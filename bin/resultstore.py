@@ -0,0 +1,211 @@
+'''The results store of a VMU run.
+
+The store is the run's combined analysis file, to which each ProcessResult node
+appends the record of its job as soon as the job has been analyzed, so reports
+can be made while the run is still going. Running tallies of the job results by
+OS release, package set and sources, and of the time that the steps run-job
+took in the guest by OS release, are kept next to it, with the offset of the
+last record folded into them, so bringing them up to date only reads the
+records appended since. A job that is analyzed again replaces its earlier
+record in the tallies.'''
+
+import fcntl
+import json
+import os
+
+import jobrecords
+import jobsteps
+import runmanifest
+import vmu
+
+TALLIES_FILENAME = 'combined-analysis.tallies.json'
+TALLIES_VERSION = 2
+TEST_RUN_DAG = 'test-run.dag'
+
+# Tally column of each osg-test status
+STATUS_COLUMNS = {'pass': 0,
+                  'died': 1,
+                  'fail': 2,
+                  'update': 2,
+                  'install': 2,
+                  'cleanup': 3,
+                  'ignore': 4,
+                  'timeout': 5}
+TALLY_GROUPS = ('os', 'packages', 'sources')
+
+
+def run_status(run):
+    '''The tally column of the result of a job analysis'''
+    if run['run_status'] != 0:
+        return STATUS_COLUMNS['died']
+    # ' yum_timeout' can be appended to install, update, or timeout failures; ignore it
+    return STATUS_COLUMNS[run['osg_test_status'].split()[0]]
+
+def tally_run_results(container, key, status, count=1):
+    if key not in container:
+        container[key] = [0] * (max(STATUS_COLUMNS.values()) + 1)
+    container[key][status] += count
+
+
+class ResultStore(object):
+    """The append-only combined analysis of a run and its running tallies
+
+    Records are added with append(). Call update() to fold the records
+    appended since the last update into the tallies before reading them;
+    package_mapping (see vmu.package_mapping) is needed to do so.
+    """
+
+    def __init__(self, jobs_dir, package_mapping=None):
+        self.jobs_dir = jobs_dir
+        self.path = os.path.join(jobs_dir, jobrecords.COMBINED_FILENAME)
+        self.tallies_path = os.path.join(jobs_dir, TALLIES_FILENAME)
+        self.package_mapping = package_mapping
+        self._reset()
+
+    def _reset(self):
+        self.inode = None
+        self.offset = 0
+        self.jobs = {}
+        self.deaths = {}
+        self.tallies = dict((group, {}) for group in TALLY_GROUPS)
+        self.step_tallies = {}
+
+    def _lock(self):
+        lock_file = open(self.path + '.lock', 'w')
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _load(self):
+        try:
+            with open(self.tallies_path, 'r') as tallies_file:
+                state = json.load(tallies_file)
+        except (IOError, ValueError):
+            return
+        if state.get('version') != TALLIES_VERSION:
+            return
+        self.inode = state['inode']
+        self.offset = state['offset']
+        self.jobs = state['jobs']
+        self.deaths = state['deaths']
+        self.tallies = state['tallies']
+        self.step_tallies = state['step_tallies']
+
+    def _save(self):
+        state = {'version': TALLIES_VERSION, 'inode': self.inode, 'offset': self.offset, 'jobs': self.jobs,
+                 'deaths': self.deaths, 'tallies': self.tallies,
+                 'step_tallies': self.step_tallies}
+        temp_path = '%s.%d' % (self.tallies_path, os.getpid())
+        with open(temp_path, 'w') as tallies_file:
+            tallies_file.write(json.dumps(state))
+        os.rename(temp_path, self.tallies_path)
+
+    def _fold(self, record):
+        serial = record['job_serial']
+        status = run_status(record)
+        keys = [vmu.canonical_os_string(record['os_release'] + record['platform']),
+                self.package_mapping[record['param_packages']],
+                vmu.canonical_src_string(record['param_sources'])]
+
+        # A job analyzed again replaces its earlier result
+        if serial in self.jobs:
+            old_keys, old_status, old_steps = self.jobs[serial]
+            for group, key in zip(TALLY_GROUPS, old_keys):
+                tally_run_results(self.tallies[group], key, old_status, -1)
+                if not any(self.tallies[group][key]):
+                    del self.tallies[group][key]
+            if old_steps is not None:
+                jobsteps.tally(self.step_tallies, old_keys[0], old_steps, -1)
+            self.deaths.pop(serial, None)
+
+        # Jobs of older versions of run-job have no steps
+        steps = record.get('guest_steps')
+        self.jobs[serial] = [keys, status, steps]
+        for group, key in zip(TALLY_GROUPS, keys):
+            tally_run_results(self.tallies[group], key, status)
+        if steps is not None:
+            jobsteps.tally(self.step_tallies, keys[0], steps)
+        if status == STATUS_COLUMNS['died']:
+            self.deaths[serial] = record
+
+    def append(self, data):
+        '''Append the analysis record for data to the store'''
+        line = jobrecords.format_record(data)
+        with self._lock():
+            with open(self.path, 'a') as store:
+                store.write(line)
+
+    def update(self):
+        '''Fold the records appended since the last update into the tallies and return the store'''
+        if self.package_mapping is None:
+            raise ValueError('A package mapping is needed to tally results')
+
+        path = jobrecords.combined_path(self.jobs_dir)
+        if path != self.path:
+            # Legacy combined analysis, tallied from scratch every time
+            self._reset()
+            for record in jobrecords.read_records(path):
+                self._fold(record)
+            return self
+
+        with self._lock():
+            self._load()
+            try:
+                store = open(self.path, 'rb')
+            except IOError:
+                self._reset()
+                return self
+            with store:
+                stat = os.fstat(store.fileno())
+                if stat.st_ino != self.inode or stat.st_size < self.offset:
+                    # The combined analysis has been rebuilt since the last update
+                    self._reset()
+                    self.inode = stat.st_ino
+                store.seek(self.offset)
+                for line in store:
+                    if not line.endswith(b'\n'):
+                        # Partially written record; pick it up next time
+                        break
+                    self.offset += len(line)
+                    if line.strip():
+                        self._fold(json.loads(line.decode()))
+            self._save()
+        return self
+
+    @property
+    def total(self):
+        '''The number of jobs tallied'''
+        return len(self.jobs)
+
+    @property
+    def died(self):
+        '''The number of tallied jobs that died'''
+        return len(self.deaths)
+
+    def death_records(self):
+        '''The records of the tallied jobs that died, in serial order'''
+        return [self.deaths[serial] for serial in sorted(self.deaths)]
+
+    def records(self):
+        '''Yield the latest record of each job in the store'''
+        path = jobrecords.combined_path(self.jobs_dir)
+        if not os.path.exists(path):
+            # No job has been analyzed yet
+            return
+        latest = {}
+        for record in jobrecords.read_records(path):
+            latest[record['job_serial']] = record
+        for record in latest.values():
+            yield record
+
+    def expected_jobs(self):
+        '''The number of test jobs of the run, from its manifest or, for a run generated without one, the
+        CreateImage nodes of its DAG. The osg-test configurations are no good for this, as create-io-image removes
+        each one once it is in the input image of its job.'''
+        manifest = runmanifest.load(self.jobs_dir)
+        if manifest is not None:
+            return len(manifest.jobs)
+        try:
+            with open(os.path.join(self.jobs_dir, TEST_RUN_DAG)) as dag:
+                return len([line for line in dag if line.startswith('JOB CreateImage')])
+        except IOError:
+            return 0
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+'''Inventories of the RPMs on the VM of a test job.
+
+The inventory of a job maps each "name.arch" to its "[epoch:]version-release"
+in three states: 'start', from the "rpm -qa" that run-job takes before osg-test
+runs, 'final', from the one it takes after, and 'installed', the packages that
+osg-test installed or updated, as scraped from the yum transcripts in its log.
+process-job-output writes it to output-NNN/rpm-inventory.json once, so that
+list-rpm-versions and compare-rpm-versions do not have to scrape the logs again
+on every query. Names and versions are kept as found, with their arch and dist
+tags; the tools strip them as asked when they read the inventory. The parsing
+itself is in rpmparse.'''
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+
+import resultimage
+import rpmparse
+
+INVENTORY_FILENAME = 'rpm-inventory.json'
+# Bump when the inventory or the way it is built changes, to rebuild older ones
+SCHEMA_VERSION = 1
+STATES = ('installed', 'start', 'final')
+STATE_LOGS = {'start': 'output/rpm-qa-start.log', 'final': 'output/rpm-qa-final.log'}
+OSG_TEST_LOGS = 'output/osg-test-*.log'
+
+
+def build(job_files):
+    '''The inventory of a job from its logs, as a resultimage.JobFiles'''
+    inventory = {'schema': SCHEMA_VERSION}
+    osg_test_logs = job_files.glob(OSG_TEST_LOGS)
+    if len(osg_test_logs) == 1:
+        inventory['installed'] = rpmparse.scrape_installed(job_files.read(osg_test_logs[0]))
+    for state, path in STATE_LOGS.items():
+        try:
+            inventory[state] = rpmparse.parse_rpm_qa(job_files.read(path))
+        except IOError:
+            pass
+    return inventory
+
+def inventory_path(output_dir):
+    return os.path.join(output_dir, INVENTORY_FILENAME)
+
+def write(inventory, output_dir):
+    path = inventory_path(output_dir)
+    temp_path = '%s.%d' % (path, os.getpid())
+    with open(temp_path, 'w') as inventory_file:
+        inventory_file.write(json.dumps(inventory, separators=(',', ':')))
+    os.rename(temp_path, path)
+
+def load(output_dir):
+    '''The inventory written to output_dir, or None if there is none that is up to date'''
+    try:
+        with open(inventory_path(output_dir)) as inventory_file:
+            inventory = json.load(inventory_file)
+    except (IOError, ValueError):
+        return None
+    if inventory.get('schema') != SCHEMA_VERSION:
+        return None
+    return inventory
+
+def inventory(output):
+    '''The inventory of the job of an output-NNN directory or a result-image-NNN.qcow2, from its index when it has
+    one, or else from its logs'''
+    job_files = resultimage.JobFiles.for_path(output)
+    return load(job_files.output_dir) or build(job_files)
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit('usage: %s OUTPUT_DIR\nWrites the RPM inventory of the job of OUTPUT_DIR to OUTPUT_DIR/%s' %
+                 (os.path.basename(sys.argv[0]), INVENTORY_FILENAME))
+    job_files = resultimage.JobFiles.for_path(sys.argv[1])
+    write(build(job_files), job_files.output_dir)
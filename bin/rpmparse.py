@@ -0,0 +1,243 @@
+'''Parsing the package lists of test runs: yum and dnf transcripts, "rpm -qa"
+listings, osg-system-profiler output and koji/mock root.logs.
+
+Package names are "name.arch" and versions "[epoch:]version-release" as found;
+normalize() strips the arch and dist tags and the zero epoch for display the
+way list-rpm-versions and compare-rpm-versions always have. The parses of
+single package strings are memoized, since the same packages turn up in
+every output of a run.'''
+
+import functools
+import re
+
+ARCHES = r'x86_64|i[3-6]86|noarch|src'
+ARCH_PATTERN = re.compile(r'\.(%s)$' % ARCHES)
+DIST_PATTERN = re.compile(r'((\.osg(\d+)?)?\.[es]l[5-9](_[\d.]+)?(\.centos)?|\.osg|\.fc\d+)$')
+# One "rpm -qa" line: name-version-release[.arch][.rpm]
+RPM_QA_PATTERN = re.compile(r'^[ \t]*(\S+)-([^-\s]+)-([^-\s]+?)(?:\.(%s))?(?:\.rpm)?[ \t]*\r?$' % ARCHES, re.M)
+# Starts with a newline rather than ^ so that re can skip ahead to the next line; the section ends before a blank or
+# an unindented line
+ITEMS_PATTERN = re.compile(r'\n(?:Dependency )?(Installed|Updated|Upgraded|Replaced):\n(.*?)(?=\n\n|\n[^ ])', re.S)
+DNF_ITEMS_PATTERN = re.compile(r'[._]el[89][._]')
+ROOT_LOG_PREFIX_PATTERN = re.compile(r'\n[A-Z]+ .*?:\d+:  ')
+CLEANUP_PREFIX = '\nosgtest: '
+CLEANUP_MARKER = ' special_cleanup'
+PROFILER_PATTERN = re.compile(r'\*\*\*\*\* All RPMs\n(.*?)\n\n', re.S)
+CACHE_SIZE = 65536
+
+
+@functools.lru_cache(CACHE_SIZE)
+def arch_strip(na):
+    return ARCH_PATTERN.sub('', na)
+
+@functools.lru_cache(CACHE_SIZE)
+def dist_strip(evr):
+    ev, r = evr.rsplit('-', 1)
+    return '-'.join([ev, DIST_PATTERN.sub('', r)])
+
+@functools.lru_cache(CACHE_SIZE)
+def parse_nevra(item):
+    '''("name.arch", "[epoch:]version-release") of a name-[epoch:]version-release.arch'''
+    nevr, a = item.rsplit('.', 1)
+    n, ev, r = nevr.rsplit('-', 2)
+    return '%s.%s' % (n, a), '%s-%s' % (ev, r)
+
+@functools.lru_cache(CACHE_SIZE)
+def parse_rpm_qa_line(line):
+    '''("name[.arch]", "version-release") of a line of "rpm -qa" output'''
+    line = re.sub(r'(\.rpm)?\r?\n?$', '', line)
+    if ARCH_PATTERN.search(line):
+        nvr, a = line.rsplit('.', 1)
+    else:
+        nvr, a = line, None
+    n, v, r = nvr.rsplit('-', 2)
+    return ('%s.%s' % (n, a) if a else n), '%s-%s' % (v, r)
+
+def parse_rpm_qa(txt):
+    '''The {"name[.arch]": "version-release"} of a whole "rpm -qa" listing, skipping the lines that are not
+    packages, such as error messages'''
+    packages = {}
+    for n, v, r, a in RPM_QA_PATTERN.findall(txt):
+        na = '%s.%s' % (n, a) if a else n
+        # move a name listed again to its last position, so the last version wins across arches too
+        packages.pop(na, None)
+        packages[na] = '%s-%s' % (v, r)
+    return packages
+
+def transcript_packages(items):
+    '''The ("name.arch", "[epoch:]version-release") pairs of the items of a yum or dnf transcript section'''
+    if DNF_ITEMS_PATTERN.search(items[-1]):
+        # dnf lists name-[epoch:]version-release.arch
+        return list(map(parse_nevra, items))
+    # yum lists name.arch [epoch:]version-release
+    return list(zip(items[0::2], items[1::2]))
+
+def strip_cleanup(txt):
+    '''txt up to the "osgtest: ... special_cleanup" line, if any. Searches for the rarer marker and checks the start of
+    its line, which is several times faster than a regular expression anchored on the common "osgtest: " prefix.'''
+    i = txt.find(CLEANUP_MARKER)
+    while i != -1:
+        start = txt.rfind('\n', 0, i)
+        if start != -1 and i >= start + len(CLEANUP_PREFIX) and txt.startswith(CLEANUP_PREFIX, start):
+            return txt[:start] + '\n'
+        i = txt.find(CLEANUP_MARKER, i + 1)
+    return txt
+
+def scrape_installed(txt):
+    '''The {"name.arch": "[epoch:]version-release"} that the yum or dnf transcripts in an osg-test log (or a mock
+    root.log) leave installed'''
+    # strip "DEBUG util.py:388:  " in case this is coming from a root.log
+    txt = ROOT_LOG_PREFIX_PATTERN.sub('\n', txt.replace('\r\n', '\n'))
+    # don't include Install list from cleanup/downgrade
+    txt = strip_cleanup(txt)
+    installed = {}
+    for section, items_txt in ITEMS_PATTERN.findall('\n' + txt):
+        items = items_txt.split()
+        if not items:
+            continue
+        if section == 'Replaced':
+            # removed or obsoleted by another package
+            for na, evr in transcript_packages(items):
+                if installed.get(na) == evr:
+                    del installed[na]
+        else:
+            installed.update(transcript_packages(items))
+    return installed
+
+def parse_package_list(txt):
+    '''The {"name.arch": "[epoch:]version-release"} of an osg-test log, a root.log, an osg-profile.txt or an "rpm -qa"
+    listing. Raises ValueError if an osg-profile.txt has no packages.'''
+    txt = txt.replace('\r\n', '\n')  # convert dos line endings
+    if '***** All RPMs' in txt:
+        # assume this is osg-system-profiler output (osg-profile.txt)
+        m = PROFILER_PATTERN.search(txt)
+        if not m:
+            raise ValueError("No RPMs found in profiler output")
+        return parse_rpm_qa(m.group(1))
+    elif ' ' in txt:
+        return scrape_installed(txt)
+    else:
+        # at most 1-word per line; assume this is 'rpm -qa' output
+        return parse_rpm_qa(txt)
+
+def normalize(packages, strip_arch=True, strip_dist=True):
+    '''The {name: version-release} of a package list for display, without the arch and dist tags as asked, and
+    without zero epochs'''
+    normalized = {}
+    for na, evr in packages.items():
+        if strip_arch:
+            na = arch_strip(na)
+        if strip_dist:
+            evr = dist_strip(evr)
+        if evr.startswith('0:'):
+            evr = evr[2:]
+        normalized[na] = evr
+    return normalized
+
+# ======================================================================================================================
+# Version comparison
+
+def string_to_version(verstring):
+    '''"[epoch:]version[-release]" -> (epoch, version, release), as rpmUtils.miscutils.stringToVersion did'''
+    if not verstring:
+        return (None, None, None)
+    i = verstring.find(':')
+    epoch = '0'
+    if i != -1:
+        try:
+            epoch = str(int(verstring[:i]))
+        except ValueError:
+            pass
+    j = verstring.find('-')
+    if j != -1:
+        version = verstring[i+1:j] or None
+        release = verstring[j+1:]
+    else:
+        version = verstring[i+1:] or None
+        release = None
+    return (epoch, version, release)
+
+SEPARATORS_PATTERN = re.compile(r'^[^a-zA-Z0-9~^]+')
+DIGITS_PATTERN = re.compile(r'^[0-9]*')
+LETTERS_PATTERN = re.compile(r'^[a-zA-Z]*')
+
+def segment_vercmp(a, b):
+    '''Pure-Python port of rpmvercmp() from rpm's rpmio/rpmvercmp.c'''
+    if a == b:
+        return 0
+    one, two = a, b
+    while one or two:
+        one = SEPARATORS_PATTERN.sub('', one)
+        two = SEPARATORS_PATTERN.sub('', two)
+
+        # a tilde sorts before anything, even the end of the string
+        if one.startswith('~') or two.startswith('~'):
+            if not one.startswith('~'):
+                return 1
+            if not two.startswith('~'):
+                return -1
+            one, two = one[1:], two[1:]
+            continue
+
+        # a caret sorts after the end of the string, but before anything else
+        if one.startswith('^') or two.startswith('^'):
+            if not one:
+                return -1
+            if not two:
+                return 1
+            if not one.startswith('^'):
+                return 1
+            if not two.startswith('^'):
+                return -1
+            one, two = one[1:], two[1:]
+            continue
+
+        if not (one and two):
+            break
+
+        isnum = one[0].isdigit()
+        segment_pattern = DIGITS_PATTERN if isnum else LETTERS_PATTERN
+        seg1 = segment_pattern.match(one).group()
+        seg2 = segment_pattern.match(two).group()
+        one, two = one[len(seg1):], two[len(seg2):]
+
+        # numeric segments are newer than alpha ones
+        if not seg2:
+            return 1 if isnum else -1
+
+        if isnum:
+            seg1 = seg1.lstrip('0')
+            seg2 = seg2.lstrip('0')
+            if len(seg1) != len(seg2):
+                return 1 if len(seg1) > len(seg2) else -1
+        if seg1 != seg2:
+            return 1 if seg1 > seg2 else -1
+
+    if not one and not two:
+        return 0
+    return -1 if not one else 1
+
+def compare_values(a, b):
+    if a is None or b is None:
+        return (a is not None) - (b is not None)
+    return segment_vercmp(a, b)
+
+def label_compare(evr1, evr2):
+    for a, b in zip(evr1, evr2):
+        ret = compare_values(a, b)
+        if ret:
+            return ret
+    return 0
+
+try:
+    import rpm
+    label_compare = rpm.labelCompare
+except (ImportError, AttributeError):
+    # no rpm bindings (a bare "rpm" namespace package has no labelCompare)
+    pass
+
+def rpmvercmp(a, b):
+    '''Compare two "[epoch:]version-release" strings like rpm does'''
+    return label_compare(string_to_version(a), string_to_version(b))
+
+version_key = functools.cmp_to_key(rpmvercmp)
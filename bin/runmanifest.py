@@ -0,0 +1,88 @@
+'''The manifest of a VMU run.
+
+generate-dag writes jobs/run-manifest.json next to the DAG it generates: the
+platform, sources and package set of each job serial, and the flattened test
+parameters the run was generated from. It is the record of what each job of
+the run was meant to test, so the tools that run later need neither parse the
+osg-test.conf of each job nor reload parameters.d, which may have been edited
+since the run started.'''
+
+import json
+import os
+
+import vmu
+
+MANIFEST_FILENAME = 'run-manifest.json'
+# Bump when the manifest changes, so that older ones are not misread
+MANIFEST_VERSION = 1
+
+
+class RunManifest(object):
+    """The jobs of a run, by serial, and the parameters they were generated from
+
+    Each job is a dict with the 'platform', 'sources', 'packages' (a list),
+    'package_set' (its label) and 'selinux' of the job. The parameters are
+    the 'platforms', 'sources' and 'package_sets' of vmu.flatten_run_params,
+    with each package set as a dict of its 'label', 'packages' and 'selinux'.
+    """
+
+    def __init__(self, params, jobs=None):
+        self.params = params
+        self.jobs = {} if jobs is None else jobs
+
+    @classmethod
+    def from_flat_params(cls, flat_params):
+        '''A manifest without jobs for the output of vmu.flatten_run_params'''
+        params = {'platforms': list(flat_params['platforms']),
+                  'sources': list(flat_params['sources']),
+                  'package_sets': [{'label': package_set.label, 'packages': list(package_set.packages),
+                                    'selinux': package_set.selinux} for package_set in flat_params['package_sets']]}
+        return cls(params)
+
+    def add_job(self, serial, combo):
+        '''Add the job of a (platform, sources, vmu.PackageSet) combo'''
+        platform, sources, package_set = combo
+        self.jobs[serial] = {'platform': platform,
+                             'sources': sources,
+                             'packages': list(package_set.packages),
+                             'package_set': package_set.label,
+                             'selinux': package_set.selinux}
+
+    def job(self, serial):
+        '''The job of serial, or None if the run has no such job'''
+        return self.jobs.get(serial)
+
+    def package_mapping(self):
+        '''The {stringified list of packages: label} of the package sets, as vmu.package_mapping'''
+        return dict((', '.join(x['packages']), x['label']) for x in self.params['package_sets'])
+
+    def package_set_labels(self):
+        return [x['label'] for x in self.params['package_sets']]
+
+    def write(self, jobs_dir):
+        path = os.path.join(jobs_dir, MANIFEST_FILENAME)
+        temp_path = '%s.%d' % (path, os.getpid())
+        with open(temp_path, 'w') as manifest_file:
+            json.dump({'version': MANIFEST_VERSION, 'params': self.params, 'jobs': self.jobs}, manifest_file,
+                      indent=1, sort_keys=True)
+        os.rename(temp_path, path)
+
+
+def load(jobs_dir):
+    '''The manifest of the run of jobs_dir, or None if it has none that is up to date'''
+    try:
+        with open(os.path.join(jobs_dir, MANIFEST_FILENAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (IOError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return RunManifest(manifest['params'], manifest['jobs'])
+
+def load_run(jobs_dir, param_dir=vmu.PARAM_DIR):
+    '''The manifest of the run of jobs_dir or, for a run generated without one, a manifest without jobs of the
+    parameters in param_dir. Raises vmu.ParamError or IOError if those cannot be read.'''
+    manifest = load(jobs_dir)
+    if manifest is None:
+        manifest = RunManifest.from_flat_params(vmu.flatten_run_params(vmu.load_run_params(param_dir)))
+    return manifest
@@ -0,0 +1,63 @@
+'''Timing spans of the stages of a VMU run.
+
+The stages that run on the submit host append a span, the start and end of a
+piece of their work, to jobs/run-trace.jsonl as they go: one JSON object per
+line with the 'stage', the job 'serial' (left out for the stages that work on
+the whole run), the 'start' and 'end' in seconds since the epoch, the 'pid' and
+whether the work ended 'ok' or with an 'error'. Each span is appended with a
+single write, so concurrent DAG nodes do not garble each other's spans. The
+shell scripts among the stages write their spans with printf in the same
+format. run-timeline merges the spans with the DAGMan node logs.'''
+
+import contextlib
+import json
+import os
+import time
+
+TRACE_FILENAME = 'run-trace.jsonl'
+
+
+def trace_path(jobs_dir):
+    return os.path.join(jobs_dir, TRACE_FILENAME)
+
+def record(stage, start, end, serial=None, status='ok', jobs_dir='.'):
+    '''Append a span to the trace of the run of jobs_dir. Timing is never worth failing a stage for, so errors are
+    ignored.'''
+    span_data = {'stage': stage, 'start': round(start, 3), 'end': round(end, 3), 'pid': os.getpid(), 'status': status}
+    if serial is not None:
+        span_data['serial'] = serial
+    try:
+        fd = os.open(trace_path(jobs_dir), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(span_data, sort_keys=True) + '\n').encode())
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+@contextlib.contextmanager
+def span(stage, serial=None, jobs_dir='.'):
+    '''Record the work done in the with block as a span; its status is 'error' if the block raises'''
+    start = time.time()
+    status = 'error'
+    try:
+        yield
+        status = 'ok'
+    finally:
+        record(stage, start, time.time(), serial, status, jobs_dir)
+
+def read_spans(jobs_dir):
+    '''The spans of the trace of the run of jobs_dir, skipping any line that is not a whole span'''
+    spans = []
+    try:
+        with open(trace_path(jobs_dir)) as trace_file:
+            for line in trace_file:
+                try:
+                    span_data = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(span_data, dict) and {'stage', 'start', 'end'} <= set(span_data):
+                    spans.append(span_data)
+    except IOError:
+        pass
+    return spans
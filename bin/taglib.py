@@ -1,9 +1,12 @@
 """A helper class for generating htmls. API vaguely based on ElementTree but
 the output is nicely indented for readability."""
 
-import re
+import sys
 import types
 
+# html special characters and their escapes, '&' first
+ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('%', '&#37;'), ('\xA0', '&nbsp;'))
+
 def indented(string_to_indent, indent):
     """Return the indented version of a string. 'indent' is the number of spaces
     to add before each line.
@@ -19,11 +22,21 @@ class Tag(object):
     """Holds a tag with a name, attributes and content.
     content is a list of either tags or strings.
 
+    attribs is None for a tag without attributes. Once a tag's attributes
+    are final, freeze() builds its attribute string once, to be reused every
+    time the tag is rendered.
+
     """
+    __slots__ = ('tag_name', 'attribs', 'contents', '_attribs_str')
+
     def __init__(self, tag_name, attribs=None, **kwattribs):
         self.contents = []
-        self.tag_name = tag_name
+        self.tag_name = sys.intern(tag_name)
+        self._attribs_str = None
         if attribs is None:
+            if not kwattribs:
+                self.attribs = None
+                return
             attribs = {}
         self.attribs = attribs
         # special case for 'class_': 'class' is used often in the htmls,
@@ -53,12 +66,10 @@ class Tag(object):
         Returns self for easy chaining.
 
         """
-        escaped = re.sub('[&]', '&amp;', text)
-        escaped = re.sub('[<]', '&lt;', escaped)
-        escaped = re.sub('[>]', '&gt;', escaped)
-        escaped = re.sub('[%]', '&#37;', escaped)
-        escaped = re.sub('\xA0', '&nbsp;', escaped)
-        self.contents.append(escaped)
+        for char, escape in ESCAPES:
+            if char in text:
+                text = text.replace(char, escape)
+        self.contents.append(text)
         return self
 
     def append_new_tag(self, *args, **kwargs):
@@ -72,14 +83,19 @@ class Tag(object):
         key1="value1" key2="value2"
         etc.
         """
+        if self._attribs_str is not None:
+            return self._attribs_str
         astr = ""
-        attribs_list = []
-        for k,v in self.attribs.items():
-            attribs_list.append('%s="%s"' % (k, v))
-        if attribs_list:
-            astr += " " + (" ".join(attribs_list))
+        if self.attribs:
+            astr = " " + " ".join(['%s="%s"' % (k, v) for k, v in self.attribs.items()])
         return astr
 
+    def freeze(self):
+        """Build and keep the attribute string. Returns self for easy chaining."""
+        self._attribs_str = None
+        self._attribs_str = self.get_attribs_str()
+        return self
+
     def get_opening_tag(self):
         """The string for the opening tag"""
         return "<%s%s>" % (self.tag_name, self.get_attribs_str())
@@ -93,22 +109,49 @@ class Tag(object):
         return "<%s%s/>" % (self.tag_name, self.get_attribs_str())
 
     def set(self, attrib, newval):
-        """Set an attribute. Returns self for easy chaining."""
+        """Set an attribute, thawing a frozen tag. Returns self for easy chaining."""
+        if self.attribs is None:
+            self.attribs = {}
         self.attribs[attrib] = newval
+        self._attribs_str = None
         return self
 
     def get(self, attrib):
         """Get an attribute."""
+        if self.attribs is None:
+            return None
         return self.attribs.get(attrib)
 
-    def __str__(self):
+    def iter_chunks(self, indent=0):
+        """Generate the indented html of the tag and its contents in a single
+        depth-first pass. The chunks join up to indented(str(self), indent).
+
+        """
+        newline = "\n" + " " * indent
         if not self.contents:
-            return self.get_empty_tag()
+            yield newline[1:] + self.get_empty_tag().replace("\n", newline)
         elif len(self.contents) == 1 and not isinstance(self.contents[0], Tag):
-            return self.get_opening_tag() + str(self.contents[0]) + self.get_closing_tag()
+            yield newline[1:] + (self.get_opening_tag() + str(self.contents[0]) +
+                                 self.get_closing_tag()).replace("\n", newline)
         else:
-            return "%s\n%s\n%s" % (self.get_opening_tag(), "\n".join((indented(str(x), 2) for x in self.contents)), self.get_closing_tag())
-        
+            yield newline[1:] + self.get_opening_tag().replace("\n", newline)
+            child_newline = newline + "  "
+            for item in self.contents:
+                if isinstance(item, Tag):
+                    yield "\n"
+                    for chunk in item.iter_chunks(indent + 2):
+                        yield chunk
+                else:
+                    yield child_newline + str(item).replace("\n", child_newline)
+            yield newline + self.get_closing_tag()
+
+    def write(self, stream):
+        """Write the html of the tag and its contents to stream"""
+        stream.writelines(self.iter_chunks())
+
+    def __str__(self):
+        return "".join(self.iter_chunks())
+
 def SubTag(parent, *args, **kwargs):
     """Factory function. A convenient alias for Tag.append_new_tag -- compare
     to ElementTree.SubElement()"""
@@ -132,7 +175,17 @@ class Html(object):
             self.head.append_new_tag("style", type_='text/css').append(self.css_inline)
         self.body = SubTag(self.html, "body")
 
+    def iter_chunks(self):
+        """Generate the html of the page"""
+        yield "<!DOCTYPE html>\n"
+        for chunk in self.html.iter_chunks():
+            yield chunk
+
+    def write(self, stream):
+        """Write the html of the page to stream"""
+        stream.writelines(self.iter_chunks())
+
     def __str__(self):
-        return "<!DOCTYPE html>\n" + str(self.html)
+        return "".join(self.iter_chunks())
 
 
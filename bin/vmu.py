@@ -5,10 +5,11 @@ scripts'''
 
 from glob import glob
 import os
-import re
 import sys
 import yaml
 
+import canonical
+
 RUN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PARAM_DIR = os.path.join(RUN_DIR, 'parameters.d')
 TEST_EXCEPTIONS = os.path.join(RUN_DIR, 'test-exceptions.yaml')
@@ -75,50 +76,11 @@ def package_mapping(flat_params):
 
 def canonical_os_string(os_release, param_name=False):
     '''Make the OS release from test parameters or /etc/redhat/release human readable'''
-    if not param_name:
-        # Handle OS string from /etc/redhat-release
-        result = os_release.replace('Red Hat Enterprise Linux Server', 'RHEL')
-        result = result.replace('Scientific Linux', 'SL')
-        result = result.replace('CentOS Linux', 'CentOS')
-        result = result.replace('CentOS Stream', 'C. Stream')
-        result = result.replace('Rocky Linux', 'Rocky')
-        result = result.replace('AlmaLinux', 'Alma')
-        result = re.sub(r'(\d{1,2})(\.\d+)?(.*)', r'\1 (\3)', result)
-    else:
-        # Handle OS string from 'platforms' test parameters
-        result = os_release.replace('rhel', 'RHEL')
-        result = result.replace('sl', 'SL')
-        result = result.replace('centos_stream', 'C. Stream')
-        result = result.replace('centos', 'CentOS')
-        result = result.replace('rocky', 'Rocky')
-        result = result.replace('alma', 'Alma')
-        result = re.sub(r'_(\d{1,2})\.(.*)', r' \1 (\2)', result)
-    return result
+    return canonical.os_string(os_release, param_name)
 
 def canonical_src_string(sources):
     '''Make the repo source string human readable'''
-    result = re.sub(r'\s*>\s*', ' -> ', sources)
-    branch = None
-    m = re.search(r'(^\w+:[./\w-]+)\s*;\s*(.*)', result)
-    if m:
-        branch, result = m.groups()
-    result = re.sub(r'epel-testing', 'EPEL Testing', result)
-    result = re.sub(r'osg-minefield', 'Minefield', result)
-    result = re.sub(r'osg-development', 'Development', result)
-    result = re.sub(r'osg-testing', 'Testing', result)
-    result = re.sub(r'osg-prerelease', 'Prerelease', result)
-    result = re.sub(r'osg-rolling', 'Rolling', result)
-    result = re.sub(r'osg-upcoming-testing', 'Upcoming Testing', result)
-    result = re.sub(r'osg-upcoming-rolling', 'Upcoming Rolling', result)
-    result = re.sub(r'osg-upcoming', 'Upcoming', result)
-    result = re.sub(r'osg', 'Release', result) # Must come after other repos
-    result = re.sub(r';', '', result)
-    result = re.sub(r'/', ' ', result)
-    result = re.sub(r',', ' + ', result)
-    result = re.sub(r'^(\d+\.\d+)(.*-> )(?!\d)', '\\1\\2\\1 ', result) # Duplicate release series, when needed
-    if branch:
-        result += " (%s)" % branch
-    return result.strip()
+    return canonical.src_string(sources)
 
 class ParamError(Exception):
     """Exception for errors in parameter files"""
@@ -11,8 +11,13 @@ Url: https://github.com/opensciencegrid/vm-test-runs/
 
 Requires: libguestfs-tools
 Requires: guestfs-tools
+# Making job I/O images without libguestfs
+Requires: e2fsprogs >= 1.43
+Requires: qemu-img
 Requires: git
 
+BuildRequires: python3-rpm-macros
+
 %description
 Tools for running OSG VMU tests in the CHTC
 
@@ -36,9 +41,12 @@ install -D -m 0644 rpm/vm-test-cleanup.timer %{buildroot}/%{_unitdir}/vm-test-cl
 
 install -D -m 0755 bin/compare-rpm-versions %{buildroot}/%{_bindir}/compare-rpm-versions
 install -D -m 0755 bin/find-recent-runs %{buildroot}/%{_bindir}/find-recent-runs
+install -D -m 0755 bin/find-rpm-history %{buildroot}/%{_bindir}/find-rpm-history
 install -D -m 0755 bin/list-rpm-versions %{buildroot}/%{_bindir}/list-rpm-versions
 install -D -m 0755 bin/osg-run-tests %{buildroot}/%{_bindir}/osg-run-tests
 install -D -m 0755 bin/vm-test-cleanup %{buildroot}/%{_bindir}/vm-test-cleanup
+# Shared by the RPM version tools
+install -D -m 0644 bin/rpmparse.py %{buildroot}/%{python3_sitelib}/rpmparse.py
 
 install -D vmu.css %{buildroot}/%{_localstatedir}/www/html/vmu.css
 
@@ -57,9 +65,12 @@ install -D vmu.css %{buildroot}/%{_localstatedir}/www/html/vmu.css
 
 %{_bindir}/compare-rpm-versions
 %{_bindir}/find-recent-runs
+%{_bindir}/find-rpm-history
 %{_bindir}/list-rpm-versions
 %{_bindir}/osg-run-tests
 %{_bindir}/vm-test-cleanup
+%{python3_sitelib}/rpmparse.py
+%{python3_sitelib}/__pycache__/rpmparse.*
 
 %{_unitdir}/osg-nightly-tests.service
 %{_unitdir}/osg-nightly-tests.timer
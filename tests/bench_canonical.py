@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+'''Benchmark of canonicalizing the platforms and sources of a synthetic run history.
+
+Each run of the history takes its platform and sources from the parameter files
+in parameters.d, as analyze-test-run and vmu-reporter see them: an OS release
+from /etc/redhat-release and a source string. Times the original vmu rules
+(reference copy below), the precompiled rules without the memo, the memoized
+functions and the bulk API.
+
+usage: bench_canonical.py [-n RUNS]'''
+
+import getopt
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'bin'))
+
+import canonical
+import vmu
+
+RELEASES = {'alma': 'AlmaLinux %s.4 (Seafoam Ocelot)', 'rocky': 'Rocky Linux %s.4 (Blue Onyx)',
+            'centos_stream': 'CentOS Stream release %s', 'centos': 'CentOS Linux release %s.9.2009 (Core)',
+            'rhel': 'Red Hat Enterprise Linux Server release %s.9 (Maipo)', 'sl': 'Scientific Linux release %s.9 (Nitrogen)'}
+
+
+def reference_os_string(os_release):
+    '''canonical_os_string for /etc/redhat-release strings, as vmu used to do it'''
+    result = os_release.replace('Red Hat Enterprise Linux Server', 'RHEL')
+    result = result.replace('Scientific Linux', 'SL')
+    result = result.replace('CentOS Linux', 'CentOS')
+    result = result.replace('CentOS Stream', 'C. Stream')
+    result = result.replace('Rocky Linux', 'Rocky')
+    result = result.replace('AlmaLinux', 'Alma')
+    result = re.sub(r'(\d{1,2})(\.\d+)?(.*)', r'\1 (\3)', result)
+    return result
+
+def reference_src_string(sources):
+    '''canonical_src_string as vmu used to do it'''
+    result = re.sub(r'\s*>\s*', ' -> ', sources)
+    branch = None
+    m = re.search(r'(^\w+:[./\w-]+)\s*;\s*(.*)', result)
+    if m:
+        branch, result = m.groups()
+    result = re.sub(r'epel-testing', 'EPEL Testing', result)
+    result = re.sub(r'osg-minefield', 'Minefield', result)
+    result = re.sub(r'osg-development', 'Development', result)
+    result = re.sub(r'osg-testing', 'Testing', result)
+    result = re.sub(r'osg-prerelease', 'Prerelease', result)
+    result = re.sub(r'osg-rolling', 'Rolling', result)
+    result = re.sub(r'osg-upcoming-testing', 'Upcoming Testing', result)
+    result = re.sub(r'osg-upcoming-rolling', 'Upcoming Rolling', result)
+    result = re.sub(r'osg-upcoming', 'Upcoming', result)
+    result = re.sub(r'osg', 'Release', result)
+    result = re.sub(r';', '', result)
+    result = re.sub(r'/', ' ', result)
+    result = re.sub(r',', ' + ', result)
+    result = re.sub(r'^(\d+\.\d+)(.*-> )(?!\d)', '\\1\\2\\1 ', result)
+    if branch:
+        result += " (%s)" % branch
+    return result.strip()
+
+def synthetic_history(runs):
+    '''A list of (OS release, sources) pairs for a history of runs'''
+    flat_params = vmu.flatten_run_params(vmu.load_run_params(vmu.PARAM_DIR))
+    releases = []
+    for platform in flat_params['platforms']:
+        flavor_version, arch = platform.split('.', 1)
+        flavor, version = flavor_version.rsplit('_', 1)
+        releases.append((RELEASES[flavor] % version) + arch)
+    rng = random.Random(0)
+    return [(rng.choice(releases), rng.choice(flat_params['sources'])) for _ in range(runs)]
+
+def timed(label, function, history, expected=None):
+    start = time.perf_counter()
+    result = function(history)
+    elapsed = time.perf_counter() - start
+    print('%-26s %8.1f ms' % (label, elapsed * 1000))
+    if expected is not None and result != expected:
+        sys.exit('%s: results differ from the reference' % label)
+    return result
+
+def one_at_a_time(os_function, src_function):
+    def canonicalize(history):
+        return [(os_function(os_release), src_function(sources)) for os_release, sources in history]
+    return canonicalize
+
+def bulk(history):
+    return list(zip(canonical.os_strings([os_release for os_release, _ in history]),
+                    canonical.src_strings([sources for _, sources in history])))
+
+if __name__ == '__main__':
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], 'n:')
+    except getopt.GetoptError as err:
+        sys.exit(str(err))
+    runs = 10000
+    for opt, val in opts:
+        if opt == '-n':
+            runs = int(val)
+
+    history = synthetic_history(runs)
+    print('%d runs, %d distinct OS releases, %d distinct sources' %
+          (runs, len(set(h[0] for h in history)), len(set(h[1] for h in history))))
+    expected = timed('reference (vmu rules)', one_at_a_time(reference_os_string, reference_src_string), history)
+    timed('precompiled, no memo', one_at_a_time(canonical.os_string.__wrapped__, canonical.src_string.__wrapped__),
+          history, expected)
+    canonical.os_string.cache_clear()
+    canonical.src_string.cache_clear()
+    timed('memoized', one_at_a_time(canonical.os_string, canonical.src_string), history, expected)
+    timed('bulk', bulk, history, expected)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+'''Benchmark of making a job input image with and without libguestfs.
+
+Builds a tree like the one create-io-image puts in an input image (run-job, the
+patches, an osg-test configuration, a few MB standing in for the osg-test RPM
+and source tarballs) and times making a 64M qcow2 image of it with each path
+whose tools are installed, along with the peak RSS of the child processes.
+
+usage: bench_ioimage.py [-n REPEAT]'''
+
+import getopt
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'bin'))
+
+import ioimage
+
+RUN_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+
+
+def make_source_tree(directory):
+    os.mkdir(os.path.join(directory, 'input'))
+    os.mkdir(os.path.join(directory, 'output'))
+    shutil.copy(os.path.join(RUN_DIR, 'bin', 'run-job'), directory)
+    for patch in ('osg-test.patch', 'test-changes.patch', 'osg-release.patch'):
+        shutil.copy(os.path.join(RUN_DIR, patch), os.path.join(directory, 'input'))
+    shutil.copy(os.path.join(RUN_DIR, 'osg-test.conf'), os.path.join(directory, 'input'))
+    for name, size in (('osg-test-3.0.0-1.el9.noarch.rpm', 2), ('osg-test-git.tar.gz', 1),
+                       ('osg-ca-generator-git.tar.gz', 1)):
+        with open(os.path.join(directory, 'input', name), 'wb') as f:
+            f.write(os.urandom(size * 1024 * 1024))
+
+def bench(label, function, source_dir, work_dir, repeat):
+    times = []
+    for i in range(repeat):
+        image_filename = os.path.join(work_dir, '%s-%d.qcow2' % (label, i))
+        start = time.perf_counter()
+        return_code, _, stderr = function(source_dir, image_filename)
+        times.append(time.perf_counter() - start)
+        if return_code != 0:
+            print('%-10s failed: %s' % (label, stderr.strip()))
+            return
+        size = os.path.getsize(image_filename)
+        os.unlink(image_filename)
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0
+    print('%-10s best %7.2f s  mean %7.2f s  image %6.1f MiB  peak child RSS so far %7.1f MiB' %
+          (label, min(times), sum(times) / len(times), size / 1024.0 ** 2, peak_rss))
+
+if __name__ == '__main__':
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], 'n:')
+    except getopt.GetoptError as err:
+        sys.exit(str(err))
+    repeat = 3
+    for opt, val in opts:
+        if opt == '-n':
+            repeat = int(val)
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        source_dir = os.path.join(work_dir, 'image')
+        os.mkdir(source_dir)
+        make_source_tree(source_dir)
+        # Fast path first, so the peak child RSS it reports is its own
+        if ioimage.fast_path_available():
+            bench('mke2fs', ioimage.make_image_fast, source_dir, work_dir, repeat)
+        else:
+            print('mke2fs     skipped: mke2fs or qemu-img is not installed')
+        if shutil.which('virt-make-fs'):
+            bench('guestfs', ioimage.make_image_guestfs, source_dir, work_dir, repeat)
+        else:
+            print('guestfs    skipped: virt-make-fs is not installed')
+    finally:
+        shutil.rmtree(work_dir)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+'''Benchmark of list-rpm-versions summarize mode over a synthetic run directory.
+
+Makes a run directory with OUTPUTS output-NNN directories, each with one of
+the osg-test logs in tests/ with the releases of some of its packages bumped,
+and times reading the installed packages of every output the way
+list-rpm-versions used to (one forked child per output, all at once; reference
+copy below) and with the bounded worker pool, without and with the RPM
+inventories that process-job-output writes, then times the version sort.
+
+usage: bench_list_rpm_versions.py [-n OUTPUTS] [-j WORKERS] [PACKAGE...]'''
+
+import getopt
+import importlib.machinery
+import importlib.util
+import itertools
+import os
+import pickle
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+TESTS_DIR = os.path.dirname(os.path.realpath(__file__))
+LOGS = ('pass.log', 'fail.log', 'cleanup.log', 'ignore.log', 'install.log', 'update.log')
+PACKAGES = ('condor', 'globus-gatekeeper', 'voms-server', 'xrootd', 'java-1.7.0-openjdk', 'osg-ca-certs')
+
+LOADER = importlib.machinery.SourceFileLoader('list_rpm_versions', os.path.join(TESTS_DIR, '..', 'bin', 'list-rpm-versions'))
+lrv = importlib.util.module_from_spec(importlib.util.spec_from_loader(LOADER.name, LOADER))
+sys.modules[LOADER.name] = lrv
+LOADER.exec_module(lrv)
+
+
+def reference_bgcall(func, *a, **kw):
+    '''bgcall() as list-rpm-versions used to do it'''
+    r,w = itertools.starmap(os.fdopen, zip(os.pipe(), ["rb", "wb"]))
+
+    if os.fork():  # parent
+        w.close()
+        return lambda : pickle.load(r)
+    else:  # child
+        r.close()
+        ret = func(*a,**kw)
+        pickle.dump(ret, w)
+        w.close()
+        os._exit(0)
+
+def reference_gather(outputs, pkgs):
+    bgcalls = [ reference_bgcall(lrv.single_output_pkg_vrs, o, pkgs) for o in outputs ]
+    results = [ (output, get_pkg_vrs()) for get_pkg_vrs,output in zip(bgcalls, outputs) ]
+    while True:
+        try:
+            os.wait()
+        except ChildProcessError:
+            break
+    return results
+
+def make_run_dir(run_dir, outputs):
+    rng = random.Random(0)
+    templates = []
+    for name in LOGS:
+        with open(os.path.join(TESTS_DIR, name)) as log:
+            templates.append(log.read())
+    for serial in range(outputs):
+        output_dir = os.path.join(run_dir, 'jobs', 'output-%03d' % serial, 'output')
+        os.makedirs(output_dir)
+        # bump the release of some packages, so that there is something to sort
+        bump = rng.randrange(1, 20)
+        txt = re.sub(r'(\s(?:condor|xrootd|voms-server)\S*\s+\S*?-)(\d+)',
+                     lambda m: m.group(1) + str(int(m.group(2)) + bump), rng.choice(templates))
+        with open(os.path.join(output_dir, 'osg-test-20240101.log'), 'w') as log:
+            log.write(txt)
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    print('%-28s %8.1f ms' % (label, elapsed * 1000))
+    return result
+
+if __name__ == '__main__':
+    try:
+        opts, pkgs = getopt.getopt(sys.argv[1:], 'n:j:')
+    except getopt.GetoptError as err:
+        sys.exit(str(err))
+    outputs = 500
+    workers = None
+    for opt, val in opts:
+        if opt == '-n':
+            outputs = int(val)
+        elif opt == '-j':
+            workers = int(val)
+    pkgs = pkgs or list(PACKAGES)
+
+    run_dir = tempfile.mkdtemp()
+    try:
+        make_run_dir(run_dir, outputs)
+        output_dirs = lrv.get_run_output_dirs(run_dir)
+        print('%d outputs, %d packages, %d workers' % (len(output_dirs), len(pkgs),
+                                                     workers or os.cpu_count()))
+        expected = timed('reference (fork per output)', reference_gather, output_dirs, pkgs)
+        result = timed('worker pool', lambda: list(lrv.gather_pkg_vrs(output_dirs, pkgs, workers)))
+        if result != expected:
+            sys.exit('worker pool: results differ from the reference')
+        for output_dir in output_dirs:
+            lrv.rpminventory.write(lrv.rpminventory.build(lrv.resultimage.JobFiles.for_path(output_dir)),
+                                   output_dir)
+        result = timed('worker pool, indexed', lambda: list(lrv.gather_pkg_vrs(output_dirs, pkgs, workers)))
+        if result != expected:
+            sys.exit('worker pool, indexed: results differ from the reference')
+
+        vrs = sorted(set(vr for _, pkg_vrs in result for _, vr in pkg_vrs)) * 20
+        timed('sort %d versions (%s)' % (len(vrs), 'rpm' if lrv.rpmparse.label_compare.__module__ == 'rpm' else 'python'),
+              lambda: sorted(vrs, key=lrv.rpmparse.version_key))
+    finally:
+        shutil.rmtree(run_dir)
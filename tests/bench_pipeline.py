@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+'''End-to-end simulation and throughput benchmark of the local stages of a VMU run.
+
+Builds a run directory for JOBS jobs the way osg-run-tests does (a copy of
+bin/, the patches and a parameters.d), with parameter files made from the
+platforms, sources and package sets of parameters.d (plus synthetic package
+sets once those run out), and runs the stages of the DAG that run on the
+submit host in order:
+
+  generate-dag          the script, with the VM images stubbed by empty files
+  create-io-image       create_image() for each job, with the image making
+                        stubbed and the source tarballs from local repositories
+                        standing in for GitHub
+  TestRun               simulated: writes each output-NNN, as extracted from its
+                        result image, from the osg-test logs in tests/ and
+                        records a job ID
+  process-job-output    what the script runs for each job, in one process:
+                        the RPM inventory, analyze_job_output.py and
+                        append-job-analysis, against a stub condor_history
+  combine-job-analyses, analyze-test-run, vmu-reporter, upload-job-output
+                        the scripts, with the web directory in the simulation
+
+Each stage runs in a child process of its own, so that its wall time and peak
+RSS (of the child and its descendants) are its own. The per-job stages do not
+pay for starting an interpreter for each job, as they do under DAGMan.
+
+usage: bench_pipeline.py [-n JOBS[,JOBS...]] [-s STAGE[,STAGE...]] [-k]
+
+JOBS defaults to 100,1000,10000. -s runs only the given stages (and the ones
+they need are still run, untimed); -k keeps the simulated runs.'''
+
+import getopt
+import glob
+import importlib.machinery
+import importlib.util
+import itertools
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+TESTS_DIR = os.path.dirname(os.path.realpath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+LOGS = ('pass.log', 'fail.log', 'cleanup.log', 'ignore.log', 'install.log', 'update.log')
+RUN_NAME = 'run-20240101-0000'
+STAGES = ('generate-dag', 'create-io-image', 'TestRun', 'process-job-output', 'combine-job-analyses',
+          'analyze-test-run', 'vmu-reporter', 'upload-job-output')
+REPOSITORIES = ('osg-test', 'osg-ca-generator')
+SHELL_SCRIPTS = {'combine-job-analyses': 'sh', 'upload-job-output': 'bash'}
+
+RELEASES = {'alma': 'AlmaLinux release %s (Shamrock Pampas Cat)',
+            'rocky': 'Rocky Linux release %s (Blue Onyx)',
+            'centos_stream': 'CentOS Stream release %s'}
+
+RUN_JOB_LOG = '''{date} 10:00:00: cat /etc/creation_date
+2024-01-01
+==> OK
+{date} 10:00:01: cat /etc/redhat-release
+{release}
+==> OK
+1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536
+    inet 127.0.0.1/8 scope host lo
+2: ens3: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500
+    inet 10.0.2.15/24 brd 10.0.2.255 scope global ens3
+{date} 10:00:02: dnf -y install osg-release
+Installing: osg-release-24-1.el{dver}.{arch}.rpm
+==> OK
+{date} 10:00:03: dnf -y install osg-test
+==> OK
+osg-test source: git opensciencegrid:master
+osg-ca-generator source: git opensciencegrid:master
+'''
+
+STEP_LOG = '''{{"step": "cat /etc/creation_date", "start": 1704103530.000, "end": 1704103530.004, "exit_status": 0, "retries": 0, "backoff": 0}}
+{{"step": "yum -y distro-sync", "start": 1704103540.000, "end": 1704103900.000, "exit_status": 0, "retries": {retries}, "backoff": {backoff}}}
+{{"step": "yum -y install python3 python3-rpm", "start": 1704103900.000, "end": 1704103960.000, "exit_status": 0, "retries": 0, "backoff": 0}}
+{{"step": "osg-test", "start": 1704103970.000, "end": 1704107000.000, "exit_status": 0, "retries": 0, "backoff": 0}}
+'''
+
+CONDOR_HISTORY = '''#!{python}
+# Answers the condor_history queries of jobads.query_history for the jobs of the simulation
+import json, re, sys
+constraint = sys.argv[sys.argv.index('-constraint') + 1]
+print(json.dumps([{{'ClusterId': int(cluster), 'ProcId': int(proc), 'QDate': 1704103200,
+                   'JobCurrentStartDate': 1704103500, 'JobCurrentStartExecutingDate': 1704103530,
+                   'CompletionDate': 1704107100, 'LastRemoteHost': 'slot1@localhost', 'NumJobStarts': 1}}
+                  for cluster, proc in re.findall(r'ClusterId == (\\d+) && ProcId == (\\d+)', constraint)]))
+'''
+
+
+def git(*args):
+    subprocess.check_call(('git',) + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def read_parameters():
+    '''The distinct (platform, sources) pairs and the package sets of parameters.d, in order'''
+    pairs, package_sets = [], {}
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, 'parameters.d', '*.yaml'))):
+        with open(path) as param_file:
+            params = yaml.safe_load(param_file)
+        for pair in itertools.product(params['platforms'], params['sources']):
+            if pair not in pairs:
+                pairs.append(pair)
+        for package_set in params['package_sets']:
+            package_sets.setdefault(package_set['label'], package_set)
+    return pairs, list(package_sets.values())
+
+def write_parameters(param_dir, jobs):
+    '''Write parameter files for exactly jobs distinct jobs: one per (platform, sources) pair of parameters.d, each
+    with as many package sets as it takes'''
+    pairs, package_sets = read_parameters()
+    per_pair = int(math.ceil(float(jobs) / len(pairs)))
+    for i in range(len(package_sets), per_pair):
+        package_sets.append({'label': 'Synthetic %04d' % i, 'packages': ['osg-synthetic-%04d' % i]})
+    os.makedirs(param_dir)
+    for i, (platform, sources) in enumerate(pairs):
+        count = min(per_pair, jobs - i * per_pair)
+        if count <= 0:
+            break
+        with open(os.path.join(param_dir, 'sim-%04d.yaml' % i), 'w') as param_file:
+            yaml.safe_dump({'platforms': [platform], 'sources': [sources], 'package_sets': package_sets[:count]},
+                           param_file)
+
+def make_run(sim_dir, jobs):
+    '''Lay out the run directory of the simulation and its stubs; returns the run directory'''
+    run_dir = os.path.join(sim_dir, RUN_NAME)
+    shutil.copytree(os.path.join(REPO_DIR, 'bin'), os.path.join(run_dir, 'bin'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    for name in ('osg-test.conf', 'osg-test.patch', 'test-changes.patch', 'osg-release.patch',
+                 'test-exceptions.yaml', 'component-tags.yaml', 'vmu.css'):
+        shutil.copy(os.path.join(REPO_DIR, name), run_dir)
+    write_parameters(os.path.join(run_dir, 'parameters.d'), jobs)
+    with open(os.path.join(run_dir, 'run_label'), 'w') as label_file:
+        label_file.write('nightly\n')
+    os.mkdir(os.path.join(run_dir, 'jobs'))
+
+    # The VM images that generate-dag checks for, and the web directory of upload-job-output
+    image_dir = os.path.join(sim_dir, 'images')
+    os.mkdir(image_dir)
+    for platform in set(pair[0] for pair in read_parameters()[0]):
+        open(os.path.join(image_dir, platform + '_htcondor.dsk'), 'w').close()
+    substitute(os.path.join(run_dir, 'bin', 'generate-dag'), 'BASE_IMAGE_PATH="/staging/osg-images"',
+               'BASE_IMAGE_PATH=%r' % image_dir)
+    substitute(os.path.join(run_dir, 'bin', 'upload-job-output'), "EXPORT_DIR='/var/www/html/'",
+               "EXPORT_DIR='%s'" % os.path.join(sim_dir, 'www'))
+
+    fake_bin = os.path.join(sim_dir, 'fake-bin')
+    os.mkdir(fake_bin)
+    with open(os.path.join(fake_bin, 'condor_history'), 'w') as script:
+        script.write(CONDOR_HISTORY.format(python=sys.executable))
+    os.chmod(os.path.join(fake_bin, 'condor_history'), 0o755)
+
+    for repository in REPOSITORIES:
+        work_tree = os.path.join(sim_dir, 'work', repository)
+        git('init', '--quiet', work_tree)
+        with open(os.path.join(work_tree, 'README'), 'w') as readme:
+            readme.write(repository + '\n')
+        git('-C', work_tree, 'add', 'README')
+        git('-C', work_tree, '-c', 'user.name=VMU', '-c', 'user.email=vmu@localhost', 'commit', '--quiet', '-m', 'sim')
+        git('clone', '--quiet', '--bare', work_tree, os.path.join(sim_dir, 'github', 'opensciencegrid', repository))
+    return run_dir
+
+def substitute(path, old, new):
+    with open(path) as script:
+        contents = script.read()
+    if old not in contents:
+        sys.exit('%s: cannot stub %s' % (path, old))
+    with open(path, 'w') as script:
+        script.write(contents.replace(old, new))
+
+def load_script(run_dir, name):
+    loader = importlib.machinery.SourceFileLoader(name.replace('-', '_'), os.path.join(run_dir, 'bin', name))
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+    sys.modules[loader.name] = module
+    loader.exec_module(module)
+    return module
+
+def run_script(run_dir, name, *args, **kwargs):
+    interpreter = SHELL_SCRIPTS.get(name, sys.executable)
+    subprocess.check_call([interpreter, os.path.join(run_dir, 'bin', name)] + list(args), **kwargs)
+
+# ======================================================================================================================
+# Stages, run in the jobs directory of the simulated run by a child process
+
+def generate_dag(run_dir, sim_dir):
+    run_script(run_dir, 'generate-dag', os.path.join(run_dir, 'parameters.d'))
+
+def create_io_images(run_dir, sim_dir):
+    import ioimage
+    def make_image(source_dir, image_filename, size_mb=None):
+        open(image_filename, 'w').close()
+        return 0, '', ''
+    ioimage.make_image = make_image
+    create_io_image = load_script(run_dir, 'create-io-image')
+    create_io_image.GITHUB_URL = os.path.join(sim_dir, 'github', '%s', '%s')
+    for config_filename in sorted(glob.glob('osg-test-*.conf')):
+        create_io_image.create_image(config_filename)
+
+def test_runs(run_dir, sim_dir):
+    import runmanifest
+    templates = []
+    for name in LOGS:
+        with open(os.path.join(TESTS_DIR, name)) as log:
+            templates.append(log.read())
+    for serial, job in sorted(runmanifest.load('.').jobs.items()):
+        distro_version, arch = job['platform'].rsplit('.', 1)
+        distro, dver = distro_version.rsplit('_', 1)
+        output_dir = 'output-' + serial
+        os.makedirs(os.path.join(output_dir, 'input'))
+        os.makedirs(os.path.join(output_dir, 'output'))
+        os.rename('osg-test-%s.conf' % serial, os.path.join(output_dir, 'input', 'osg-test.conf'))
+        with open(os.path.join(output_dir, 'run-job.log'), 'w') as log:
+            log.write(RUN_JOB_LOG.format(date='2024-01-01', release=RELEASES[distro] % (dver + '.3'),
+                                         dver=dver, arch=arch))
+        with open(os.path.join(output_dir, 'output', 'osg-test-20240101.log'), 'w') as log:
+            log.write(templates[int(serial) % len(templates)])
+        with open(os.path.join(output_dir, 'output', 'run-job-steps.jsonl'), 'w') as log:
+            retries = int(serial) % 3
+            log.write(STEP_LOG.format(retries=retries, backoff=2 ** retries - 1))
+        with open(os.path.join(output_dir, 'io_free_size'), 'w') as free_size:
+            free_size.write('52428800')
+        with open(serial + '.jobid', 'w') as jobid:
+            jobid.write('%d.0\n' % (1000 + int(serial)))
+
+def process_job_outputs(run_dir, sim_dir):
+    import analyze_job_output
+    import jobads
+    import jobrecords
+    import resultimage
+    import resultstore
+    import rpminventory
+    import runmanifest
+    import vmu
+    os.environ['PATH'] = os.path.join(sim_dir, 'fake-bin') + os.pathsep + os.environ['PATH']
+    for jobid_path in sorted(glob.glob('*.jobid')):
+        serial = jobid_path[:-len('.jobid')]
+        with open(jobid_path) as jobid:
+            job_id = jobid.read().strip()
+        output_dir = 'output-' + serial
+        # rpminventory.py
+        job_files = resultimage.JobFiles.for_path(output_dir)
+        rpminventory.write(rpminventory.build(job_files), job_files.output_dir)
+        # analyze_job_output.py
+        job_ads = jobads.JobAds('.')
+        job_ads.fetch_run(job_id)
+        data = analyze_job_output.analyze_job(serial, job_id, analyze_job_output.load_yaml(vmu.TEST_EXCEPTIONS),
+                                              analyze_job_output.load_yaml(vmu.COMPONENT_TAGS), job_ads,
+                                              runmanifest.load('.'))
+        with open(jobrecords.analysis_path(output_dir), 'w') as analysis:
+            jobrecords.write_record(data, analysis)
+        # append-job-analysis
+        store = resultstore.ResultStore('.')
+        for record in jobrecords.read_records(jobrecords.analysis_path(output_dir)):
+            store.append(record)
+        store.package_mapping = runmanifest.load_run('.').package_mapping()
+        store.update()
+
+def combine_job_analyses(run_dir, sim_dir):
+    run_script(run_dir, 'combine-job-analyses')
+
+def analyze_test_run(run_dir, sim_dir):
+    with open('analyze-test-run.out', 'w') as out:
+        run_script(run_dir, 'analyze-test-run', '.', stdout=out)
+
+def vmu_reporter(run_dir, sim_dir):
+    run_script(run_dir, 'vmu-reporter', '-o', 'release=results.html', '-o', 'package=packages.html', '.')
+
+def upload_job_output(run_dir, sim_dir):
+    run_script(run_dir, 'upload-job-output', run_dir)
+
+STAGE_FUNCTIONS = dict(zip(STAGES, (generate_dag, create_io_images, test_runs, process_job_outputs,
+                                    combine_job_analyses, analyze_test_run, vmu_reporter, upload_job_output)))
+
+def run_stage(stage, run_dir, sim_dir):
+    '''Run stage in a child process; returns its wall time in seconds and the peak RSS of the child and its
+    descendants in KiB'''
+    start = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.chdir(os.path.join(run_dir, 'jobs'))
+            sys.path.insert(0, os.path.join(run_dir, 'bin'))
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, 1)
+            STAGE_FUNCTIONS[stage](run_dir, sim_dir)
+            status = 0
+        except BaseException as err:
+            sys.stderr.write('%s failed: %r\n' % (stage, err))
+        finally:
+            os._exit(status)
+    _, status, rusage = os.wait4(pid, 0)
+    elapsed = time.perf_counter() - start
+    if status != 0:
+        sys.exit('%s failed' % stage)
+    # ru_maxrss is in KiB on Linux
+    return elapsed, rusage.ru_maxrss
+
+def check(run_dir, jobs):
+    '''Check that the run came out whole'''
+    with open(os.path.join(run_dir, 'jobs', 'combined-analysis.jsonl')) as combined:
+        records = [json.loads(line) for line in combined]
+    if len(records) != jobs:
+        sys.exit('%d jobs were analyzed instead of %d' % (len(records), jobs))
+    for page in ('results.html', 'packages.html'):
+        if not os.path.getsize(os.path.join(run_dir, 'jobs', page)):
+            sys.exit('%s is empty' % page)
+
+if __name__ == '__main__':
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'n:s:k')
+    except getopt.GetoptError as err:
+        sys.exit(str(err))
+    sizes = (100, 1000, 10000)
+    timed_stages = STAGES
+    keep = False
+    for opt, val in opts:
+        if opt == '-n':
+            sizes = [int(size) for size in val.split(',')]
+        elif opt == '-s':
+            timed_stages = val.split(',')
+            unknown = set(timed_stages) - set(STAGES)
+            if unknown:
+                sys.exit('Unknown stages: %s; the stages are %s' % (', '.join(sorted(unknown)), ', '.join(STAGES)))
+        elif opt == '-k':
+            keep = True
+
+    print('%6s  %-22s %10s %12s %12s' % ('jobs', 'stage', 'seconds', 'ms per job', 'peak RSS MiB'))
+    for jobs in sizes:
+        sim_dir = tempfile.mkdtemp(prefix='vmu-sim-')
+        try:
+            run_dir = make_run(sim_dir, jobs)
+            total = 0.0
+            last = max(STAGES.index(stage) for stage in timed_stages)
+            for stage in STAGES[:last + 1]:
+                elapsed, maxrss = run_stage(stage, run_dir, sim_dir)
+                if stage in timed_stages:
+                    total += elapsed
+                    print('%6d  %-22s %10.2f %12.2f %12.1f' % (jobs, stage, elapsed, elapsed * 1000 / jobs,
+                                                                maxrss / 1024.0))
+            print('%6d  %-22s %10.2f %12.2f' % (jobs, 'total', total, total * 1000 / jobs))
+            if last == len(STAGES) - 1:
+                check(run_dir, jobs)
+        finally:
+            if keep:
+                print('kept %s' % sim_dir)
+            else:
+                shutil.rmtree(sim_dir)
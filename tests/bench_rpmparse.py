@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+'''Benchmark of the rpmparse package list parsing.
+
+Times parsing the osg-test logs in tests/ and a synthetic "rpm -qa" listing of
+PACKAGES packages REPEAT times each, the way list-rpm-versions used to
+(reference copy below: patterns compiled from strings on every call, the
+listing parsed one word at a time) and with rpmparse, cold and with its
+caches warm, as they are after the first outputs of a run, and prints the time
+per pass of each. Checks that both give the same packages.
+
+usage: bench_rpmparse.py [-n REPEAT] [-p PACKAGES]'''
+
+import getopt
+import os
+import random
+import re
+import sys
+import time
+
+TESTS_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'bin'))
+
+import rpmparse
+
+LOGS = ('pass.log', 'fail.log', 'cleanup.log', 'ignore.log', 'install.log', 'update.log')
+
+arch_pat = r'\.(x86_64|i[3-6]86|noarch|src)$'
+dist_pat = r'((\.osg(\d+)?)?\.[es]l[5-9](_[\d.]+)?(\.centos)?|\.osg|\.fc\d+)$'
+strip_arch = True
+strip_dist = True
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# list-rpm-versions, as it was
+
+def reference_arch_strip(na):
+    return re.sub(arch_pat, '', na)
+
+def reference_dist_strip(evr):
+    ev,r = evr.split('-')
+    r = re.sub(dist_pat, '', r)
+    return '-'.join([ev,r])
+
+def reference_parse_nevra(item):
+    nevr,a = item.rsplit('.',1)
+    n,ev,r = nevr.rsplit('-',2)
+    return "%s.%s" % (n,a), "%s-%s" % (ev,r)
+
+def reference_get_nv_evr_list(items):
+    if re.search(r'[._]el[89][._]', items[-1]):
+        return list(map(reference_parse_nevra, items))
+    else:
+        return list(zip(*([iter(items)] * 2)))
+
+def reference_nvrgen(items):
+    for na,evr in reference_get_nv_evr_list(items):
+        if strip_arch:
+            na = reference_arch_strip(na)
+        if strip_dist:
+            evr = reference_dist_strip(evr)
+        if evr.startswith("0:"):
+            evr = evr[2:]
+        yield [na,evr]
+
+def reference_rpm_qa2na_vr(line):
+    line = re.sub(r'(\.rpm)?\r?\n?$', '', line)
+    if re.search(arch_pat, line):
+        nvr,a = line.rsplit('.', 1)
+    else:
+        nvr,a = line, None
+    n,v,r = nvr.rsplit('-',2)
+    if a and not strip_arch:
+        na = '.'.join((n,a))
+    else:
+        na = n
+    if strip_dist:
+        r = re.sub(dist_pat, '', r)
+    return [na, '-'.join((v,r))]
+
+def reference_nvrmap(txt):
+    txt = txt.replace('\r\n', '\n')
+    if ' ' in txt:
+        txt = re.sub(r'\n[A-Z]+ .*?:\d+:  ', r'\n', txt)
+        txt = re.sub(r'\nosgtest: .* special_cleanup[\d\D]*', r'\n', txt)
+        installed_pkgs = {}
+        items_pat = (r'^(?:Dependency )?(Installed|Updated|Upgraded|Replaced):\n'
+                     r'(.*?)\n(?:\n|(?=[^ ]))')
+        for section, pkgtxt in re.findall(items_pat, txt, re.S | re.M):
+            pkg_items = pkgtxt.split()
+            if section == 'Replaced':
+                for na,evr in reference_nvrgen(pkg_items):
+                    if installed_pkgs.get(na) == evr:
+                        del installed_pkgs[na]
+            else:
+                installed_pkgs.update(reference_nvrgen(pkg_items))
+        return installed_pkgs
+    else:
+        return dict(map(reference_rpm_qa2na_vr, txt.split()))
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+def nvrmap(txt):
+    return rpmparse.normalize(rpmparse.parse_package_list(txt), strip_arch, strip_dist)
+
+def make_rpm_qa(packages):
+    rng = random.Random(0)
+    lines = []
+    for i in range(packages):
+        name = '-'.join(rng.choice(('lib', 'python3', 'osg', 'condor', 'perl', 'xrootd', 'devel', 'x%d' % i))
+                        for _ in range(rng.randrange(1, 4)))
+        lines.append('%s-%d.%d.%d-%d.%s.%s' % (name, rng.randrange(10), rng.randrange(20), rng.randrange(100),
+                                               rng.randrange(1, 30), rng.choice(('el7', 'osg36.el8', 'el9_2')),
+                                               rng.choice(('x86_64', 'noarch', 'i686'))))
+    lines.append('gpg-pubkey-f4a80eb5-53a7ff4b')
+    return '\n'.join(lines) + '\n'
+
+def clear_caches():
+    for function in (rpmparse.arch_strip, rpmparse.dist_strip, rpmparse.parse_nevra, rpmparse.parse_rpm_qa_line):
+        function.cache_clear()
+    re.purge()
+
+def timed(label, function, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = [function(txt) for txt in texts]
+    elapsed = time.perf_counter() - start
+    # Per pass, as the rows are timed over different numbers of passes
+    print('%-28s %8.2f ms per pass' % (label, elapsed * 1000 / repeat))
+    return result
+
+if __name__ == '__main__':
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'n:p:')
+    except getopt.GetoptError as err:
+        sys.exit(str(err))
+    repeat = 100
+    packages = 2000
+    for opt, val in opts:
+        if opt == '-n':
+            repeat = int(val)
+        elif opt == '-p':
+            packages = int(val)
+
+    logs = []
+    for name in LOGS:
+        with open(os.path.join(TESTS_DIR, name)) as log:
+            logs.append(log.read())
+    for label, texts in (('%d osg-test logs' % len(logs), logs), ('rpm -qa, %d packages' % packages,
+                                                                  [make_rpm_qa(packages)])):
+        for strip_arch, strip_dist in ((True, True), (False, False)):
+            print('%s, strip arch %s, strip dist %s, x%d' % (label, strip_arch, strip_dist, repeat))
+            clear_caches()
+            expected = timed('reference', reference_nvrmap, texts, repeat)
+            clear_caches()
+            timed('rpmparse, first', nvrmap, texts, 1)
+            result = timed('rpmparse, cached', nvrmap, texts, repeat)
+            if result != expected:
+                sys.exit('rpmparse: results differ from the reference')
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+'''Micro-benchmark of building and rendering a full vmu-reporter results page with taglib.
+
+The page has the shape of a results table for one parameter file (6 platforms x
+9 sources x 11 package sets) with mouseover blocks like those made by
+generate_cell. Reports the time taken and the memory allocated (with
+tracemalloc) to build the page and to render it.
+
+usage: bench_taglib.py [-n REPEAT] [--against OTHER_TAGLIB.py]
+
+--against also measures another copy of taglib.py, e.g. one extracted with
+"git show REV:bin/taglib.py", for comparison.'''
+
+import getopt
+import importlib.util
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'bin'))
+
+import taglib
+
+PLATFORMS = 6
+SOURCES = 9
+PACKAGE_SETS = 11
+MOUSEOVER = ('<b>Hostname</b>: exec%(n)d.chtc.wisc.edu</br><b>Host IP</b>: 10.0.0.%(n)d</br>'
+             '<b>Job ID:</b> 1234.%(n)d</br><b>Job Serial</b>: %(n)03d</br>'
+             '<b>VM Creation Date</b>: 2024-01-01</br><b>VM IO Free Space</b>: 12.5M</br>'
+             '<b>OSG Test Version</b>: 3.0.0-1</br><b>Start Time</b>: 2024-01-01 04:37:51</br>'
+             '<b>Run Time</b>: 4932.752s</br><b>OK Skips:</b> condor (2), gsi (4), voms (3)'
+             '</br><b>Failures:</b></br><b>&emsp;FAIL</b> 55.CondorCE (04_trace): -')
+
+
+def build_page(tags):
+    html = tags.Html('VMU Run: benchmark', css_link='/tests/vmu.css')
+    table = html.body.append_new_tag('table')
+    tbody = table.append_new_tag('tbody')
+    n = 0
+    for source in range(SOURCES):
+        tbody.append_new_tag('tr').append_new_tag('td', class_='divider')
+        trow = tbody.append_new_tag('tr')
+        row_header = tags.Tag('th', class_='yheader', valign='top')
+        trow.append(row_header).append('Source %d' % source)
+        for package_set in range(PACKAGE_SETS):
+            rest_of_row = tags.Tag('th', class_='yheader').append('Package set %d' % package_set)
+            for _ in range(PLATFORMS):
+                n += 1
+                link = tags.Tag('a', href='/tests/20240101-0000/%03d/osg-test.log' % n).append('266 13 12')
+                link_div = tags.Tag('div', class_='link').append(link)
+                mouseover_div = tags.Tag('div', class_='mouseover').append_escaped(MOUSEOVER % {'n': n})
+                container = tags.Tag('div', class_='data').extend((link_div, mouseover_div))
+                rest_of_row.append(tags.Tag('td', class_='result pass', align='center').append(container))
+            trow.append(rest_of_row)
+            trow.append_new_tag('tr')
+        row_header.set('rowspan', PACKAGE_SETS)
+    return html
+
+def render_page(html):
+    stream = io.StringIO()
+    if hasattr(html, 'write'):
+        html.write(stream)
+    else:
+        stream.write(str(html))
+    return stream.getvalue()
+
+def measure(function, *args):
+    '''Return the result of function(*args), the time it took, the peak memory it allocated and the number of
+    memory blocks that were still allocated when it returned'''
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    return result, elapsed, peak, blocks
+
+def best_time(function, args, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench(label, tags, repeat):
+    html, _, build_peak, build_blocks = measure(build_page, tags)
+    page, _, render_peak, _ = measure(render_page, html)
+    build_time = best_time(build_page, (tags,), repeat)
+    render_time = best_time(render_page, (html,), repeat)
+    print('%-10s build %7.1f ms %8.1f KiB peak %7d blocks | render %7.1f ms %8.1f KiB peak | page %d KiB' %
+          (label, build_time * 1000, build_peak / 1024.0, build_blocks, render_time * 1000, render_peak / 1024.0,
+           len(page) // 1024))
+    return page
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location('other_taglib', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+if __name__ == '__main__':
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'n:', ['against='])
+    except getopt.GetoptError as err:
+        sys.exit(str(err))
+    repeat = 5
+    other = None
+    for opt, val in opts:
+        if opt == '-n':
+            repeat = int(val)
+        elif opt == '--against':
+            other = val
+
+    print('%d cells, best of %d' % (PLATFORMS * SOURCES * PACKAGE_SETS, repeat))
+    page = bench('taglib', taglib, repeat)
+    if other is not None:
+        other_page = bench(os.path.basename(other), load_module(other), repeat)
+        if other_page != page:
+            sys.exit('The pages rendered by the two versions of taglib differ')
@@ -3,12 +3,13 @@
 #pylint: disable=C0301
 #pylint: disable=R0904
 
+import io
 import os
 import sys
 import unittest
 from datetime import date
 
-PATHNAME = os.path.realpath('../')
+PATHNAME = os.path.realpath('../bin')
 sys.path.insert(0, PATHNAME)
 
 import analyze_job_output
@@ -24,7 +25,7 @@ class TestAnalyzeJobOutput(unittest.TestCase):
             test_exceptions = [('test_04_trace', 'test_55_condorce', date.today(), date.today()),
                                ('test_05_pbs_trace', 'test_55_condorce', date.today(), date.today())]
 
-        status, failures = analyze_job_output.parse_log(contents, test_exceptions)
+        status, failures, _ = analyze_job_output.parse_log(contents, test_exceptions, {})
         self.assertEqual(status, expected_status)
         self.assertEqual(failures, expected_failures)
 
@@ -48,7 +49,7 @@ class TestAnalyzeJobOutput(unittest.TestCase):
 
     def test_read_file(self):
         log_file = analyze_job_output.read_file('pass.log')
-        self.assert_(log_file)
+        self.assertTrue(log_file)
 
     def test_passing_status(self):
         self._run_parse_log('pass.log', 'pass', [])
@@ -80,6 +81,53 @@ class TestAnalyzeJobOutput(unittest.TestCase):
     def test_exceptions_file(self):
         self._test_fail_log('../test-exceptions.yaml')
 
+    def test_scan_summary(self):
+        # The nested osg-configure summary is followed by its STDOUT and must be skipped
+        with open('fail.log', 'r') as log:
+            facts = analyze_job_output.scan_osg_test_log(log)
+        self.assertEqual(facts['summary'], ('Ran 293 tests in 4932.752s', 'FAILED (failures=12, badSkips=2, okSkips=13)'))
+        self.assertEqual(facts['start_time'], '2014-12-12 04:37:51')
+        self.assertEqual(len(facts['okskip_modules']), 13)
+        self.assertEqual(facts['alarm_time'], None)
+
+    def test_scan_timeout(self):
+        log = io.StringIO('Start time: 2014-12-12 04:37:51\n'
+                          '  File "/usr/lib/python3.9/site-packages/osgtest/tests/test_150_xrootd.py", line 10, in test_01\n'
+                          'osgtest: message: 2014-12-12 05:00:00: first alarm\n'
+                          'Caught alarm:\n'
+                          '  File "/usr/lib/python3.9/site-packages/osgtest/tests/test_190_condorce.py", line 5, in test_02\n'
+                          'osgtest: message: 2014-12-12 06:00:00: second alarm\n'
+                          'Caught alarm:\n')
+        facts = analyze_job_output.scan_osg_test_log(log)
+        self.assertEqual(facts['alarm_time'], '2014-12-12 06:00:00')
+        self.assertEqual(facts['last_test'], ('test_190_condorce.py', 'test_02'))
+
+    def test_scan_run_job_log(self):
+        log = io.StringIO('2024-01-01 10:00:00: cat /etc/creation_date\n'
+                          '2023-12-01\n'
+                          '==> OK\n'
+                          '2024-01-01 10:00:01: cat /etc/redhat-release\n'
+                          'AlmaLinux release 9.3 (Shamrock Pampas Cat)\n'
+                          '==> OK\n'
+                          '1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536\n'
+                          '    inet 127.0.0.1/8 scope host lo\n'
+                          '2: ens3: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500\n'
+                          '    inet 10.0.2.15/24 brd 10.0.2.255 scope global ens3\n'
+                          '2024-01-01 10:00:02: yum -y install osg-test\n'
+                          'Installing: osg-test-3.0.0-1.el9.noarch.rpm\n'
+                          '==> FAILED with exit status 1\n'
+                          '2024-01-01 10:00:03: yum -y install osg-test\n'
+                          '==> OK\n'
+                          'osg-test source: file osg-test-3.0.0-1\n')
+        facts = analyze_job_output.scan_run_job_log(log)
+        self.assertEqual(facts['vm_creation_date'], '2023-12-01')
+        self.assertEqual(facts['os_release'], 'AlmaLinux release 9.3 (Shamrock Pampas Cat)')
+        self.assertEqual(facts['inet_address'], '10.0.2.15')
+        self.assertEqual(facts['final_osgtest_install'], '2024-01-01 10:00:03: yum -y install osg-test\n==> OK')
+        self.assertEqual(facts['osg-test'], 'file osg-test-3.0.0-1')
+        self.assertEqual(facts['osg-ca-generator'], None)
+        self.assertFalse(facts['epel_failed'])
+
 if __name__ == '__main__':
     SUITE = unittest.makeSuite(TestAnalyzeJobOutput)
     unittest.TextTestRunner(verbosity=2).run(SUITE)
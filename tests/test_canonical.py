@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import sys
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import canonical
+
+class TestCanonical(unittest.TestCase):
+
+    def test_os_release(self):
+        self.assertEqual(canonical.os_string('AlmaLinux 9.3x86_64'), 'Alma 9 (x86_64)')
+        self.assertEqual(canonical.os_string('Red Hat Enterprise Linux Server 7.9x86_64'), 'RHEL 7 (x86_64)')
+        self.assertEqual(canonical.os_string('CentOS Stream 10aarch64'), 'C. Stream 10 (aarch64)')
+
+    def test_platform(self):
+        self.assertEqual(canonical.os_string('alma_9.x86_64', True), 'Alma 9 (x86_64)')
+        self.assertEqual(canonical.os_string('centos_stream_10.aarch64', True), 'C. Stream 10 (aarch64)')
+        self.assertEqual(canonical.os_string('sl_7.x86_64', True), 'SL 7 (x86_64)')
+
+    def test_sources(self):
+        self.assertEqual(canonical.src_string('3.6; osg-testing'), '3.6 Testing')
+        self.assertEqual(canonical.src_string('3.6; osg > osg-testing'), '3.6 Release -> 3.6 Testing')
+        self.assertEqual(canonical.src_string('3.6; osg-upcoming-rolling, epel-testing'),
+                         '3.6 Upcoming Rolling +  EPEL Testing')
+        self.assertEqual(canonical.src_string('opensciencegrid:master; 24; osg-development'),
+                         '24 Development (opensciencegrid:master)')
+
+    def test_bulk(self):
+        sources = ['3.6; osg-testing', '23; osg', '3.6; osg-testing']
+        self.assertEqual(canonical.src_strings(sources), [canonical.src_string(x) for x in sources])
+        platforms = iter(['alma_9.x86_64', 'rocky_8.x86_64'])
+        self.assertEqual(canonical.os_strings(platforms, True), ['Alma 9 (x86_64)', 'Rocky 8 (x86_64)'])
+
+if __name__ == '__main__':
+    unittest.main()
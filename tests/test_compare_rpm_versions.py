@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = os.path.realpath('../bin/compare-rpm-versions')
+
+LOG = '''Installed:
+  condor.x86_64 0:%s.el9      xrootd.x86_64 1:%s.el9
+
+'''
+
+# serial, os_release, param_sources, condor, xrootd
+JOBS = (('000', 'AlmaLinux 9.3', 'osg', '23.0.0-1', '5.6.0-1'),
+        ('001', 'Rocky Linux 9.3', 'osg', '23.0.0-1', '5.6.0-1'),
+        ('002', 'AlmaLinux 9.3', 'osg-testing', '23.0.1-1', '5.6.0-1'),
+        ('003', 'Rocky Linux 9.3', 'osg-testing', '23.0.0-1', '5.6.0-1'))
+# an older condor on Rocky, in jobs numbered differently
+BASELINE_JOBS = (('003', 'AlmaLinux 9.3', 'osg', '23.0.0-1', '5.6.0-1'),
+                 ('002', 'Rocky Linux 9.3', 'osg', '22.0.0-1', '5.6.0-1'),
+                 ('001', 'AlmaLinux 9.3', 'osg-testing', '23.0.1-1', '5.6.0-1'),
+                 ('000', 'Rocky Linux 9.3', 'osg-testing', '22.0.0-1', '5.6.0-1'))
+
+
+def make_run(run_dir, jobs):
+    jobs_dir = os.path.join(run_dir, 'jobs')
+    for serial, os_release, sources, condor, xrootd in jobs:
+        output_dir = os.path.join(jobs_dir, 'output-' + serial, 'output')
+        os.makedirs(output_dir)
+        with open(os.path.join(output_dir, 'osg-test-20240101.log'), 'w') as log:
+            log.write(LOG % (condor, xrootd))
+        with open(os.path.join(jobs_dir, 'combined-analysis.jsonl'), 'a') as combined:
+            combined.write(json.dumps({'schema': 1, 'job_serial': serial, 'os_release': os_release,
+                                       'platform': 'x86_64', 'param_sources': sources,
+                                       'param_packages': 'osg-ce-condor', 'run_status': 0}) + '\n')
+
+def compare(*args):
+    return subprocess.check_output([sys.executable, SCRIPT, '--jobs=1'] + list(args), universal_newlines=True)
+
+
+class TestCompareRpmVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.run_dir = os.path.join(self.tmp_dir, 'run-20240102-0000')
+        self.base_dir = os.path.join(self.tmp_dir, 'run-20240101-0000')
+        make_run(self.run_dir, JOBS)
+        make_run(self.base_dir, BASELINE_JOBS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pairwise(self):
+        jobs_dir = os.path.join(self.run_dir, 'jobs')
+        self.assertEqual(compare(os.path.join(jobs_dir, 'output-000'), os.path.join(jobs_dir, 'output-002')).split()[-3:],
+                         ['condor', '23.0.0-1', '23.0.1-1'])
+
+    def test_run(self):
+        self.assertEqual(compare(self.run_dir).splitlines(),
+                         ['Package  Alma 9 (x86_64)    Rocky 9 (x86_64)',
+                          '-------  -----------------  ----------------',
+                          'condor   23.0.0-1,23.0.1-1  23.0.0-1'])
+        self.assertEqual(compare('--group-by=sources', self.run_dir).splitlines()[2],
+                         'condor   23.0.0-1  23.0.0-1,23.0.1-1')
+
+    def test_baseline(self):
+        self.assertEqual(compare(self.run_dir, self.base_dir).splitlines(),
+                         ['Package  Alma 9 (x86_64)    Rocky 9 (x86_64)',
+                          '-------  -----------------  --------------------',
+                          'condor   23.0.0-1,23.0.1-1  22.0.0-1 -> 23.0.0-1'])
+        # each job is compared with the job of the same platform, sources and package set
+        self.assertEqual(compare('--group-by=job', self.run_dir, self.base_dir).splitlines()[2].split(),
+                         ['condor', '23.0.0-1', '22.0.0-1', '->', '23.0.0-1', '23.0.1-1', '22.0.0-1', '->', '23.0.0-1'])
+        self.assertEqual(compare(self.run_dir, self.run_dir).strip(), 'No package version differences')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import importlib.machinery
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+LOADER = importlib.machinery.SourceFileLoader('find_rpm_history', os.path.realpath('../bin/find-rpm-history'))
+frh = importlib.util.module_from_spec(importlib.util.spec_from_loader(LOADER.name, LOADER))
+sys.modules[LOADER.name] = frh
+LOADER.exec_module(frh)
+
+class TestFindRpmHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.runs_dir = tempfile.mkdtemp()
+        self.index = os.path.join(self.runs_dir, frh.INDEX_FILENAME)
+
+    def tearDown(self):
+        shutil.rmtree(self.runs_dir)
+
+    def add_output(self, timestamp, serial, installed, complete=True):
+        jobs_dir = os.path.join(self.runs_dir, 'run-' + timestamp, 'jobs')
+        output_dir = os.path.join(jobs_dir, 'output-%03d' % serial)
+        os.makedirs(output_dir)
+        with open(os.path.join(output_dir, 'rpm-inventory.json'), 'w') as inventory:
+            json.dump({'schema': 1, 'installed': installed}, inventory)
+        if complete:
+            open(os.path.join(jobs_dir, 'packages.html'), 'w').close()
+
+    def test_update_and_query(self):
+        self.add_output('20240101-0000', 0, {'xrootd.x86_64': '1:4.12.1-1.osg35.el7', 'condor.x86_64': '0:9.0.1-1.el7'})
+        self.add_output('20240102-0000', 0, {'xrootd.x86_64': '1:5.0.2-1.osg35.el7'})
+        history = frh.RpmHistory(self.index, self.runs_dir)
+        self.assertEqual(history.update(), 2)
+        self.assertEqual(history.query('xrootd'), [('xrootd', '1:4.12.1-1.osg35.el7', '20240101-0000', 0),
+                                                   ('xrootd', '1:5.0.2-1.osg35.el7', '20240102-0000', 0)])
+        self.assertEqual(history.query('condor'), [('condor', '9.0.1-1.el7', '20240101-0000', 0)])
+        self.assertEqual(history.query('xrootd', '1:5.*'), [('xrootd', '1:5.0.2-1.osg35.el7', '20240102-0000', 0)])
+        self.assertEqual(history.meta('watermark'), '20240102-0000')
+
+    def test_watermark(self):
+        self.add_output('20240101-0000', 0, {'xrootd.x86_64': '1:4.12.1-1.el7'})
+        self.add_output('20240102-0000', 0, {'xrootd.x86_64': '1:5.0.2-1.el7'}, complete=False)
+        history = frh.RpmHistory(self.index, self.runs_dir)
+        self.assertEqual(history.update(), 2)
+        self.assertEqual([run for run, _ in history.pending_runs()], ['20240102-0000'])
+        # A run older than the watermark is not looked at
+        self.add_output('20231231-0000', 0, {'xrootd.x86_64': '1:4.11.0-1.el7'})
+        # The unfinished run is looked at again for its new outputs
+        self.add_output('20240102-0000', 1, {'xrootd.x86_64': '1:5.0.3-1.el7'}, complete=True)
+        self.assertEqual(history.update(), 1)
+        self.assertEqual(history.pending_runs(), [])
+        self.assertEqual([row[2:] for row in history.query('xrootd')],
+                         [('20240101-0000', 0), ('20240102-0000', 0), ('20240102-0000', 1)])
+
+    def test_output_without_inventory(self):
+        # An output of a run that predates the inventories, or of a run in progress that is still being extracted
+        jobs_dir = os.path.join(self.runs_dir, 'run-20240103-0000', 'jobs')
+        os.makedirs(os.path.join(jobs_dir, 'output-000', 'output'))
+        shutil.copy('install.log', os.path.join(jobs_dir, 'output-000', 'output', 'osg-test-20240103.log'))
+        history = frh.RpmHistory(self.index, self.runs_dir)
+        self.assertEqual(history.update(), 0)
+        self.assertEqual(history.query('condor'), [])
+        # Once the run is complete, the inventory is made from the logs
+        open(os.path.join(jobs_dir, 'packages.html'), 'w').close()
+        self.assertEqual(history.update(), 1)
+        self.assertEqual(history.query('condor'), [('condor', '7.8.8-7.osg31.el6', '20240103-0000', 0)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import importlib.machinery
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+LOADER = importlib.machinery.SourceFileLoader('generate_dag', os.path.join(PATHNAME, 'generate-dag'))
+gd = importlib.util.module_from_spec(importlib.util.spec_from_loader(LOADER.name, LOADER))
+sys.modules[LOADER.name] = gd
+LOADER.exec_module(gd)
+
+import runmanifest
+import vmu
+
+def package_set(label, *packages):
+    return vmu.PackageSet(label, list(packages), selinux=False)
+
+class TestGenerateDag(unittest.TestCase):
+
+    def setUp(self):
+        condor = package_set('HTCondor', 'condor')
+        voms = package_set('VOMS', 'voms-server')
+        self.run_params = [{'platforms': ['rocky_9.x86_64', 'alma_9.x86_64'],
+                            'sources': ['opensciencegrid:master; 24; osg'],
+                            'package_sets': [condor, voms]},
+                           # the same combos again, in another parameter file, and one new one
+                           {'platforms': ['alma_9.x86_64'],
+                            'sources': ['opensciencegrid:master; 24; osg', 'opensciencegrid:master; 24; osg-testing'],
+                            'package_sets': [package_set('HTCondor', 'condor')]}]
+
+    def test_plan_combos(self):
+        combos = [(platform, sources, package_set.label)
+                  for platform, sources, package_set in gd.plan_combos(self.run_params)]
+        self.assertEqual(combos, [('rocky_9.x86_64', 'opensciencegrid:master; 24; osg', 'HTCondor'),
+                                  ('rocky_9.x86_64', 'opensciencegrid:master; 24; osg', 'VOMS'),
+                                  ('alma_9.x86_64', 'opensciencegrid:master; 24; osg', 'HTCondor'),
+                                  ('alma_9.x86_64', 'opensciencegrid:master; 24; osg', 'VOMS'),
+                                  ('alma_9.x86_64', 'opensciencegrid:master; 24; osg-testing', 'HTCondor')])
+
+    def test_missing_images(self):
+        image_dir = tempfile.mkdtemp()
+        old_path = gd.BASE_IMAGE_PATH
+        try:
+            gd.BASE_IMAGE_PATH = image_dir
+            open(os.path.join(image_dir, 'rocky_9.x86_64_htcondor.dsk'), 'w').close()
+            self.assertEqual(gd.missing_images(['rocky_9.x86_64', 'alma_9.x86_64', 'alma_9.x86_64']),
+                             [('alma_9.x86_64', os.path.join(image_dir, 'alma_9.x86_64_htcondor.dsk'))])
+        finally:
+            gd.BASE_IMAGE_PATH = old_path
+            shutil.rmtree(image_dir)
+
+    def test_image_vars(self):
+        fragment = gd.generate_dag_fragment('003', self.run_params[1]['platforms'] + self.run_params[1]['sources'][:1] +
+                                            self.run_params[1]['package_sets'],
+                                            '/staging/osg-images/layers/alma_9.x86_64_osg24.qcow2')
+        self.assertIn('VARS TestRun003 image_files="file:///staging/osg-images/alma_9.x86_64_htcondor.dsk,'
+                      'file:///staging/osg-images/layers/alma_9.x86_64_osg24.qcow2" '
+                      'vm_image="alma_9.x86_64_osg24.qcow2" vm_image_format="qcow2"', fragment)
+        self.assertEqual(gd.image_vars('rocky_9.x86_64'),
+                         {'image_files': 'file:///staging/osg-images/rocky_9.x86_64_htcondor.dsk',
+                          'vm_image': 'rocky_9.x86_64_htcondor.dsk', 'vm_image_format': 'raw'})
+
+    def test_manifest(self):
+        jobs_dir = tempfile.mkdtemp()
+        try:
+            manifest = runmanifest.RunManifest.from_flat_params(vmu.flatten_run_params(self.run_params))
+            for process, combo in enumerate(gd.plan_combos(self.run_params)):
+                manifest.add_job('%03d' % process, combo)
+            self.assertEqual(runmanifest.load(jobs_dir), None)
+            manifest.write(jobs_dir)
+            loaded = runmanifest.load(jobs_dir)
+            self.assertEqual(loaded.jobs, manifest.jobs)
+            self.assertEqual(loaded.jobs['004'], {'platform': 'alma_9.x86_64',
+                                                  'sources': 'opensciencegrid:master; 24; osg-testing',
+                                                  'packages': ['condor'], 'package_set': 'HTCondor',
+                                                  'selinux': False})
+            self.assertEqual([x['label'] for x in loaded.params['package_sets']], ['HTCondor', 'VOMS'])
+        finally:
+            shutil.rmtree(jobs_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import gitcache
+
+def git(*args):
+    subprocess.check_call(('git',) + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+class TestGitCache(unittest.TestCase):
+
+    def setUp(self):
+        # A work tree pushing to a bare repository, standing in for github
+        self.tmp_dir = tempfile.mkdtemp()
+        self.upstream = os.path.join(self.tmp_dir, 'osg-test.git')
+        self.work_tree = os.path.join(self.tmp_dir, 'work')
+        git('init', '--quiet', '--bare', self.upstream)
+        git('init', '--quiet', self.work_tree)
+        self.commit('osg-test 1')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def commit(self, contents):
+        with open(os.path.join(self.work_tree, 'README'), 'w') as readme:
+            readme.write(contents)
+        git('-C', self.work_tree, 'add', 'README')
+        git('-C', self.work_tree, '-c', 'user.name=VMU', '-c', 'user.email=vmu@localhost',
+            'commit', '--quiet', '-m', contents)
+        git('-C', self.work_tree, 'push', '--quiet', self.upstream, 'HEAD:refs/heads/master')
+
+    def readme(self, tarball):
+        with tarfile.open(tarball) as archive:
+            return archive.extractfile('osg-test-git/README').read().decode()
+
+    def test_archive(self):
+        mirror = gitcache.GitMirror(self.upstream, self.cache_dir, 'run-1')
+        tarball = mirror.archive('master', 'osg-test-git')
+        self.assertEqual(self.readme(tarball), 'osg-test 1')
+        # the same commit makes the same tarball, in another job of the run
+        self.assertEqual(gitcache.GitMirror(self.upstream, self.cache_dir, 'run-1').archive('master', 'osg-test-git'),
+                         tarball)
+        self.assertRaises(gitcache.GitError, mirror.archive, 'no-such-branch', 'osg-test-git')
+
+    def test_fetch_once_per_run(self):
+        tarball = gitcache.GitMirror(self.upstream, self.cache_dir, 'run-1').archive('master', 'osg-test-git')
+        self.commit('osg-test 2')
+        # not fetched again by the same run
+        self.assertEqual(gitcache.GitMirror(self.upstream, self.cache_dir, 'run-1').archive('master', 'osg-test-git'),
+                         tarball)
+        new_tarball = gitcache.GitMirror(self.upstream, self.cache_dir, 'run-2').archive('master', 'osg-test-git')
+        self.assertNotEqual(new_tarball, tarball)
+        self.assertEqual(self.readme(new_tarball), 'osg-test 2')
+        self.assertEqual(self.readme(tarball), 'osg-test 1')
+
+    def test_missing_repository(self):
+        mirror = gitcache.GitMirror(os.path.join(self.tmp_dir, 'missing.git'), self.cache_dir, 'run-1')
+        self.assertRaises(gitcache.GitError, mirror.archive, 'master', 'osg-test-git')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import imagecache
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.cache = imagecache.ImageCache(os.path.join(self.work_dir, 'cache'), max_size=20)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def _file(self, name, contents):
+        path = os.path.join(self.work_dir, name)
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+
+    def test_image_key(self):
+        patch = self._file('osg-test.patch', 'diff')
+        rpm = self._file('osg-test-3.0.0.rpm', 'rpm')
+        key = imagecache.image_key('packages = osg-tested-internal\n', [(patch, 'input/osg-test.patch'),
+                                                                          (rpm, 'input/osg-test-3.0.0.rpm')])
+        self.assertEqual(key, imagecache.image_key('packages = osg-tested-internal\n',
+                                                   [(rpm, 'input/osg-test-3.0.0.rpm'),
+                                                    (patch, 'input/osg-test.patch')]))
+        self.assertNotEqual(key, imagecache.image_key('packages = osg-ce-condor\n',
+                                                      [(patch, 'input/osg-test.patch'),
+                                                       (rpm, 'input/osg-test-3.0.0.rpm')]))
+        self._file('osg-test.patch', 'another diff')
+        self.assertNotEqual(key, imagecache.image_key('packages = osg-tested-internal\n',
+                                                      [(patch, 'input/osg-test.patch'),
+                                                       (rpm, 'input/osg-test-3.0.0.rpm')]))
+
+    def test_fetch_and_store(self):
+        image = self._file('input-image-000.qcow2', 'image')
+        copy = os.path.join(self.work_dir, 'input-image-001.qcow2')
+        self.assertFalse(self.cache.fetch('abc', copy))
+        self.assertTrue(self.cache.store('abc', image))
+        self.assertTrue(self.cache.fetch('abc', copy))
+        with open(copy) as f:
+            self.assertEqual(f.read(), 'image')
+        self.assertEqual(os.stat(copy).st_ino, os.stat(image).st_ino)
+
+    def test_eviction(self):
+        self.cache.max_size = 100
+        for age, key in enumerate(('new', 'used', 'old')):
+            self.cache.store(key, self._file(key, '0123456789'))
+            then = time.time() - 100 * (age + 1)
+            os.utime(os.path.join(self.cache.cache_dir, key + '.qcow2'), (then, then))
+        # Using 'used' makes it the most recently used image
+        self.assertTrue(self.cache.fetch('used', os.path.join(self.work_dir, 'used-copy')))
+        self.cache.max_size = 20
+        self.cache.evict()
+        self.assertEqual(sorted(os.listdir(self.cache.cache_dir)), ['.lock', 'new.qcow2', 'used.qcow2'])
+        self.cache.max_size = 10
+        self.cache.evict()
+        self.assertEqual(sorted(os.listdir(self.cache.cache_dir)), ['.lock', 'used.qcow2'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import imagelayers
+
+# Stand-ins for the tools that make a layer; virt-customize leaves what layer-bootstrap would in --copy-out
+QEMU_IMG = '''#!/bin/sh
+eval last=\\${$#}
+echo "overlay of $8" > "$last"
+'''
+VIRT_CUSTOMIZE = '''#!/bin/sh
+while [ $# -gt 0 ]; do
+    if [ "$1" = --copy-out ]; then
+        dir=${2#*:}/osg-test-layer
+        mkdir -p $dir
+        printf 'epel-release\\ndistro-sync\\nosg-release\\n' > $dir/steps
+        printf 'series=24\\nos_release=AlmaLinux release 9.4 (Seafoam Ocelot)\\n' > $dir/info
+        printf 'python3-3.9.18-3.el9.x86_64\\nbash-5.1.8-9.el9.x86_64\\n' > $dir/rpm-qa.log
+    fi
+    shift
+done
+'''
+
+
+class TestImageLayers(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.image_dir = os.path.join(self.work_dir, 'images')
+        os.mkdir(self.image_dir)
+        self.base_path = self._file(self.image_dir, 'alma_9.x86_64_htcondor.dsk', 'alma 9')
+        self.bootstrap = self._file(self.work_dir, 'layer-bootstrap', 'echo bootstrap\n')
+        bin_dir = os.path.join(self.work_dir, 'bin')
+        os.mkdir(bin_dir)
+        for name, script in (('qemu-img', QEMU_IMG), ('virt-customize', VIRT_CUSTOMIZE)):
+            os.chmod(self._file(bin_dir, name, script), 0o755)
+        self.old_path = os.environ['PATH']
+        os.environ['PATH'] = bin_dir + os.pathsep + self.old_path
+
+    def tearDown(self):
+        os.environ['PATH'] = self.old_path
+        shutil.rmtree(self.work_dir)
+
+    def _file(self, directory, name, contents):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            f.write(contents)
+        return path
+
+    def test_layer_pairs(self):
+        self.assertEqual(imagelayers.release_series('opensciencegrid:master; 23; osg-upcoming > 24/osg'), '23')
+        self.assertEqual(imagelayers.release_series('3.6; osg'), '3.6')
+        self.assertEqual(imagelayers.layer_pairs([('alma_9.x86_64', 'opensciencegrid:master; 24; osg'),
+                                                  ('alma_9.x86_64', 'opensciencegrid:master; 24; osg-testing'),
+                                                  ('alma_8.x86_64', 'opensciencegrid:master; 23; osg > 24/osg')]),
+                         [('alma_8.x86_64', '23'), ('alma_9.x86_64', '24')])
+
+    def test_make_layer(self):
+        record = imagelayers.make_layer(self.image_dir, 'alma_9.x86_64', '24', self.bootstrap)
+        layer_path = os.path.join(self.image_dir, 'layers', 'alma_9.x86_64_osg24.qcow2')
+        self.assertEqual(record['steps'], ['epel-release', 'distro-sync', 'osg-release'])
+        self.assertEqual(record['packages'], ['bash-5.1.8-9.el9.x86_64', 'python3-3.9.18-3.el9.x86_64'])
+        self.assertEqual(imagelayers.read_record(layer_path), record)
+        # Backed by the VM image under the same name, as in the directory of a job
+        with open(layer_path) as layer:
+            self.assertEqual(layer.read(), 'overlay of alma_9.x86_64_htcondor.dsk\n')
+        with open(os.path.join(self.image_dir, 'layers', 'alma_9.x86_64_htcondor.dsk')) as base:
+            self.assertEqual(base.read(), 'alma 9')
+
+        digest = imagelayers.bootstrap_digest(self.bootstrap)
+        self.assertEqual(imagelayers.find_layer(self.image_dir, 'alma_9.x86_64', '24', digest), layer_path)
+        self.assertEqual(imagelayers.find_layer(self.image_dir, 'alma_9.x86_64', '23', digest), None)
+        self.assertEqual(imagelayers.make_layer(self.image_dir, 'alma_9.x86_64', '24', self.bootstrap), record)
+
+    def test_stale_layer(self):
+        imagelayers.make_layer(self.image_dir, 'alma_9.x86_64', '24', self.bootstrap)
+        digest = imagelayers.bootstrap_digest(self.bootstrap)
+        self.assertEqual(imagelayers.find_layer(self.image_dir, 'alma_9.x86_64', '24', 'other digest'), None)
+        self.assertEqual(imagelayers.find_layer(self.image_dir, 'alma_9.x86_64', '24', digest, max_age=-1), None)
+        # A new VM image for the platform
+        self._file(self.image_dir, 'alma_9.x86_64_htcondor.dsk', 'alma 9.5')
+        self.assertEqual(imagelayers.find_layer(self.image_dir, 'alma_9.x86_64', '24', digest), None)
+
+    def test_failed_layer(self):
+        self._file(os.path.join(self.work_dir, 'bin'), 'virt-customize', '#!/bin/sh\necho no network\nexit 1\n')
+        with self.assertRaises(imagelayers.LayerError) as context:
+            imagelayers.make_layer(self.image_dir, 'alma_9.x86_64', '24', self.bootstrap)
+        self.assertIn('no network', str(context.exception))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.image_dir, 'layers'))),
+                         ['alma_9.x86_64_htcondor.dsk', 'alma_9.x86_64_osg24.qcow2.lock'])
+
+    def test_prune(self):
+        imagelayers.make_layer(self.image_dir, 'alma_9.x86_64', '24', self.bootstrap)
+        self.assertEqual(imagelayers.prune(self.image_dir), [])
+        layer_path = os.path.join(self.image_dir, 'layers', 'alma_9.x86_64_osg24.qcow2')
+        # A run that generate-dag gave the layer to just before it got too old to use may still be running on it
+        self.assertEqual(imagelayers.prune(self.image_dir, now=time.time() + imagelayers.MAX_AGE + 60), [])
+        self.assertEqual(imagelayers.prune(self.image_dir, now=time.time() + imagelayers.PRUNE_AGE + 60), [layer_path])
+        self.assertEqual(os.listdir(os.path.join(self.image_dir, 'layers')), ['alma_9.x86_64_htcondor.dsk'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import ioimage
+
+def debugfs(raw_filename, request):
+    return subprocess.check_output(['debugfs', '-R', request, raw_filename], stderr=subprocess.DEVNULL,
+                                   encoding='latin-1')
+
+class TestIOImage(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.work_dir, 'image')
+        os.makedirs(os.path.join(self.source_dir, 'input'))
+        os.mkdir(os.path.join(self.source_dir, 'output'))
+        with open(os.path.join(self.source_dir, 'input', 'osg-test.conf'), 'w') as conf:
+            conf.write('[Config]\npackages = osg-tested-internal\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    @unittest.skipUnless(shutil.which('mke2fs') and shutil.which('debugfs'), 'needs e2fsprogs')
+    def test_raw_filesystem(self):
+        raw_filename = os.path.join(self.work_dir, 'image.raw')
+        return_code, _, stderr = ioimage.make_raw_filesystem(self.source_dir, raw_filename, 8)
+        self.assertEqual(return_code, 0, stderr)
+        self.assertEqual(os.path.getsize(raw_filename), 8 * 1024 * 1024)
+        self.assertEqual(debugfs(raw_filename, 'cat /input/osg-test.conf'),
+                         '[Config]\npackages = osg-tested-internal\n')
+        self.assertTrue('output' in debugfs(raw_filename, 'ls /').split())
+        self.assertTrue('Block size:               1024' in debugfs(raw_filename, 'stats'))
+
+    def test_fallback(self):
+        image_filename = os.path.join(self.work_dir, 'image.qcow2')
+        with mock.patch('ioimage.fast_path_available', return_value=True), \
+             mock.patch('ioimage.make_image_fast', return_value=(1, '', 'mke2fs: invalid option -- d')), \
+             mock.patch('ioimage.make_image_guestfs', return_value=(0, 'ok', '')) as guestfs:
+            self.assertEqual(ioimage.make_image(self.source_dir, image_filename), (0, 'ok', ''))
+            guestfs.assert_called_once_with(self.source_dir, image_filename, ioimage.IMAGE_SIZE_MB)
+
+if __name__ == '__main__':
+    unittest.main()
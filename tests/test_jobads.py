@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import jobads
+
+# Stand-in for condor_history that logs its arguments and scans HISTORY, most recently completed job first, the way
+# condor_history does with -match and -completedsince
+CONDOR_HISTORY = '''#!{python}
+import json, os, re, sys
+with open(os.environ['CONDOR_HISTORY_LOG'], 'a') as log:
+    log.write(json.dumps(sys.argv[1:]) + '\\n')
+def option(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+wanted = set((int(cluster), int(proc)) for cluster, proc in
+             re.findall(r'ClusterId == (\\d+) && ProcId == (\\d+)', sys.argv[sys.argv.index('-constraint') + 1]))
+matches, completed_since = option('-match', None), option('-completedsince', 0)
+ads = []
+for cluster, completed in sorted(json.loads(os.environ['CONDOR_HISTORY']), key=lambda job: -job[1]):
+    if completed < completed_since or len(ads) == matches:
+        break
+    if (cluster, 0) in wanted:
+        ads.append({{'ClusterId': cluster, 'ProcId': 0, 'CompletionDate': completed,
+                    'LastRemoteHost': 'slot1@localhost'}})
+print(json.dumps(ads))
+'''
+# (ClusterId, CompletionDate) of the jobs in the history: the jobs of other runs, then those of the run, which do not
+# complete in the order they were submitted
+HISTORY = [(900, 1000), (1030, 1100), (1025, 43260), (1040, 43200)]
+
+
+class TestJobAds(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        bin_dir = os.path.join(self.work_dir, 'bin')
+        os.mkdir(bin_dir)
+        script = os.path.join(bin_dir, 'condor_history')
+        with open(script, 'w') as script_file:
+            script_file.write(CONDOR_HISTORY.format(python=sys.executable))
+        os.chmod(script, 0o755)
+        self.log_path = os.path.join(self.work_dir, 'condor_history.log')
+        self.old_path = os.environ['PATH']
+        os.environ['PATH'] = bin_dir + os.pathsep + self.old_path
+        os.environ['CONDOR_HISTORY_LOG'] = self.log_path
+        os.environ['CONDOR_HISTORY'] = json.dumps(HISTORY)
+
+    def tearDown(self):
+        os.environ['PATH'] = self.old_path
+        del os.environ['CONDOR_HISTORY_LOG']
+        del os.environ['CONDOR_HISTORY']
+        shutil.rmtree(self.work_dir)
+
+    def test_history_command(self):
+        command = jobads.history_command([(1205, 0), (1187, 0), (1190, 2)], 43000.5)
+        self.assertEqual(command[:command.index('-constraint')],
+                         ['condor_history', '-json', '-attributes', ','.join(jobads.ATTRIBUTES), '-match', '3',
+                          '-completedsince', '43000'])
+        self.assertEqual(command[command.index('-constraint') + 1],
+                         '(ClusterId == 1205 && ProcId == 0) || (ClusterId == 1187 && ProcId == 0) || '
+                         '(ClusterId == 1190 && ProcId == 2)')
+        self.assertNotIn('-completedsince', jobads.history_command([(1205, 0)]))
+
+    def test_completion_order(self):
+        # 1025 completed after 1040, which must not stop the scan before 1040
+        for job_ids in (['1040.0', '1025.0'], ['1025.0', '1040.0'], ['1040.0']):
+            ads = jobads.query_history(job_ids, 43000)
+            self.assertEqual(sorted(ads), sorted(job_ids))
+        # The jobs of other runs completed before the run started
+        self.assertEqual(jobads.query_history(['1030.0'], 43000), {})
+        self.assertEqual(sorted(jobads.query_history(['1030.0', '1040.0'])), ['1030.0', '1040.0'])
+
+    def test_query_history(self):
+        old_batch = jobads.QUERY_BATCH
+        jobads.QUERY_BATCH = 2
+        try:
+            ads = jobads.query_history(['1025.0', '1030.0', '1040.0', 'bogus'])
+        finally:
+            jobads.QUERY_BATCH = old_batch
+        self.assertEqual(sorted(ads), ['1025.0', '1030.0', '1040.0'])
+        with open(self.log_path) as log:
+            queries = [json.loads(line) for line in log]
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(queries[1][queries[1].index('-match') + 1], '1')
+
+    def test_run_start(self):
+        self.assertEqual(jobads.run_start(self.work_dir), None)
+        dag_path = os.path.join(self.work_dir, jobads.TEST_RUN_DAG)
+        with open(dag_path, 'w'):
+            pass
+        os.utime(dag_path, (43000, 43000))
+        self.assertEqual(jobads.run_start(self.work_dir), 43000)
+
+if __name__ == '__main__':
+    unittest.main()
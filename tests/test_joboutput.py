@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import joboutput
+
+# Laid out like the tar stream that guestfs tar_out makes of a result image
+IMAGE_FILES = {'./run-job.log': b'run-job\n',
+               './input/osg-test.conf': b'[Config]\n',
+               './input/osg-test-git.tar.gz': b'source',
+               './output/osg-test-20240101.log': b'osg-test\n',
+               './output/rpm-qa-start.log': b'rpm-a\n',
+               './output/system-files/log.tar.gz': b'system logs',
+               '../escape': b'outside'}
+
+class TestJobOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        with tarfile.open(joboutput.archive_path(self.output_dir), 'w') as archive:
+            for directory in ('.', './input', './output', './output/system-files'):
+                info = tarfile.TarInfo(directory)
+                info.type = tarfile.DIRTYPE
+                archive.addfile(info)
+            for name, contents in sorted(IMAGE_FILES.items()):
+                info = tarfile.TarInfo(name)
+                info.size = len(contents)
+                info.mtime = 1700000000
+                archive.addfile(info, io.BytesIO(contents))
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def unpack(self, select=joboutput.is_eager):
+        with tarfile.open(joboutput.archive_path(self.output_dir), 'r:') as archive:
+            return joboutput.unpack(archive, self.output_dir, select)
+
+    def test_member_path(self):
+        self.assertEqual(joboutput.member_path('./output/osg-test.log'), 'output/osg-test.log')
+        self.assertEqual(joboutput.member_path('/run-job.log'), 'run-job.log')
+        self.assertEqual(joboutput.member_path('./'), None)
+        self.assertEqual(joboutput.member_path('../escape'), None)
+        self.assertEqual(joboutput.member_path('output/../../escape'), None)
+
+    def test_unpack_eager_files(self):
+        self.assertEqual(sorted(self.unpack()), ['input/osg-test.conf', 'output/osg-test-20240101.log',
+                                                 'output/rpm-qa-start.log', 'run-job.log'])
+        with open(os.path.join(self.output_dir, 'run-job.log'), 'rb') as log:
+            self.assertEqual(log.read(), IMAGE_FILES['./run-job.log'])
+        self.assertEqual(os.path.getmtime(os.path.join(self.output_dir, 'run-job.log')), 1700000000)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'output', 'system-files')))
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(self.output_dir), 'escape')))
+
+    def test_unpack_all(self):
+        self.assertEqual(len(self.unpack(lambda path: True)), len(IMAGE_FILES) - 1)
+
+    def test_fetch(self):
+        self.unpack()
+        path = joboutput.fetch(self.output_dir, 'output/system-files/log.tar.gz')
+        self.assertEqual(path, os.path.join(self.output_dir, 'output', 'system-files', 'log.tar.gz'))
+        with open(path, 'rb') as log:
+            self.assertEqual(log.read(), b'system logs')
+        # Already unpacked files are not read from the archive again
+        os.unlink(joboutput.archive_path(self.output_dir))
+        self.assertEqual(joboutput.fetch(self.output_dir, './output/system-files/log.tar.gz'), path)
+
+    def test_fetch_missing(self):
+        self.assertRaises(IOError, joboutput.fetch, self.output_dir, 'output/nothing.log')
+        self.assertRaises(IOError, joboutput.fetch, self.output_dir, '../escape')
+
+    def test_listing(self):
+        self.unpack()
+        with open(os.path.join(self.output_dir, 'io_free_size'), 'w') as free_size:
+            free_size.write('60.0M')
+        self.assertEqual(joboutput.listing(self.output_dir),
+                         sorted(['io_free_size'] + [name[2:] for name in IMAGE_FILES if name.startswith('./')]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import io
+import os
+import sys
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import jobrecords
+
+LEGACY_ANALYSES = """-
+  job_id: '1234.0'
+  job_serial: '007'
+  selinux: True
+  tests_messages:
+  tests_total: 293
+-
+  job_id: '1234.1'
+  job_serial: '008'
+  run_status: 1
+  run_summary: 'Could not install osg-test'
+"""
+
+class TestJobRecords(unittest.TestCase):
+
+    data = {'job_serial': '007', 'job_id': '1234.0', 'selinux': 'True', 'tests_total': 293, 'run_time': 4932.752,
+            'run_details': "yum -y install osg-test\n==> FAILED with exit status 1, 'retrying'",
+            'tests_messages': ['test_50_voms|test_06_rfc_voms_proxy_init|TestVOMS|FAIL|-']}
+
+    def test_round_trip(self):
+        stream = io.StringIO()
+        jobrecords.write_record(self.data, stream)
+        jobrecords.write_record(dict(self.data, job_serial='008'), stream)
+        self.assertEqual(stream.getvalue().count('\n'), 2)
+
+        stream.seek(0)
+        records = list(jobrecords.iter_records(stream))
+        self.assertEqual([record['job_serial'] for record in records], ['007', '008'])
+        self.assertEqual(records[0]['schema'], jobrecords.SCHEMA_VERSION)
+        self.assertEqual(records[0]['selinux'], True)
+        self.assertEqual(records[0]['run_details'], self.data['run_details'])
+        self.assertEqual(records[0]['tests_messages'], self.data['tests_messages'])
+        self.assertEqual(records[0]['run_time'], 4932.752)
+
+    def test_legacy_yaml(self):
+        records = list(jobrecords.iter_records(io.StringIO(LEGACY_ANALYSES)))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['job_serial'], '007')
+        self.assertEqual(records[0]['selinux'], True)
+        self.assertEqual(records[0]['tests_messages'], None)
+        self.assertEqual(records[1]['run_status'], 1)
+
+    def test_empty(self):
+        self.assertEqual(list(jobrecords.iter_records(io.StringIO(''))), [])
+
+    def test_newer_schema(self):
+        stream = io.StringIO('{"schema": %d, "job_serial": "007"}\n' % (jobrecords.SCHEMA_VERSION + 1))
+        self.assertRaises(jobrecords.RecordError, list, jobrecords.iter_records(stream))
+
+if __name__ == '__main__':
+    unittest.main()
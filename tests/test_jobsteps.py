@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import sys
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import jobsteps
+
+STEP_LOG = '''{"step": "date", "start": 1700000000.000, "end": 1700000000.010, "exit_status": 0, "retries": 0, "backoff": 0}
+{"step": "yum -y distro-sync", "start": 1700000001.000, "end": 1700000361.500, "exit_status": 0, "retries": 2, "backoff": 3}
+{"step": "hostname", "start": 1700000362.000, "end": 1700000362.100, "exit_status": 0, "retries": 0, "backoff": 0}
+{"step": "rpm --upgrade https://repo.opensciencegrid.org/osg/3.6/osg-3.6-el9-release-latest.rpm", "start": 1700000363.000, "end": 1700000364.000, "exit_status": 1, "retries": 1, "backoff": 1}
+{"step": "hostname", "start": 1700000365.000, "end": 1700000365.100, "exit_status": 0, "retries": 0, "backoff": 0}
+{"step": "osg-test", "start": 1700000366.000, "end": 1700003966.000, "exit_status": 0, "retries": 0, "backoff": 0}
+{"step": "osg-te
+'''
+
+
+class TestJobSteps(unittest.TestCase):
+
+    def test_read_steps(self):
+        steps = jobsteps.read_steps(STEP_LOG.splitlines(True))
+        self.assertEqual([step['step'] for step in steps][-2:], ['hostname', 'osg-test'])
+        self.assertEqual(len(steps), 6)
+
+    def test_summarize(self):
+        summary = jobsteps.summarize(jobsteps.read_steps(STEP_LOG.splitlines(True)))
+        self.assertEqual(summary['guest_steps'], {
+            'yum -y distro-sync': [360.5, 2, 3],
+            'rpm --upgrade https://repo.opensciencegrid.org/osg/3.6/osg-3.6-el9-release-latest.rpm': [1.0, 1, 1],
+            'osg-test': [3600.0, 0, 0]})
+        self.assertEqual(summary['guest_step_time'], 3961.71)
+        self.assertEqual((summary['guest_retries'], summary['guest_backoff_time']), (3, 4))
+
+    def test_tally(self):
+        tallies = {}
+        jobsteps.tally(tallies, 'Alma 9 (x86_64)', {'yum -y distro-sync': [300.0, 0, 0], 'osg-test': [3600.0, 0, 0]})
+        jobsteps.tally(tallies, 'Alma 9 (x86_64)', {'yum -y distro-sync': [500.0, 3, 7]})
+        os_tally = tallies['Alma 9 (x86_64)']
+        self.assertEqual(jobsteps.slowest_steps(os_tally, 1), [('osg-test', 1, 3600.0, 0, 0)])
+        self.assertEqual(jobsteps.slowest_steps(os_tally)[1], ('yum -y distro-sync', 2, 800.0, 3, 7))
+        self.assertEqual(jobsteps.retry_totals(os_tally), (3, 7))
+
+        jobsteps.tally(tallies, 'Alma 9 (x86_64)', {'yum -y distro-sync': [500.0, 3, 7]}, -1)
+        self.assertEqual(jobsteps.retry_totals(tallies['Alma 9 (x86_64)']), (0, 0))
+        jobsteps.tally(tallies, 'Alma 9 (x86_64)', {'yum -y distro-sync': [300.0, 0, 0], 'osg-test': [3600.0, 0, 0]}, -1)
+        self.assertEqual(tallies, {})
+
+if __name__ == '__main__':
+    unittest.main()
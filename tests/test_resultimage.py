@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import joboutput
+import resultimage
+
+IMAGE_FILES = {'/run-job.log': b'run-job\n',
+               '/input/osg-test.conf': b'[Config]\n',
+               '/output/osg-test-20240101.log': b'osg-test \xe2\x9c\x93\n'}
+
+class FakeGuestFS(object):
+    """Just enough of guestfs.GuestFS to serve IMAGE_FILES"""
+    launched = 0
+    closed = 0
+
+    def __init__(self, python_return_dict=False):
+        pass
+
+    def add_drive_opts(self, filename, readonly=0):
+        pass
+
+    def launch(self):
+        FakeGuestFS.launched += 1
+
+    def list_filesystems(self):
+        return {'/dev/sda': 'ext2'}
+
+    def mount_ro(self, device, mountpoint):
+        pass
+
+    def is_file(self, path):
+        return path in IMAGE_FILES
+
+    def read_file(self, path):
+        if path not in IMAGE_FILES:
+            raise RuntimeError('open: %s: No such file or directory' % path)
+        return IMAGE_FILES[path]
+
+    def download(self, path, local_path):
+        with open(local_path, 'wb') as local_file:
+            local_file.write(self.read_file(path))
+
+    def glob_expand(self, pattern):
+        import fnmatch
+        return [path for path in IMAGE_FILES if fnmatch.fnmatchcase(path, pattern)]
+
+    def statvfs(self, path):
+        return {'bavail': 61440, 'bsize': 1024}
+
+    def shutdown(self):
+        pass
+
+    def close(self):
+        FakeGuestFS.closed += 1
+
+class TestResultImage(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs_dir = tempfile.mkdtemp()
+        for serial in ('001', '002', '003'):
+            with open(os.path.join(self.jobs_dir, 'result-image-%s.qcow2' % serial), 'wb') as image:
+                image.write(b'qcow2')
+        FakeGuestFS.launched = FakeGuestFS.closed = 0
+        self.guestfs = mock.patch.dict(sys.modules, {'guestfs': mock.Mock(GuestFS=FakeGuestFS)})
+        self.guestfs.start()
+        self.images = resultimage.ResultImages(max_open=2)
+
+    def tearDown(self):
+        self.images.close()
+        self.guestfs.stop()
+        shutil.rmtree(self.jobs_dir)
+
+    def job_files(self, serial):
+        return resultimage.JobFiles.for_serial(self.jobs_dir, serial, self.images)
+
+    def test_read_from_image(self):
+        job_files = self.job_files('001')
+        self.assertEqual(job_files.read('run-job.log'), 'run-job\n')
+        self.assertEqual(job_files.read('output/osg-test-20240101.log'), 'osg-test ✓\n')
+        self.assertEqual(job_files.glob('output/osg-test-*.log'), ['output/osg-test-20240101.log'])
+        self.assertEqual(job_files.io_free_size(), '60.0M')
+        self.assertRaises(IOError, job_files.read, 'output/missing.log')
+        self.assertEqual(FakeGuestFS.launched, 1)
+
+    def test_local_files_first(self):
+        job_files = self.job_files('001')
+        os.makedirs(os.path.join(job_files.output_dir, 'output'))
+        with open(os.path.join(job_files.output_dir, 'run-job.log'), 'w') as log:
+            log.write('extracted\n')
+        with open(os.path.join(job_files.output_dir, 'io_free_size'), 'w') as free_size:
+            free_size.write('12.5M')
+        self.assertEqual(job_files.read('run-job.log'), 'extracted\n')
+        self.assertEqual(job_files.io_free_size(), '12.5M')
+        self.assertEqual(FakeGuestFS.launched, 0)
+
+    def test_local_path_downloads(self):
+        job_files = self.job_files('002')
+        path = job_files.local_path('input/osg-test.conf')
+        self.assertEqual(path, os.path.join(self.jobs_dir, 'output-002', 'input', 'osg-test.conf'))
+        with open(path) as conf:
+            self.assertEqual(conf.read(), '[Config]\n')
+        self.assertEqual(job_files.local_path('input/osg-test.conf'), path)
+        self.assertEqual(FakeGuestFS.launched, 1)
+
+    def test_no_image(self):
+        job_files = self.job_files('004')
+        self.assertRaises(IOError, job_files.read, 'run-job.log')
+        self.assertEqual(job_files.glob('output/*.log'), [])
+
+    def test_extracted_output(self):
+        job_files = self.job_files('003')
+        os.makedirs(job_files.output_dir)
+        with tarfile.open(joboutput.archive_path(job_files.output_dir), 'w'):
+            pass
+        with mock.patch.object(joboutput, 'fetch', wraps=joboutput.fetch) as fetch:
+            # A file that is not in the extracted output, such as the step log of an older job, is not in the
+            # result image either
+            self.assertRaises(IOError, job_files.open, 'output/run-job-steps.jsonl')
+            self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(job_files.glob('output/*.log'), [])
+        self.assertEqual(FakeGuestFS.launched, 0)
+
+    def test_lru(self):
+        for serial in ('001', '002', '001', '003'):
+            self.job_files(serial).read('run-job.log')
+        # 002 was the least recently used when 003 was opened
+        self.assertEqual(FakeGuestFS.launched, 3)
+        self.assertEqual(FakeGuestFS.closed, 1)
+        self.job_files('001').read('run-job.log')
+        self.assertEqual(FakeGuestFS.launched, 3)
+        self.job_files('002').read('run-job.log')
+        self.assertEqual(FakeGuestFS.launched, 4)
+        self.images.close()
+        self.assertEqual(FakeGuestFS.closed, 4)
+
+    def test_for_path(self):
+        for path in ('output-007', 'output-007/', 'result-image-007.qcow2'):
+            job_files = resultimage.JobFiles.for_path(os.path.join(self.jobs_dir, path))
+            self.assertEqual(job_files.output_dir, os.path.join(self.jobs_dir, 'output-007'))
+            self.assertEqual(job_files.image_filename, os.path.join(self.jobs_dir, 'result-image-007.qcow2'))
+        self.assertRaises(ValueError, resultimage.JobFiles.for_path, 'osg-test.log')
+
+if __name__ == '__main__':
+    unittest.main()
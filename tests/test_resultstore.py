@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import resultstore
+import runmanifest
+
+PACKAGE_MAPPING = {'osg-tested-internal': 'All', 'osg-ce-condor': 'HTCondor-CE'}
+
+def make_run(serial, packages='osg-tested-internal', status='pass', died=False):
+    run = {'job_serial': serial, 'os_release': 'AlmaLinux 9.3', 'platform': 'x86_64', 'param_packages': packages,
+           'param_sources': '3.6; osg-testing', 'host_name': 'exec1', 'host_address': '10.0.0.1'}
+    if died:
+        run.update({'run_status': 1, 'run_summary': 'Could not install osg-test'})
+    else:
+        run.update({'run_status': 0, 'osg_test_status': status})
+    return run
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.jobs_dir)
+
+    def _store(self):
+        return resultstore.ResultStore(self.jobs_dir, PACKAGE_MAPPING)
+
+    def test_incremental_tallies(self):
+        self._store().append(make_run('000'))
+        self._store().append(make_run('001', status='install yum_timeout'))
+        store = self._store().update()
+        self.assertEqual(store.total, 2)
+        self.assertEqual(store.tallies['os'], {'Alma 9 (x86_64)': [1, 0, 1, 0, 0, 0]})
+
+        self._store().append(make_run('002', packages='osg-ce-condor', died=True))
+        store = self._store()
+        store._load()
+        offset = store.offset
+        store.update()
+        self.assertTrue(store.offset > offset)
+        self.assertEqual(store.total, 3)
+        self.assertEqual(store.died, 1)
+        self.assertEqual(store.tallies['packages'], {'All': [1, 0, 1, 0, 0, 0], 'HTCondor-CE': [0, 1, 0, 0, 0, 0]})
+        self.assertEqual([run['job_serial'] for run in store.death_records()], ['002'])
+
+    def test_reanalyzed_job(self):
+        store = self._store()
+        store.append(make_run('000', packages='osg-ce-condor', died=True))
+        store.update()
+        store.append(make_run('000'))
+        store.update()
+        self.assertEqual(store.total, 1)
+        self.assertEqual(store.died, 0)
+        self.assertEqual(store.tallies['packages'], {'All': [1, 0, 0, 0, 0, 0]})
+        self.assertEqual([run['osg_test_status'] for run in store.records()], ['pass'])
+
+    def test_rebuilt_store(self):
+        store = self._store()
+        store.append(make_run('000'))
+        store.append(make_run('001'))
+        store.update()
+        with open(store.path, 'r') as combined:
+            first_record = combined.readline()
+        with open(store.path + '.new', 'w') as combined:
+            combined.write(first_record)
+        os.rename(store.path + '.new', store.path)
+        self.assertEqual(self._store().update().total, 1)
+
+    def test_missing_store(self):
+        store = self._store().update()
+        self.assertEqual(store.total, 0)
+        self.assertEqual(store.tallies['os'], {})
+
+    def test_step_tallies(self):
+        store = self._store()
+        first_run = make_run('000')
+        first_run['guest_steps'] = {'yum -y distro-sync': [600.0, 2, 3], 'osg-test': [3000.0, 0, 0]}
+        store.append(first_run)
+        store.append(make_run('001'))
+        store.update()
+        self.assertEqual(store.step_tallies, {'Alma 9 (x86_64)': {'jobs': 1, 'steps': {
+            'yum -y distro-sync': [1, 600.0, 2, 3], 'osg-test': [1, 3000.0, 0, 0]}}})
+
+        second_run = make_run('000')
+        second_run['guest_steps'] = {'osg-test': [2000.0, 0, 0]}
+        store.append(second_run)
+        self.assertEqual(self._store().update().step_tallies,
+                         {'Alma 9 (x86_64)': {'jobs': 1, 'steps': {'osg-test': [1, 2000.0, 0, 0]}}})
+
+    def _write_configurations(self, serials):
+        for serial in serials:
+            with open(os.path.join(self.jobs_dir, 'osg-test-%s.conf' % serial), 'w') as conf:
+                conf.write('[Config]\n')
+
+    def test_expected_jobs(self):
+        self.assertEqual(self._store().expected_jobs(), 0)
+        job = {'platform': 'alma_9.x86_64', 'sources': '3.6; osg-testing', 'packages': ['osg-tested-internal'],
+               'package_set': 'All', 'selinux': False}
+        runmanifest.RunManifest({}, {'000': job, '001': job, '002': job}).write(self.jobs_dir)
+        # create-io-image removes the osg-test configuration of each job, but some may be left from a failed one
+        self._write_configurations(['001', '004'])
+        self.assertEqual(self._store().expected_jobs(), 3)
+
+    def test_expected_jobs_from_dag(self):
+        with open(os.path.join(self.jobs_dir, resultstore.TEST_RUN_DAG), 'w') as dag:
+            for serial in ('000', '001'):
+                dag.write('JOB CreateImage%s create-io-image.sub\nJOB TestRun%s single-test-run.sub\n'
+                          % (serial, serial))
+        self._write_configurations(['000', '001', '002'])
+        self.assertEqual(self._store().expected_jobs(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import resultimage
+import rpminventory
+
+YUM_LOG = '''test_03_install_packages (osgtest.tests.special_install.TestInstall) ... ok
+Installed:
+  condor.x86_64 0:8.2.4-4.4.el7      osg-ca-certs.noarch 0:1.44-1.osg32.el7
+
+Dependency Installed:
+  voms.x86_64 0:2.0.12-3.el7
+
+Updated:
+  condor.x86_64 0:8.2.4-5.1.el7
+
+Replaced:
+  voms.x86_64 0:2.0.12-3.el7
+
+osgtest: 2024-01-01 10:00:00 special_cleanup
+Installed:
+  cleanup-only.x86_64 0:1.0-1.el7
+'''
+
+RPM_QA = '''bash-4.2.46-34.el7.x86_64
+gpg-pubkey-f4a80eb5-53a7ff4b
+warning: some error message
+'''
+
+class TestRpmInventory(unittest.TestCase):
+
+    def test_build_write_load(self):
+        jobs_dir = tempfile.mkdtemp()
+        try:
+            output_dir = os.path.join(jobs_dir, 'output-007')
+            os.makedirs(os.path.join(output_dir, 'output'))
+            for name, contents in (('osg-test-20240101.log', YUM_LOG), ('rpm-qa-start.log', RPM_QA)):
+                with open(os.path.join(output_dir, 'output', name), 'w') as log:
+                    log.write(contents)
+            inventory = rpminventory.build(resultimage.JobFiles.for_path(output_dir))
+            self.assertEqual(sorted(inventory), ['installed', 'schema', 'start'])
+            self.assertEqual(inventory['start']['bash.x86_64'], '4.2.46-34.el7')
+
+            self.assertEqual(rpminventory.load(output_dir), None)
+            rpminventory.write(inventory, output_dir)
+            self.assertEqual(rpminventory.load(output_dir), inventory)
+            # The index is used instead of the logs from now on
+            os.unlink(os.path.join(output_dir, 'output', 'osg-test-20240101.log'))
+            self.assertEqual(rpminventory.inventory(output_dir), inventory)
+
+            inventory['schema'] = rpminventory.SCHEMA_VERSION + 1
+            rpminventory.write(inventory, output_dir)
+            self.assertEqual(rpminventory.load(output_dir), None)
+        finally:
+            shutil.rmtree(jobs_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import sys
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import rpmparse
+
+YUM_LOG = '''test_03_install_packages (osgtest.tests.special_install.TestInstall) ... ok
+Installed:
+  condor.x86_64 0:8.2.4-4.4.el7      osg-ca-certs.noarch 0:1.44-1.osg32.el7
+
+Dependency Installed:
+  voms.x86_64 0:2.0.12-3.el7
+
+Updated:
+  condor.x86_64 0:8.2.4-5.1.el7
+
+Replaced:
+  voms.x86_64 0:2.0.12-3.el7
+
+osgtest: 2024-01-01 10:00:00 special_cleanup
+Installed:
+  cleanup-only.x86_64 0:1.0-1.el7
+'''
+
+DNF_LOG = '''Upgraded:
+  condor-9.0.1-1.el8.x86_64             xrootd-1:5.3.1-1.el8.x86_64
+Installed:
+  osg-ca-certs-1.99-1.osg36.el8.noarch
+
+'''
+
+ROOT_LOG = '''DEBUG util.py:388:  Running transaction
+DEBUG util.py:388:  Installed:
+DEBUG util.py:388:    bash.x86_64 0:4.2.46-34.el7
+DEBUG util.py:388:
+DEBUG util.py:388:  Complete!
+'''
+
+RPM_QA = '''bash-4.2.46-34.el7.x86_64
+gpg-pubkey-f4a80eb5-53a7ff4b
+warning: some error message
+'''
+
+PROFILE = '''***** Hostname
+host.example.com
+
+***** All RPMs
+bash-4.2.46-34.el7.x86_64
+osg-ca-certs-1.44-1.osg32.el7.noarch
+
+***** Something else
+'''
+
+class TestRpmParse(unittest.TestCase):
+
+    def test_strip(self):
+        self.assertEqual(rpmparse.arch_strip('condor.x86_64'), 'condor')
+        self.assertEqual(rpmparse.arch_strip('python3.11'), 'python3.11')
+        self.assertEqual(rpmparse.dist_strip('1:5.0.2-1.osg35.el7'), '1:5.0.2-1')
+        self.assertEqual(rpmparse.dist_strip('9.0.1-1.el8_4'), '9.0.1-1')
+        self.assertEqual(rpmparse.dist_strip('9.0.1-1'), '9.0.1-1')
+
+    def test_parse_nevra(self):
+        self.assertEqual(rpmparse.parse_nevra('xrootd-1:5.3.1-1.el8.x86_64'), ('xrootd.x86_64', '1:5.3.1-1.el8'))
+
+    def test_parse_rpm_qa_line(self):
+        self.assertEqual(rpmparse.parse_rpm_qa_line('bash-4.2.46-34.el7.x86_64.rpm\n'),
+                         ('bash.x86_64', '4.2.46-34.el7'))
+        self.assertEqual(rpmparse.parse_rpm_qa_line('gpg-pubkey-f4a80eb5-53a7ff4b'),
+                         ('gpg-pubkey', 'f4a80eb5-53a7ff4b'))
+
+    def test_parse_rpm_qa(self):
+        self.assertEqual(rpmparse.parse_rpm_qa(RPM_QA),
+                         {'bash.x86_64': '4.2.46-34.el7', 'gpg-pubkey': 'f4a80eb5-53a7ff4b'})
+        # the same as parsing it line by line
+        lines = ['%s-%d.0-1.el9.%s' % (name, i, arch) for i, name in enumerate(['a', 'b-c', 'd-e-f'])
+                 for arch in ('x86_64', 'noarch', 'i686', 'ppc64le')]
+        self.assertEqual(rpmparse.parse_rpm_qa('\r\n'.join(lines) + '\n'),
+                         dict(map(rpmparse.parse_rpm_qa_line, lines)))
+
+    def test_scrape_yum(self):
+        self.assertEqual(rpmparse.scrape_installed(YUM_LOG),
+                         {'condor.x86_64': '0:8.2.4-5.1.el7', 'osg-ca-certs.noarch': '0:1.44-1.osg32.el7'})
+
+    def test_scrape_dnf(self):
+        self.assertEqual(rpmparse.scrape_installed(DNF_LOG),
+                         {'condor.x86_64': '9.0.1-1.el8', 'xrootd.x86_64': '1:5.3.1-1.el8',
+                          'osg-ca-certs.noarch': '1.99-1.osg36.el8'})
+
+    def test_parse_package_list(self):
+        self.assertEqual(rpmparse.parse_package_list(ROOT_LOG), {'bash.x86_64': '0:4.2.46-34.el7'})
+        self.assertEqual(rpmparse.parse_package_list(RPM_QA.replace('warning: some error message\n', '')),
+                         {'bash.x86_64': '4.2.46-34.el7', 'gpg-pubkey': 'f4a80eb5-53a7ff4b'})
+        self.assertEqual(rpmparse.parse_package_list(PROFILE),
+                         {'bash.x86_64': '4.2.46-34.el7', 'osg-ca-certs.noarch': '1.44-1.osg32.el7'})
+        self.assertRaises(ValueError, rpmparse.parse_package_list, '***** All RPMs\n')
+
+    def test_normalize(self):
+        packages = rpmparse.scrape_installed(YUM_LOG)
+        self.assertEqual(rpmparse.normalize(packages), {'condor': '8.2.4-5.1', 'osg-ca-certs': '1.44-1'})
+        self.assertEqual(rpmparse.normalize(packages, strip_arch=False, strip_dist=False),
+                         {'condor.x86_64': '8.2.4-5.1.el7', 'osg-ca-certs.noarch': '1.44-1.osg32.el7'})
+
+    def test_string_to_version(self):
+        self.assertEqual(rpmparse.string_to_version('1.2-3.el9'), ('0', '1.2', '3.el9'))
+        self.assertEqual(rpmparse.string_to_version('2:1.2-3'), ('2', '1.2', '3'))
+        self.assertEqual(rpmparse.string_to_version('1.2'), ('0', '1.2', None))
+        self.assertEqual(rpmparse.string_to_version('-'), ('0', None, ''))
+        self.assertEqual(rpmparse.string_to_version(''), (None, None, None))
+
+    def test_segment_vercmp(self):
+        # From the rpmvercmp tests of rpm
+        for a, b, expected in (('1.0', '1.0', 0), ('1.0', '2.0', -1), ('2.0', '1.0', 1),
+                               ('2.0.1', '2.0.1', 0), ('2.0', '2.0.1', -1), ('2.0.1a', '2.0.1', 1),
+                               ('5.5p1', '5.5p10', -1), ('5.5p10', '5.5p1', 1), ('10xyz', '10.1xyz', -1),
+                               ('xyz10', 'xyz10.1', -1), ('xyz.4', '8', -1), ('1.0aa', '1.0a', 1),
+                               ('10b2', '10a1', 1), ('1.0010', '1.9', 1), ('1.05', '1.5', 0),
+                               ('20101121', '20101122', -1), ('2_0', '2_0', 0), ('2.0', '2_0', 0),
+                               ('a', 'a', 0), ('a+', 'a_', 0), ('+', '_', 0), ('1.0~rc1', '1.0~rc1', 0),
+                               ('1.0~rc1', '1.0', -1), ('1.0', '1.0~rc1', 1), ('1.0~rc1', '1.0~rc2', -1),
+                               ('1.0~rc1~git123', '1.0~rc1', -1), ('1.0^', '1.0', 1), ('1.0^git1', '1.0^git2', -1),
+                               ('1.0^git1', '1.01', -1), ('1.0^20160101', '1.0.1', -1), ('1.0~rc1^git1', '1.0~rc1', 1),
+                               ('1.0^git1~pre', '1.0^git1', -1)):
+            self.assertEqual(rpmparse.segment_vercmp(a, b), expected, '%s <=> %s' % (a, b))
+
+    def test_version_key(self):
+        vrs = ['8.7.2-1', '-', '10.0.0-1', '8.7.10-1', '1:1.0-1', '8.7.2-10', '8.7.2-2']
+        self.assertEqual(sorted(vrs, key=rpmparse.version_key),
+                         ['-', '8.7.2-1', '8.7.2-2', '8.7.2-10', '8.7.10-1', '10.0.0-1', '1:1.0-1'])
+
+if __name__ == '__main__':
+    unittest.main()
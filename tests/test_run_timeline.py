@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import importlib.machinery
+import importlib.util
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+LOADER = importlib.machinery.SourceFileLoader('run_timeline', os.path.join(PATHNAME, 'run-timeline'))
+rt = importlib.util.module_from_spec(importlib.util.spec_from_loader(LOADER.name, LOADER))
+sys.modules[LOADER.name] = rt
+LOADER.exec_module(rt)
+
+import runtrace
+
+EVENT = '''{code} ({cluster}.000.000) 2024-01-01 {time} {text}
+{extra}...
+'''
+
+# (node, cluster, submitted, transfer started, executing, terminated); 10:00 is the first submission
+NODES = (('GenerateDAG', 100, '10:00:00', None, '10:00:05', '10:00:10'),
+         ('CreateImage000', 101, '10:00:20', None, '10:00:25', '10:01:00'),
+         ('CreateImage001', 102, '10:00:20', None, '10:00:25', '10:02:00'),
+         ('TestRun000', 103, '10:01:10', '10:05:00', '10:06:00', '11:00:00'),
+         ('TestRun001', 104, '10:02:10', '10:03:00', '10:03:30', '10:30:00'),
+         ('ProcessResult000', 105, '11:00:10', None, '11:00:15', '11:02:00'),
+         ('ProcessResult001', 106, '10:30:10', None, '10:30:15', '10:31:00'),
+         ('HtmlOutput', 107, '11:02:30', None, '11:02:35', '11:03:00'))
+
+
+def epoch(clock):
+    return time.mktime(time.strptime('2024-01-01 ' + clock, '%Y-%m-%d %H:%M:%S'))
+
+def write_log(path, nodes):
+    with open(path, 'w') as log:
+        for node, cluster, submitted, transfer, executing, terminated in nodes:
+            log.write(EVENT.format(code='000', cluster=cluster, time=submitted, text='Job submitted from host: <x>',
+                                   extra='    DAG Node: %s\n' % node))
+            if transfer:
+                for clock, what in ((transfer, 'Started'), (executing, 'Finished')):
+                    log.write(EVENT.format(code='040', cluster=cluster, time=clock,
+                                           text='%s transferring input files' % what, extra=''))
+            log.write(EVENT.format(code='001', cluster=cluster, time=executing, text='Job executing on host: <x>',
+                                   extra=''))
+            log.write(EVENT.format(code='005', cluster=cluster, time=terminated, text='Job terminated.',
+                                   extra='\t(1) Normal termination (return value 0)\n'))
+
+
+class TestRunTimeline(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs_dir = tempfile.mkdtemp()
+        # DAGMan writes every node to its nodes.log, and each node to the log of its submit file too
+        write_log(os.path.join(self.jobs_dir, 'test-run.dag.nodes.log'), NODES)
+        write_log(os.path.join(self.jobs_dir, 'osg-test.log'), NODES[3:5])
+
+    def tearDown(self):
+        shutil.rmtree(self.jobs_dir)
+
+    def test_read_nodes(self):
+        nodes = rt.read_nodes(self.jobs_dir, 2024)
+        self.assertEqual(len(nodes), len(NODES))
+        test_run = nodes['TestRun000']
+        self.assertEqual((test_run['stage'], test_run['serial'], test_run['attempts']), ('TestRun', '000', 1))
+        self.assertEqual(rt.phases(test_run), [('queued', 230.0), ('transfer in', 60.0), ('running', 3240.0)])
+
+    def test_retried_node(self):
+        write_log(os.path.join(self.jobs_dir, 'create-io-image.log'),
+                  [('CreateImage000', 99, '10:00:15', None, '10:00:16', '10:00:18')])
+        node = rt.read_nodes(self.jobs_dir, 2024)['CreateImage000']
+        self.assertEqual((node['attempts'], node['submit'], node['job_id']), (2, epoch('10:00:15'), '101.0'))
+        self.assertEqual(rt.phases(node), [('queued', 5.0), ('running', 35.0)])
+
+    def test_critical_path(self):
+        nodes = rt.read_nodes(self.jobs_dir, 2024)
+        self.assertEqual([node['name'] for node in rt.critical_path(nodes)],
+                         ['GenerateDAG', 'CreateImage000', 'TestRun000', 'ProcessResult000', 'HtmlOutput'])
+
+    def test_spans(self):
+        runtrace.record('analyze-job-output', epoch('11:00:20'), epoch('11:01:00'), '000', jobs_dir=self.jobs_dir)
+        runtrace.record('analyze-job-output', epoch('10:30:20'), epoch('10:30:30'), '001', jobs_dir=self.jobs_dir)
+        with runtrace.span('vmu-reporter', jobs_dir=self.jobs_dir):
+            pass
+        with open(runtrace.trace_path(self.jobs_dir), 'a') as trace:
+            trace.write('{"stage": "upload-job-out')
+        spans = runtrace.read_spans(self.jobs_dir)
+        self.assertEqual([span_data['stage'] for span_data in spans],
+                         ['analyze-job-output', 'analyze-job-output', 'vmu-reporter'])
+        self.assertNotIn('serial', spans[2])
+        nodes = rt.read_nodes(self.jobs_dir, 2024)
+        self.assertEqual(rt.spans_within(spans, nodes['ProcessResult000']), spans[:1])
+        self.assertEqual(sorted(rt.durations(nodes, spans)['analyze-job-output']), [10.0, 40.0])
+
+    def test_report(self):
+        runtrace.record('analyze-job-output', epoch('11:00:20'), epoch('11:01:00'), '000', jobs_dir=self.jobs_dir)
+        report = io.StringIO()
+        with redirect_stdout(report):
+            rt.print_report(self.jobs_dir, rt.read_nodes(self.jobs_dir, 2024), runtrace.read_spans(self.jobs_dir), 4)
+        lines = report.getvalue().splitlines()
+        self.assertIn('8 DAG nodes, 1 spans, 1:03:00 from the first submission', lines[0])
+        self.assertIn('  1:00:20    analyze-job-output 0:00:40', lines)
+        self.assertIn('TestRun (running)                 2   0:54:00   0:54:00   0:54:00    1:20:30  | @ @|',
+                      lines)
+
+if __name__ == '__main__':
+    unittest.main()
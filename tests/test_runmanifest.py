@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+import runmanifest
+import vmu
+
+PARAMS = '''platforms:
+  - rocky_9.x86_64
+sources:
+  - opensciencegrid:master; 24; osg
+package_sets:
+  - label: HTCondor
+    packages:
+      - condor
+  - label: VOMS
+    selinux: True
+    packages:
+      - voms-server
+'''
+
+class TestRunManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.param_dir = os.path.join(self.tmp_dir, 'parameters.d')
+        os.mkdir(self.param_dir)
+        with open(os.path.join(self.param_dir, 'osg-24.yaml'), 'w') as param_file:
+            param_file.write(PARAMS)
+        self.flat_params = vmu.flatten_run_params(vmu.load_run_params(self.param_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_package_mapping(self):
+        manifest = runmanifest.RunManifest.from_flat_params(self.flat_params)
+        self.assertEqual(manifest.package_mapping(), vmu.package_mapping(self.flat_params))
+        self.assertEqual(manifest.package_mapping()['voms-server, /usr/sbin/semanage'], 'VOMS')
+        self.assertEqual(manifest.package_set_labels(), ['HTCondor', 'VOMS'])
+
+    def test_job(self):
+        manifest = runmanifest.RunManifest.from_flat_params(self.flat_params)
+        voms = self.flat_params['package_sets'][1]
+        manifest.add_job('000', ('rocky_9.x86_64', 'opensciencegrid:master; 24; osg', voms))
+        manifest.write(self.tmp_dir)
+        job = runmanifest.load(self.tmp_dir).job('000')
+        self.assertEqual(job['packages'], ['voms-server', '/usr/sbin/semanage'])
+        self.assertEqual(job['selinux'], True)
+        self.assertEqual(manifest.job('001'), None)
+
+    def test_load_run(self):
+        # a run generated without a manifest falls back on its parameters.d
+        manifest = runmanifest.load_run(self.tmp_dir, self.param_dir)
+        self.assertEqual(manifest.jobs, {})
+        self.assertEqual(manifest.params['platforms'], ['rocky_9.x86_64'])
+        # which the manifest then supersedes, edited or not
+        runmanifest.RunManifest({'platforms': [], 'sources': [], 'package_sets': []}).write(self.tmp_dir)
+        self.assertEqual(runmanifest.load_run(self.tmp_dir, self.param_dir).package_mapping(), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+#pylint: disable=R0904
+
+import io
+import os
+import sys
+import unittest
+
+PATHNAME = os.path.realpath('../bin')
+sys.path.insert(0, PATHNAME)
+
+from taglib import Html, Tag, indented
+
+class TestTaglib(unittest.TestCase):
+
+    def _table(self):
+        table = Tag('table')
+        row = table.append_new_tag('tr')
+        row.append_new_tag('td', class_='result pass').append('<b>Job</b>:\n001')
+        row.append_new_tag('td')
+        row.append('multi\nline')
+        return table
+
+    def test_str(self):
+        self.assertEqual(str(self._table()),
+                         '<table>\n'
+                         '  <tr>\n'
+                         '    <td class="result pass"><b>Job</b>:\n'
+                         '    001</td>\n'
+                         '    <td/>\n'
+                         '    multi\n'
+                         '    line\n'
+                         '  </tr>\n'
+                         '</table>')
+
+    def test_chunks(self):
+        table = self._table()
+        self.assertEqual(''.join(table.iter_chunks(4)), indented(str(table), 4))
+
+    def test_write(self):
+        html = Html('Results')
+        html.body.append(self._table())
+        stream = io.StringIO()
+        html.write(stream)
+        self.assertEqual(stream.getvalue(), str(html))
+        self.assertTrue(stream.getvalue().startswith('<!DOCTYPE html>\n<html lang="en">\n  <head>\n'))
+
+    def test_escaped(self):
+        tag = Tag('div').append_escaped('<b>100% & more</b>\xA0')
+        self.assertEqual(str(tag), '<div>&lt;b&gt;100&#37; &amp; more&lt;/b&gt;&nbsp;</div>')
+
+    def test_freeze(self):
+        cell = Tag('td', class_='result none', align='center').freeze()
+        self.assertEqual(str(cell), '<td class="result none" align="center"/>')
+        cell.set('rowspan', 2)
+        self.assertEqual(str(cell), '<td class="result none" align="center" rowspan="2"/>')
+        self.assertEqual(str(Tag('tr').set('id', 'x')), '<tr id="x"/>')
+        self.assertEqual(Tag('tr').get('id'), None)
+
+if __name__ == '__main__':
+    unittest.main()